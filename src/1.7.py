@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestRegressor
 import os
 import warnings
+from ethcast.plotting import finish_figure
 
 # 基础配置
 warnings.filterwarnings('ignore')
@@ -86,7 +87,7 @@ def run_prediction():
         plt.tight_layout()
 
         print("🚀 绘图成功！正在弹出窗口...")
-        plt.show()
+        finish_figure('ETH_1月7日预测.png')
 
     except Exception as e:
         print(f"运行失败: {e}")
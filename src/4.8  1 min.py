@@ -1,30 +1,26 @@
+import argparse
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-from lightgbm import LGBMRegressor
-from catboost import CatBoostRegressor
-from sklearn.metrics import mean_absolute_percentage_error
 from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.compare import compare_modes, mape, print_report, run_comparison
+from ethcast.plotting import finish_figure, setup_pyplot
+from ethcast import profiling, trace
+from ethcast.trace import span, traced
 
-# 1. 环境配置
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac环境，Windows建议改为 'SimHei'
-plt.rcParams['axes.unicode_minus'] = False
+# 1. 环境配置：中文字体在画图前由 setup_pyplot 设置（用到时才导入 matplotlib）
 
 
-def run_minute_by_minute_iteration():
+@traced()
+def run_minute_by_minute_iteration(mode='recursive', stride=1):
     # 文件路径
     train_file = '第四周大数据分析作业.xlsx'  # 训练集：4.1-4.8 05:04
     truth_file = '4.8 all day.xlsx'  # 验证集：4.8 全天真实走势
 
     try:
         # 加载数据
-        df_train = pd.read_excel(train_file).sort_values('datetime')
-        df_truth = pd.read_excel(truth_file).sort_values('datetime')
-
-        df_train['datetime'] = pd.to_datetime(df_train['datetime'])
-        df_truth['datetime'] = pd.to_datetime(df_truth['datetime'])
+        with span('load'):
+            df_train = load_ohlcv(train_file)
+            df_truth = load_ohlcv(truth_file)
 
         # 设定预测区间：05:04 -> 06:04 (共60步)
         start_time = pd.to_datetime('2019-04-08 05:04:00')
@@ -38,26 +34,22 @@ def run_minute_by_minute_iteration():
 
         # 2. 特征工程 (滑动窗口 30 分钟)
         window_size = 30
-
-        def create_xy(data):
-            X, y = [], []
-            prices = data['close'].values
-            for i in range(len(prices) - window_size):
-                X.append(prices[i: i + window_size])
-                y.append(prices[i + window_size])
-            return np.array(X), np.array(y)
-
-        X_train, y_train = create_xy(df_train)
+        # 滑动窗口由各工作进程用 make_xy 构造
 
         # 3. 初始化四个主流算法
-        models = {
-            'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'XGBoost': XGBRegressor(n_estimators=100, learning_rate=0.05),
-            'LightGBM': LGBMRegressor(n_estimators=100, verbose=-1),
-            'CatBoost': CatBoostRegressor(iterations=100, verbose=0)
+        model_params = {
+            'Random Forest': {'n_estimators': 100, 'random_state': 42},
+            'XGBoost': {'n_estimators': 100, 'learning_rate': 0.05},
+            'LightGBM': {'n_estimators': 100, 'verbose': -1},
+            'CatBoost': {'iterations': 100, 'verbose': 0}
         }
 
-        results = {}
+        # mode='both'：只对比递归与直接多步两种模式的预测延迟与 MAPE，不画图
+        if mode == 'both':
+            compare_modes(model_params, df_train['close'].values, window_size, target_steps,
+                          truth_segment['close'].values, stride)
+            return
+
         model_colors = {
             'Random Forest': '#1f77b4',  # 蓝色
             'XGBoost': '#d62728',  # 红色
@@ -65,68 +57,59 @@ def run_minute_by_minute_iteration():
             'CatBoost': '#ff7f0e'  # 橙色
         }
 
-        # 4. 核心逻辑：逐分钟递归
-        for name, model in models.items():
-            print(f"正在计算 {name} 的逐分钟路径...")
-            model.fit(X_train, y_train)
-
-            # 获取训练集最后的窗口作为起点
-            history_window = list(df_train['close'].values[-window_size:])
-            preds = []
-
-            for _ in range(target_steps):
-                # 用当前的窗口预测下一分钟
-                current_input = np.array(history_window[-window_size:]).reshape(1, -1)
-                next_val = model.predict(current_input)[0]
-
-                preds.append(next_val)
-                # 关键：将预测出的“下一分钟价格”存入窗口，用于预测“下下分钟”
-                history_window.append(next_val)
-
-            results[name] = preds
+        # 4. 核心逻辑：逐分钟递归（四个模型在进程池中同时训练与预测）
+        with span('train_and_forecast', mode=mode):
+            results, timings = run_comparison(model_params, df_train['close'].values, window_size, target_steps,
+                                              mode=mode, stride=stride,
+                                              cache_key={'data_file': train_file, 'feature_cols': ['close']})
 
         # 5. 计算 MAPE 误差率
         actual_prices = truth_segment['close'].values
         mape_scores = {}
-        for name, pred_list in results.items():
-            score = mean_absolute_percentage_error(actual_prices, pred_list)
-            mape_scores[name] = score
+        with span('mape'):
+            for name, pred_list in results.items():
+                score = mape(actual_prices, pred_list)
+                mape_scores[name] = score
 
         # 6. 绘图对比
-        plt.figure(figsize=(15, 8))
-
-        # 绘制真实全天文件的截取段
-        plt.plot(truth_segment['datetime'], actual_prices,
-                 label='真实走势 (4.8 all day)', color='black', linewidth=3, zorder=5)
-
-        # 绘制各模型预测路径
-        for name, pred_list in results.items():
-            plt.plot(truth_segment['datetime'], pred_list,
-                     label=f'{name} (MAPE: {mape_scores[name]:.4%})',
-                     color=model_colors[name], alpha=0.8, linestyle='--')
-
-        plt.title('以太币 05:04-06:04 逐分钟递归预测对比', fontsize=16)
-        plt.xlabel('时间')
-        plt.ylabel('价格 (USD)')
-        plt.legend(loc='best')
-        plt.grid(True, alpha=0.2)
-        plt.gcf().autofmt_xdate()
-
-        plt.show()
-
-        # 输出统计结果
-        print("\n" + "=" * 45)
-        print(f"🏆 05:04-06:04 阶段性误差分析 (MAPE)")
-        print("-" * 45)
-        # 按误差从小到大排序输出
-        sorted_scores = sorted(mape_scores.items(), key=lambda x: x[1])
-        for name, score in sorted_scores:
-            print(f"{name:15} : {score:.4%}")
-        print("=" * 45)
+        with span('plot'):
+            plt = setup_pyplot(['Arial Unicode MS'])  # Mac环境，Windows建议改为 'SimHei'
+            plt.figure(figsize=(15, 8))
+
+            # 绘制真实全天文件的截取段
+            plt.plot(truth_segment['datetime'], actual_prices,
+                     label='真实走势 (4.8 all day)', color='black', linewidth=3, zorder=5)
+
+            # 绘制各模型预测路径
+            for name, pred_list in results.items():
+                plt.plot(truth_segment['datetime'], pred_list,
+                         label=f'{name} (MAPE: {mape_scores[name]:.4%})',
+                         color=model_colors[name], alpha=0.8, linestyle='--')
+
+            plt.title('以太币 05:04-06:04 逐分钟递归预测对比', fontsize=16)
+            plt.xlabel('时间')
+            plt.ylabel('价格 (USD)')
+            plt.legend(loc='best')
+            plt.grid(True, alpha=0.2)
+            plt.gcf().autofmt_xdate()
+
+            finish_figure('逐分钟递归预测对比.png')
+
+        # 输出统计结果（按误差从小到大排序）
+        print_report(mape_scores, timings, "🏆 05:04-06:04 阶段性误差分析 (MAPE)", sort=True)
 
     except Exception as e:
         print(f"❌ 运行失败: {e}")
 
 
 if __name__ == "__main__":
-    run_minute_by_minute_iteration()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='05:04-06:04 逐分钟预测对比')
+    parser.add_argument('--mode', choices=['recursive', 'direct', 'both'], default='recursive',
+                        help='recursive: 逐步回填窗口；direct: 多输出模型一次预测整个区间；both: 对比两者')
+    parser.add_argument('--stride', type=int, default=1, help='直接模式下每隔多少分钟训练一个输出')
+    trace.add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+    trace.setup_from_args(args)
+    profiling.setup_from_args(args)
+    run_minute_by_minute_iteration(args.mode, args.stride)
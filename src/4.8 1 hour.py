@@ -1,16 +1,10 @@
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-from lightgbm import LGBMRegressor
-from catboost import CatBoostRegressor
-from sklearn.metrics import mean_absolute_percentage_error
 from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.compare import mape, print_report, run_comparison
+from ethcast.plotting import finish_figure, setup_pyplot
 
-# 1. 环境配置
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac环境
-plt.rcParams['axes.unicode_minus'] = False
+# 1. 环境配置：中文字体在画图前由 setup_pyplot 设置（用到时才导入 matplotlib）
 
 
 def run_hourly_iteration():
@@ -20,11 +14,8 @@ def run_hourly_iteration():
 
     try:
         # 加载数据
-        df_train = pd.read_excel(train_file).sort_values('datetime')
-        df_truth = pd.read_excel(truth_file).sort_values('datetime')
-
-        df_train['datetime'] = pd.to_datetime(df_train['datetime'])
-        df_truth['datetime'] = pd.to_datetime(df_truth['datetime'])
+        df_train = load_ohlcv(train_file)
+        df_truth = load_ohlcv(truth_file)
 
         # 设定时间点
         start_time = pd.to_datetime('2019-04-08 05:04:00')
@@ -38,59 +29,32 @@ def run_hourly_iteration():
 
         # 2. 特征工程 (窗口30分钟)
         window_size = 30
-
-        def prepare_data(data):
-            X, y = [], []
-            vals = data['close'].values
-            for i in range(len(vals) - window_size):
-                X.append(vals[i: i + window_size])
-                y.append(vals[i + window_size])
-            return np.array(X), np.array(y)
-
-        X_train, y_train = prepare_data(df_train)
+        # 滑动窗口由各工作进程用 make_xy 构造
 
         # 3. 初始化模型
-        models = {
-            'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'XGBoost': XGBRegressor(n_estimators=100, learning_rate=0.08),
-            'LightGBM': LGBMRegressor(n_estimators=100, verbose=-1),
-            'CatBoost': CatBoostRegressor(iterations=100, verbose=0)
+        model_params = {
+            'Random Forest': {'n_estimators': 100, 'random_state': 42},
+            'XGBoost': {'n_estimators': 100, 'learning_rate': 0.08},
+            'LightGBM': {'n_estimators': 100, 'verbose': -1},
+            'CatBoost': {'iterations': 100, 'verbose': 0}
         }
 
-        results = {}
         colors = {'RF': 'blue', 'XGB': 'red', 'LGBM': 'green', 'Cat': 'orange'}
 
-        # 4. 迭代预测逻辑 (每10分钟为一个预测块)
-        for name, model in models.items():
-            print(f"正在训练并迭代预测: {name}...")
-            model.fit(X_train, y_train)
-
-            # 初始数据窗口
-            current_window = list(df_train['close'].values[-window_size:])
-            all_preds = []
-
-            # 以10分钟为一个周期进行迭代
-            for _ in range(0, total_minutes, 10):
-                # 预测接下来的10步（如果剩余不足10步则取剩余步数）
-                steps_to_predict = min(10, total_minutes - len(all_preds))
-
-                for _ in range(steps_to_predict):
-                    input_x = np.array(current_window[-window_size:]).reshape(1, -1)
-                    pred = model.predict(input_x)[0]
-                    all_preds.append(pred)
-                    current_window.append(pred)  # 递归输入
-
-            results[name] = all_preds
+        # 4. 迭代预测逻辑（四个模型在进程池中同时训练与预测）
+        results, timings = run_comparison(model_params, df_train['close'].values, window_size, total_minutes,
+                                          cache_key={'data_file': train_file, 'feature_cols': ['close']})
 
         # 5. 计算 MAPE 误差
         actual_vals = truth_segment['close'].values
         metrics = {}
         for name, pred in results.items():
             # 确保长度对齐
-            error = mean_absolute_percentage_error(actual_vals, pred[:len(actual_vals)])
+            error = mape(actual_vals, pred[:len(actual_vals)])
             metrics[name] = error
 
         # 6. 可视化
+        plt = setup_pyplot(['Arial Unicode MS'])  # Mac环境
         plt.figure(figsize=(14, 7))
 
         # 真实走势
@@ -109,15 +73,10 @@ def run_hourly_iteration():
         plt.legend()
         plt.grid(True, alpha=0.3)
         plt.gcf().autofmt_xdate()
-        plt.show()
+        finish_figure('10分钟步进预测对比.png')
 
         # 打印底部结果
-        print("\n" + "=" * 40)
-        print(f"📊 误差统计 (MAPE) - 截止 06:04")
-        print("-" * 40)
-        for name, err in metrics.items():
-            print(f"{name:15}: {err:.4%}")
-        print("=" * 40)
+        print_report(metrics, timings, "📊 误差统计 (MAPE) - 截止 06:04")
 
     except Exception as e:
         print(f"❌ 运行失败: {e}")
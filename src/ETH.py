@@ -1,6 +1,8 @@
 import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
+from ethcast.data import load_ohlcv
+from ethcast.plotting import is_headless
 
 # 解决中文显示问题
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
@@ -10,11 +12,10 @@ plt.rcParams['axes.unicode_minus'] = False
 def plot_eth_chart(file_path):
     try:
         # 1. 读取 Excel 数据
-        df = pd.read_excel(file_path)
+        df = load_ohlcv(file_path)
 
         # 2. 预处理：将时间设为索引，并确保列名为英文小写（mplfinance的要求）
         # 假设你的列名是 'datetime', 'open', 'high', 'low', 'close', 'volume'
-        df['datetime'] = pd.to_datetime(df['datetime'])
         df.set_index('datetime', inplace=True)
 
         # 3. 绘制 K 线图
@@ -22,6 +23,8 @@ def plot_eth_chart(file_path):
         # volume=True 表示显示成交量
         print("正在生成 ETH 走势图...")
 
+        # 无界面模式下直接写文件，不弹窗口
+        save_kwargs = {'savefig': 'ETH_Kline.png'} if is_headless() else {}
         mpf.plot(df,
                  type='candle',
                  style='charles',
@@ -30,7 +33,8 @@ def plot_eth_chart(file_path):
                  ylabel_lower='成交量',
                  volume=True,
                  mav=(5, 10),
-                 figsize=(14, 8))
+                 figsize=(14, 8),
+                 **save_kwargs)
 
     except Exception as e:
         print(f"读取或绘图失败: {e}")
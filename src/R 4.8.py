@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestRegressor
-from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.windows import make_xy
+from ethcast.forecast import forecast_path
+from ethcast.registry import ModelRegistry
+from ethcast.plotting import finish_figure
+from ethcast.resample import bar_interval
 
 # 1. 配置
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
@@ -13,7 +17,7 @@ def forecast_full_day():
     file_path = '第四周大数据分析作业.xlsx'
     try:
         # 读取并处理数据
-        df = pd.read_excel(file_path).sort_values('datetime')
+        df = load_ohlcv(file_path)
 
         # 设定分割点：4月8日 早上 05:00
         split_time = pd.to_datetime('2019-04-08 05:00:00')
@@ -26,39 +30,24 @@ def forecast_full_day():
         feature_cols = ['close', 'open', 'high']
         train_data = train_df[feature_cols].values
 
-        X, y = [], []
-        for i in range(len(train_data) - window_size):
-            X.append(train_data[i: i + window_size].flatten())
-            y.append(train_data[i + window_size, 0])  # 预测 close
-
-        X, y = np.array(X), np.array(y)
+        # 每行是窗口内 window_size 分钟的特征拉平，目标是下一分钟的 close
+        X, y = make_xy(train_data, window_size)
 
         # 3. 训练随机森林
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X, y)
+        params = dict(n_estimators=100, random_state=42)
+        # 数据、截止时间、特征、窗口与参数都没变时直接加载上次训练好的模型
+        model = ModelRegistry.for_data(file_path).get_or_fit(
+            'Random Forest', params, X, y, data_file=file_path, split_time=split_time,
+            feature_cols=feature_cols, window_size=window_size)
         print("🌲 模型训练完成，开始滚动预测全天...")
 
         # 4. 滚动预测 (从 05:00 预测到 23:59)
-        # 预测次数 = 19小时 * 60分钟 = 1140次
-        prediction_steps = 19 * 60
-        current_window = train_data[-window_size:].tolist()  # 初始窗口
-
-        forecasted_prices = []
-        forecast_times = []
-        last_time = split_time
-
-        for _ in range(prediction_steps):
-            # 准备当前输入
-            input_data = np.array(current_window[-window_size:]).flatten().reshape(1, -1)
-            pred_close = model.predict(input_data)[0]
-
-            # 将预测值加入结果
-            forecasted_prices.append(pred_close)
-            last_time += timedelta(minutes=1)
-            forecast_times.append(last_time)
-
-            # 模拟生成下一分钟的特征 (简单假设 open/high 与预测的 close 一致)
-            current_window.append([pred_close, pred_close, pred_close])
+        # 预测次数 = 到当天结束还有几根 K 线（1 分钟线为 19小时 * 60分钟 = 1140次）
+        interval = bar_interval(train_df)
+        prediction_steps = int((split_time.normalize() + pd.Timedelta(days=1) - split_time) / interval)
+        # 从训练集最后一个窗口出发递归预测，假设未来的 open/high 与预测的 close 相同
+        forecasted_prices = forecast_path(model.predict, train_data[-window_size:], prediction_steps)
+        forecast_times = [split_time + interval * (i + 1) for i in range(prediction_steps)]
 
         # 5. 可视化
         plt.figure(figsize=(15, 7))
@@ -76,7 +65,7 @@ def forecast_full_day():
         plt.ylabel('价格 (USD)')
         plt.legend()
         plt.grid(True, alpha=0.3)
-        plt.show()
+        finish_figure('随机森林_全天预测.png')
 
     except Exception as e:
         print(f"❌ 运行失败: {e}")
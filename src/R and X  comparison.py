@@ -3,7 +3,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 from xgboost import XGBRegressor
 from sklearn.ensemble import RandomForestRegressor
-from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.windows import make_xy
+from ethcast.plotting import finish_figure
+from ethcast.resample import bar_interval
 
 # 1. 环境配置
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
@@ -13,7 +16,7 @@ plt.rcParams['axes.unicode_minus'] = False
 def run_comparison_forecast():
     file_path = '第四周大数据分析作业.xlsx'
     try:
-        df = pd.read_excel(file_path).sort_values('datetime')
+        df = load_ohlcv(file_path)
         print(f"✅ 数据加载成功。使用特征：close, open, high")
 
         # 2. 特征工程：多列输入
@@ -24,13 +27,8 @@ def run_comparison_forecast():
         data_matrix = df[feature_cols].values
         target_vector = df['close'].values
 
-        X, y = [], []
-        for i in range(len(data_matrix) - window_size):
-            # 将 20 行 * 3 列的数据拉平为 60 个特征的一行
-            X.append(data_matrix[i: i + window_size].flatten())
-            y.append(target_vector[i + window_size])
-
-        X, y = np.array(X), np.array(y)
+        # 将 20 行 * 3 列的数据拉平为 60 个特征的一行（close 在第 0 列）
+        X, y = make_xy(data_matrix, window_size)
 
         # 3. 训练两个模型
         print("🌲 正在训练随机森林 (Random Forest)...")
@@ -47,7 +45,7 @@ def run_comparison_forecast():
         xgb_pred = xgb_model.predict(last_window)[0]
 
         last_date = df['datetime'].iloc[-1]
-        next_date = last_date + timedelta(minutes=1)
+        next_date = last_date + bar_interval(df)
 
         # 5. 打印对比
         print("\n" + "=" * 40)
@@ -87,7 +85,7 @@ def run_comparison_forecast():
 
         # 自动调整布局，防止文字重叠
         plt.tight_layout()
-        plt.show()
+        finish_figure('RF_XGBoost_对比.png')
 
     except Exception as e:
         print(f"❌ 运行失败: {e}")
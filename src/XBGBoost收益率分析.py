@@ -1,19 +1,20 @@
 import pandas as pd
 import numpy as np
-import xgboost as xgb
 import matplotlib.pyplot as plt
-from sklearn.metrics import mean_squared_error
+from ethcast.data import load_ohlcv
+from ethcast.backtest import walk_forward_backtest
+from ethcast.plotting import finish_figure
 
 # 设置中文字体（SimHei）
 plt.rcParams['font.sans-serif'] = ['SimHei']
 plt.rcParams['axes.unicode_minus'] = False
 
 
-def backtest_strategy():
+def backtest_strategy(test_size=240, train_size=None, fee_bps=0.0, slippage_bps=0.0):
     # 1. 加载数据
     file_path = '第四周大数据分析作业.xlsx'
     try:
-        df = pd.read_excel(file_path)
+        df = load_ohlcv(file_path)
     except:
         # 如果找不到文件，模拟一段示例数据用于演示
         print("未找到文件，正在生成模拟数据...")
@@ -25,63 +26,33 @@ def backtest_strategy():
     # 2. 特征工程：用过去5分钟预测未来3分钟
     lookback = 5
     forecast_step = 3
+    close = df['close'].values
 
-    # 构造过去5分钟的特征
-    for i in range(1, lookback + 1):
-        df[f'lag_{i}'] = df['close'].shift(i)
+    # 前80%作为初始训练集，后20%做前向回测：
+    # 每 test_size 分钟用之前的数据重新训练一次（train_size=None 为扩展窗口，否则为滚动窗口）
+    n_samples = len(close) - lookback - forecast_step
+    split = int(n_samples * 0.8)
 
-    # 构造目标值：未来第3分钟的价格
-    df['target_price'] = df['close'].shift(-forecast_step)
-    df.dropna(inplace=True)
-
-    # 划分特征和标签
-    features = [f'lag_{i}' for i in range(1, lookback + 1)]
-    X = df[features]
-    y = df['target_price']
-
-    # 划分训练集和测试集 (前80%训练，后20%模拟回测)
-    split = int(len(df) * 0.8)
-    X_train, X_test = X.iloc[:split], X.iloc[split:]
-    y_train, y_test = y.iloc[:split], y.iloc[split:]
-    test_dates = df['datetime'].iloc[split:]
-    current_prices = df['close'].iloc[split:]  # 买入时的价格
-
-    # 3. XGBoost 模型训练
-    model = xgb.XGBRegressor(objective='reg:squarederror', n_estimators=100)
-    model.fit(X_train, y_train)
-
-    # 预测未来价格
-    predicted_prices = model.predict(X_test)
-
-    # 4. 投资逻辑模拟
+    # 3. XGBoost 模型训练与预测（各折在进程池中并行）
     investment_per_trade = 100
-    profits = []
-
-    # 遍历测试集进行模拟
-    for i in range(len(predicted_prices)):
-        pred_future_price = predicted_prices[i]
-        curr_price = current_prices.iloc[i]
-        actual_future_price = y_test.iloc[i]
-
-        # 逻辑：预测未来涨，则买入
-        if pred_future_price > curr_price:
-            # 计算收益率并乘以100元
-            profit = investment_per_trade * (actual_future_price / curr_price - 1)
-        else:
-            profit = 0
-
-        profits.append(profit)
-
-    # 转换为 Series 方便计算
-    profits_series = pd.Series(profits, index=test_dates.index)
-    cumulative_profit = profits_series.cumsum()
-    error = np.abs(predicted_prices - y_test.values)
+    result = walk_forward_backtest(
+        close, 'XGBoost', {'objective': 'reg:squarederror', 'n_estimators': 100},
+        lookback=lookback, horizon=forecast_step, test_size=test_size, train_size=train_size, start=split,
+        stake=investment_per_trade, fee_bps=fee_bps, slippage_bps=slippage_bps)
+    print("📈 " + result.report())
+
+    # 4. 投资逻辑：预测未来涨则买入，收益 = 100 * (未来价格 / 当前价格 - 1)，已在回测引擎中向量化计算
+    test_dates = df['datetime'].values[result.positions]
+    predicted_prices = result.predicted
+    actual_prices = result.actual
+    cumulative_profit = result.cumulative
+    error = np.abs(predicted_prices - actual_prices)
 
     # 5. 可视化
     fig, axes = plt.subplots(3, 1, figsize=(12, 15), sharex=False)
 
     # 图1：实际价格与预测价格曲线
-    axes[0].plot(test_dates, y_test.values, label='Actual Future Price', color='black', alpha=0.7)
+    axes[0].plot(test_dates, actual_prices, label='Actual Future Price', color='black', alpha=0.7)
     axes[0].plot(test_dates, predicted_prices, label='XGBoost Predicted', color='red', linestyle='--')
     axes[0].set_title('每日实际预测价格曲线 (Actual vs Predicted)')
     axes[0].legend()
@@ -93,15 +64,15 @@ def backtest_strategy():
 
     # 图3：收益曲线
     axes[2].plot(test_dates, cumulative_profit, label='Cumulative Profit (RMB)', color='green')
-    axes[2].set_title(f'策略总收益曲线 (每笔投入100元, 总收益: {cumulative_profit.iloc[-1]:.2f} 元)')
+    axes[2].set_title(f'策略总收益曲线 (每笔投入100元, 总收益: {cumulative_profit[-1]:.2f} 元)')
     axes[2].axhline(y=0, color='black', linestyle='-', alpha=0.3)
     axes[2].legend()
 
     plt.tight_layout()
-    plt.show()
+    finish_figure('策略回测.png')
 
-    print(f"模拟结束。最终累计收益: {cumulative_profit.iloc[-1]:.2f} 元")
+    print(f"模拟结束。最终累计收益: {cumulative_profit[-1]:.2f} 元")
 
 
 if __name__ == "__main__":
-    backtest_strategy()
\ No newline at end of file
+    backtest_strategy()
@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from xgboost import XGBRegressor
-from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.windows import make_xy
+from ethcast.forecast import forecast_path
+from ethcast.registry import ModelRegistry
+from ethcast.plotting import finish_figure
+from ethcast.resample import bar_interval
 
 # 1. 环境配置
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
@@ -13,7 +17,7 @@ def xgboost_full_day_forecast():
     file_path = '第四周大数据分析作业.xlsx'
     try:
         # 读取并排序数据
-        df = pd.read_excel(file_path).sort_values('datetime')
+        df = load_ohlcv(file_path)
 
         # 设定分割点：4月8日 05:00
         split_time = pd.to_datetime('2019-04-08 05:00:00')
@@ -26,44 +30,31 @@ def xgboost_full_day_forecast():
         feature_cols = ['close', 'open', 'high']
         train_data = train_df[feature_cols].values
 
-        X, y = [], []
-        for i in range(len(train_data) - window_size):
-            X.append(train_data[i: i + window_size].flatten())
-            y.append(train_data[i + window_size, 0])  # 预测 close
-
-        X, y = np.array(X), np.array(y)
+        # 每行是窗口内 window_size 分钟的特征拉平，目标是下一分钟的 close
+        X, y = make_xy(train_data, window_size)
 
         # 3. 训练 XGBoost 模型
         # 调优参数以增强趋势捕捉能力
-        model = XGBRegressor(
+        params = dict(
             n_estimators=300,
             learning_rate=0.05,
             max_depth=6,
             objective='reg:squarederror',
             n_jobs=-1
         )
-        model.fit(X, y)
+        # 数据、截止时间、特征、窗口与参数都没变时直接加载上次训练好的模型
+        model = ModelRegistry.for_data(file_path).get_or_fit(
+            'XGBoost', params, X, y, data_file=file_path, split_time=split_time,
+            feature_cols=feature_cols, window_size=window_size)
         print("🚀 XGBoost 训练完成，开始滚动预测全天走势...")
 
         # 4. 滚动预测 (05:00 - 23:59)
-        prediction_steps = 19 * 60
-        current_window = train_data[-window_size:].tolist()
-
-        forecasted_prices = []
-        forecast_times = []
-        last_time = split_time
-
-        for _ in range(prediction_steps):
-            input_data = np.array(current_window[-window_size:]).flatten().reshape(1, -1)
-            pred_close = model.predict(input_data)[0]
-
-            forecasted_prices.append(pred_close)
-            last_time += timedelta(minutes=1)
-            forecast_times.append(last_time)
-
-            # 将预测结果推入窗口，进行下一步迭代
-            # 这里简单假设未来的 open/high 与预测的 close 相同
-            current_window.append([pred_close, pred_close, pred_close])
+        # 预测次数 = 到当天结束还有几根 K 线（1 分钟线为 19 * 60 次）
+        interval = bar_interval(train_df)
+        prediction_steps = int((split_time.normalize() + pd.Timedelta(days=1) - split_time) / interval)
+        # 从训练集最后一个窗口出发递归预测，假设未来的 open/high 与预测的 close 相同
+        forecasted_prices = forecast_path(model.predict, train_data[-window_size:], prediction_steps)
+        forecast_times = [split_time + interval * (i + 1) for i in range(prediction_steps)]
 
         # 5. 可视化
         plt.figure(figsize=(15, 7))
@@ -81,7 +72,7 @@ def xgboost_full_day_forecast():
         plt.ylabel('价格 (USD)')
         plt.legend()
         plt.grid(True, alpha=0.2)
-        plt.show()
+        finish_figure('XGBoost_全天预测.png')
 
     except Exception as e:
         print(f"❌ 运行失败: {e}")
@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from xgboost import XGBRegressor
-from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.windows import make_xy
+from ethcast.forecast import forecast_path
+from ethcast.registry import ModelRegistry
+from ethcast.plotting import finish_figure
+from ethcast.resample import bar_interval
 
 # 1. 环境配置
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac 中文支持
@@ -13,7 +17,7 @@ def xgboost_30min_forecast():
     file_path = '第四周大数据分析作业.xlsx'
     try:
         # 读取数据并排序
-        df = pd.read_excel(file_path).sort_values('datetime')
+        df = load_ohlcv(file_path)
 
         # 设定预测起点
         start_time = pd.to_datetime('2019-04-08 05:04:00')
@@ -29,45 +33,28 @@ def xgboost_30min_forecast():
         feature_cols = ['close', 'open', 'high']
         train_data = train_df[feature_cols].values
 
-        X, y = [], []
-        for i in range(len(train_data) - window_size):
-            # 将 15*3 的矩阵拉平为一维向量作为输入
-            X.append(train_data[i: i + window_size].flatten())
-            y.append(train_data[i + window_size, 0])  # 目标是下一分钟的 close
-
-        X, y = np.array(X), np.array(y)
+        # 每行是窗口内 window_size 分钟的特征拉平，目标是下一分钟的 close
+        X, y = make_xy(train_data, window_size)
 
         # 3. 训练 XGBoost 模型
         # 参数优化：较小的学习率有助于平滑预测
-        model = XGBRegressor(
+        params = dict(
             n_estimators=200,
             learning_rate=0.03,
             max_depth=5,
             objective='reg:squarederror'
         )
-        model.fit(X, y)
+        # 数据、截止时间、特征、窗口与参数都没变时直接加载上次训练好的模型
+        model = ModelRegistry.for_data(file_path).get_or_fit(
+            'XGBoost', params, X, y, data_file=file_path, split_time=start_time,
+            feature_cols=feature_cols, window_size=window_size)
 
         # 4. 递归滚动预测未来 30 分钟
         prediction_steps = 30
-        current_window = train_data[-window_size:].tolist()
-
-        forecast_prices = []
-        forecast_times = []
-        curr_time = start_time
-
-        for _ in range(prediction_steps):
-            # 准备输入
-            input_x = np.array(current_window[-window_size:]).flatten().reshape(1, -1)
-            # 预测
-            pred_close = model.predict(input_x)[0]
-
-            # 记录结果
-            forecast_prices.append(pred_close)
-            curr_time += timedelta(minutes=1)
-            forecast_times.append(curr_time)
-
-            # 更新窗口：将预测值作为新的“已知”数据（假设 open/high 趋同于 close）
-            current_window.append([pred_close, pred_close, pred_close])
+        # 从训练集最后一个窗口出发递归预测，假设未来的 open/high 与预测的 close 相同
+        forecast_prices = forecast_path(model.predict, train_data[-window_size:], prediction_steps)
+        interval = bar_interval(train_df)
+        forecast_times = [start_time + interval * (i + 1) for i in range(prediction_steps)]
 
         # 5. 可视化
         plt.figure(figsize=(12, 6))
@@ -91,7 +78,7 @@ def xgboost_30min_forecast():
         plt.legend()
         plt.grid(True, alpha=0.3)
         plt.gcf().autofmt_xdate()
-        plt.show()
+        finish_figure('XGBoost_30分钟预测.png')
 
         # 输出预测详情
         print("\n" + "📊 预测简报 " + "-" * 20)
@@ -1,31 +1,26 @@
+import argparse
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-from lightgbm import LGBMRegressor
-from catboost import CatBoostRegressor
-from sklearn.metrics import mean_absolute_percentage_error
 from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.compare import compare_modes, mape, print_report, run_comparison
+from ethcast.plotting import finish_figure, setup_pyplot
+from ethcast import profiling, trace
+from ethcast.trace import span, traced
 
-# 1. 环境配置
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac字体，Windows可改为'SimHei'
-plt.rcParams['axes.unicode_minus'] = False
+# 1. 环境配置：中文字体在画图前由 setup_pyplot 设置（用到时才导入 matplotlib）
 
 
-def run_all_day_comparison():
+@traced()
+def run_all_day_comparison(mode='recursive', stride=15):
     # 文件路径（请确保这两个文件在同一个文件夹下）
     train_file = '第四周大数据分析作业.xlsx'  # 包含4.1-4.8 05:00数据
     truth_file = '4.8 all day.xlsx'  # 包含4.8全天真实数据
 
     try:
         # 加载数据
-        df_train = pd.read_excel(train_file).sort_values('datetime')
-        df_truth = pd.read_excel(truth_file).sort_values('datetime')
-
-        # 统一时间格式
-        df_train['datetime'] = pd.to_datetime(df_train['datetime'])
-        df_truth['datetime'] = pd.to_datetime(df_truth['datetime'])
+        with span('load'):
+            df_train = load_ohlcv(train_file)
+            df_truth = load_ohlcv(truth_file)
 
         # 确定预测起点 (4月8日 05:04)
         start_time = pd.to_datetime('2019-04-08 05:04:00')
@@ -37,25 +32,22 @@ def run_all_day_comparison():
 
         # 2. 特征工程 (滑动窗口)
         window_size = 30
-
-        def prepare_data(data):
-            X, y = [], []
-            vals = data['close'].values
-            for i in range(len(vals) - window_size):
-                X.append(vals[i: i + window_size])
-                y.append(vals[i + window_size])
-            return np.array(X), np.array(y)
-
-        X_train, y_train = prepare_data(df_train)
+        # 滑动窗口由各工作进程用 make_xy 构造
 
         # 3. 初始化模型
-        models = {
-            'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'XGBoost': XGBRegressor(n_estimators=100, learning_rate=0.1),
-            'LightGBM': LGBMRegressor(n_estimators=100, verbose=-1),
-            'CatBoost': CatBoostRegressor(iterations=100, verbose=0)
+        model_params = {
+            'Random Forest': {'n_estimators': 100, 'random_state': 42},
+            'XGBoost': {'n_estimators': 100, 'learning_rate': 0.1},
+            'LightGBM': {'n_estimators': 100, 'verbose': -1},
+            'CatBoost': {'iterations': 100, 'verbose': 0}
         }
 
+        # mode='both'：只对比递归与直接多步两种模式的预测延迟与 MAPE，不画图
+        if mode == 'both':
+            compare_modes(model_params, df_train['close'].values, window_size, prediction_steps,
+                          truth_segment['close'].values, stride)
+            return
+
         colors = {
             'Truth': 'black',
             'Random Forest': 'blue',
@@ -64,62 +56,56 @@ def run_all_day_comparison():
             'CatBoost': 'orange'
         }
 
-        results = {}
-
-        # 4. 训练与递归预测
-        for name, model in models.items():
-            print(f"正在训练并滚动预测: {name}...")
-            model.fit(X_train, y_train)
-
-            # 初始窗口：训练集最后30分钟的价格
-            current_window = list(df_train['close'].values[-window_size:])
-            predictions = []
-
-            for _ in range(prediction_steps):
-                input_data = np.array(current_window[-window_size:]).reshape(1, -1)
-                pred = model.predict(input_data)[0]
-                predictions.append(pred)
-                current_window.append(pred)  # 递归：将预测值加入窗口
-
-            results[name] = predictions
+        # 4. 训练与递归预测（四个模型在进程池中同时训练）
+        with span('train_and_forecast', mode=mode):
+            results, timings = run_comparison(model_params, df_train['close'].values, window_size, prediction_steps,
+                                              mode=mode, stride=stride,
+                                              cache_key={'data_file': train_file, 'feature_cols': ['close']})
 
         # 5. 计算误差 (MAPE)
         actual = truth_segment['close'].values
         error_rates = {}
-        for name, pred in results.items():
-            error = mean_absolute_percentage_error(actual, pred)
-            error_rates[name] = error
+        with span('mape'):
+            for name, pred in results.items():
+                error = mape(actual, pred)
+                error_rates[name] = error
 
         # 6. 可视化
-        plt.figure(figsize=(15, 8))
-
-        # 绘制真实走势
-        plt.plot(truth_segment['datetime'], actual, label='真实全天走势', color=colors['Truth'], linewidth=2, zorder=5)
-
-        # 绘制各模型预测走势
-        for name, pred in results.items():
-            plt.plot(truth_segment['datetime'], pred, label=f'{name} (MAPE: {error_rates[name]:.2%})',
-                     color=colors[name], alpha=0.8)
-
-        plt.title('4月8日全天走势预测对比：四种算法递归模拟', fontsize=16)
-        plt.xlabel('时间')
-        plt.ylabel('价格 (USD)')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.savefig('全天预测对比图.png', dpi=300)
-        plt.show()
-
-        # 打印误差总结表格
-        print("\n" + "=" * 30)
-        print("📊 模型误差率统计 (MAPE)")
-        print("-" * 30)
-        for name, err in error_rates.items():
-            print(f"{name:15}: {err:.4%}")
-        print("=" * 30)
+        with span('plot'):
+            plt = setup_pyplot(['Arial Unicode MS'])  # Mac字体，Windows可改为'SimHei'
+            plt.figure(figsize=(15, 8))
+
+            # 绘制真实走势
+            plt.plot(truth_segment['datetime'], actual, label='真实全天走势', color=colors['Truth'], linewidth=2,
+                     zorder=5)
+
+            # 绘制各模型预测走势
+            for name, pred in results.items():
+                plt.plot(truth_segment['datetime'], pred, label=f'{name} (MAPE: {error_rates[name]:.2%})',
+                         color=colors[name], alpha=0.8)
+
+            plt.title('4月8日全天走势预测对比：四种算法递归模拟', fontsize=16)
+            plt.xlabel('时间')
+            plt.ylabel('价格 (USD)')
+            plt.legend()
+            plt.grid(True, alpha=0.3)
+            finish_figure('全天预测对比图.png', dpi=300, always_save=True)
+
+        # 打印误差与耗时总结表格
+        print_report(error_rates, timings, "📊 模型误差率统计 (MAPE)")
 
     except Exception as e:
         print(f"❌ 运行错误: {e}")
 
 
 if __name__ == "__main__":
-    run_all_day_comparison()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='4月8日全天走势预测对比')
+    parser.add_argument('--mode', choices=['recursive', 'direct', 'both'], default='recursive',
+                        help='recursive: 逐步回填窗口；direct: 多输出模型一次预测整个区间；both: 对比两者')
+    parser.add_argument('--stride', type=int, default=15, help='直接模式下每隔多少分钟训练一个输出')
+    trace.add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+    trace.setup_from_args(args)
+    profiling.setup_from_args(args)
+    run_all_day_comparison(args.mode, args.stride)
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ethcast.backtest import compute_pnl, walk_forward_backtest  # noqa: E402
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+
+
+def loop_pnl(pred, current, actual, stake=100.0):
+    # 原 backtest_strategy 的写法：逐行 iloc 取值
+    pred = pd.Series(pred)
+    current = pd.Series(current)
+    actual = pd.Series(actual)
+    profits = []
+    for i in range(len(pred)):
+        if pred.iloc[i] > current.iloc[i]:
+            profits.append(stake * (actual.iloc[i] / current.iloc[i] - 1))
+        else:
+            profits.append(0)
+    return np.array(profits)
+
+
+def run_backtest_benchmark():
+    rng = np.random.default_rng(42)
+    close = 150 * np.exp(np.cumsum(rng.standard_normal(MINUTES_PER_YEAR) * 5e-4))
+    print(f"模拟数据: {len(close):,} 根分钟线（一年）")
+
+    # 1. 收益计算：逐行循环 vs 向量化
+    current = close[:-3]
+    actual = close[3:]
+    pred = actual + rng.standard_normal(len(actual)) * 0.05
+    t0 = time.perf_counter()
+    ref = loop_pnl(pred, current, actual)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fast, _ = compute_pnl(pred, current, actual)
+    t_vec = time.perf_counter() - t0
+    assert np.allclose(ref, fast)
+    print(f"收益计算: 逐行循环 {t_loop:.2f}s | 向量化 {t_vec * 1000:.1f}ms | 加速 {t_loop / t_vec:.0f}x")
+
+    # 2. 完整前向回测：滚动 7 天训练，每天重训一次，含手续费与滑点
+    for parallel in (False, True):
+        result = walk_forward_backtest(close, 'LightGBM', {'n_estimators': 50, 'verbose': -1},
+                                       test_size=1440, train_size=7 * 1440, parallel=parallel,
+                                       fee_bps=1.0, slippage_bps=0.5)
+        print(f"{'并行' if parallel else '串行'}: " + result.report())
+
+
+if __name__ == "__main__":
+    run_backtest_benchmark()
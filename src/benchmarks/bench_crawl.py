@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pawangzhan'))
+from crawler import crawl_books, parse_listing  # noqa: E402
+from fixture_site import build_site, serve_site  # noqa: E402
+
+TARGET = 1000  # 抓完整个站点
+
+
+def naive_crawl(base_url, target_count):
+    # 原 book.py 写法：逐页 requests.get，无会话复用、无并发
+    all_books = []
+    soup = BeautifulSoup(requests.get(base_url).text, 'html.parser')
+    for cat in soup.select('.nav-list ul li a'):
+        if len(all_books) >= target_count:
+            break
+        category_url = base_url + cat['href']
+        current = category_url
+        while current and len(all_books) < target_count:
+            page = BeautifulSoup(requests.get(current).text, 'html.parser')
+            for book in page.select('.product_pod'):
+                if len(all_books) >= target_count:
+                    break
+                all_books.append(book.h3.a['title'])
+            next_button = page.select_one('.next a')
+            current = category_url.rsplit('/', 1)[0] + '/' + next_button['href'] if next_button else None
+    return all_books
+
+
+def run_crawl_benchmark(latency=0.05):
+    pages = build_site()
+    print(f"测试站点: {len(pages) - 1} 个页面，每个请求延迟 {latency * 1000:.0f} ms")
+
+    with serve_site(pages, latency=latency) as url:
+        t0 = time.perf_counter()
+        naive = naive_crawl(url, TARGET)
+        naive_time = time.perf_counter() - t0
+        n_pages = len(pages) - 1
+        print(f"{'逐页 requests.get':<28}{naive_time:>8.2f}s  {n_pages / naive_time:>8.1f} 页/秒")
+
+        for limit, per_host in [(4, 4), (20, 8), (32, 32)]:
+            books, stats = crawl_books(TARGET, base_url=url, limit=limit, limit_per_host=per_host, verbose=False)
+            assert [b['书籍名称'] for b in books] == naive
+            label = f"asyncio 池 {limit}/每主机 {per_host}"
+            print(f"{label:<28}{stats.seconds:>8.2f}s  {stats.pages_per_sec:>8.1f} 页/秒  "
+                  f"({naive_time / stats.seconds:.1f}x)")
+
+    # 解析器单独对比：同一批列表页，html.parser 与 lxml
+    listing = [html for path, html in pages.items() if path.startswith('/catalogue')]
+    for parser in ['html.parser', 'lxml']:
+        t0 = time.perf_counter()
+        for html in listing:
+            parse_listing(html, 'x', parser=parser)
+        elapsed = time.perf_counter() - t0
+        print(f"解析 {parser:<12}{elapsed * 1000:>8.1f} ms  {len(listing) / elapsed:>8.0f} 页/秒")
+
+
+if __name__ == "__main__":
+    run_crawl_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 0.05)
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+from ethcast.data import load_ohlcv  # noqa: E402
+from ethcast.features import DEFAULT_FEATURES, FeatureEngine  # noqa: E402
+
+
+def pandas_features(df):
+    # 常见的 pandas 写法：逐列 shift / rolling / ewm，每个指标插入一列
+    out = pd.DataFrame(index=df.index)
+    close, vol = df['close'], df['volume']
+    out['close'] = close
+    for n in (1, 5):
+        out[f'ret_{n}'] = close / close.shift(n) - 1
+    out['sma_10'] = close.rolling(10).mean()
+    out['std_30'] = close.pct_change().rolling(30).std(ddof=0)
+    for n in (12, 26):
+        out[f'ema_{n}'] = close.ewm(span=n, adjust=False).mean()
+    delta = close.diff().fillna(0)
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    out['rsi_14'] = 100 - 100 / (1 + gain / loss)
+    prev = close.shift(1).fillna(close)
+    tr = pd.concat([df['high'] - df['low'], (df['high'] - prev).abs(), (df['low'] - prev).abs()], axis=1).max(axis=1)
+    out['atr_14'] = tr.ewm(alpha=1 / 14, adjust=False).mean()
+    typical = (df['high'] + df['low'] + close) / 3
+    out['vwap_30'] = (typical * vol).rolling(30).sum() / vol.rolling(30).sum()
+    out['volz_30'] = (vol - vol.rolling(30).mean()) / vol.rolling(30).std(ddof=0)
+    return out.to_numpy()
+
+
+def _best(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def run_feature_benchmark(steps=300):
+    df = load_ohlcv(os.path.join(SRC, '第四周大数据分析作业.xlsx'))
+    engine = FeatureEngine(DEFAULT_FEATURES)
+    print(f"{len(df)} 根 K 线，{len(DEFAULT_FEATURES)} 个特征")
+    print(f"{'pandas 逐列计算':<24}{_best(lambda: pandas_features(df)) * 1000:>9.2f} ms")
+    print(f"{'FeatureEngine 一次遍历':<24}{_best(lambda: engine.compute(df)) * 1000:>9.2f} ms")
+
+    # 递归预测场景：每预测一根新 K 线，要得到它的特征行
+    history = df.iloc[:-steps]
+    future = df.iloc[-steps:][['open', 'high', 'low', 'close', 'volume']].to_numpy()
+    cols = {c: list(history[c].to_numpy()) for c in ['open', 'high', 'low', 'close', 'volume']}
+    t0 = time.perf_counter()
+    for bar in future:
+        for c, x in zip(cols, bar):
+            cols[c].append(x)
+        engine.compute(cols)[-1]
+    naive = (time.perf_counter() - t0) / steps
+    state = engine.state(history)
+    t0 = time.perf_counter()
+    for bar in future:
+        state.update(*bar)
+    incremental = (time.perf_counter() - t0) / steps
+    print(f"{'每根重新整体计算':<24}{naive * 1e6:>9.0f} us/根")
+    print(f"{'FeatureState 增量更新':<24}{incremental * 1e6:>9.0f} us/根  (x{naive / incremental:.0f})")
+
+
+if __name__ == "__main__":
+    run_feature_benchmark()
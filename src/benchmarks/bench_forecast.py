@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from xgboost import XGBRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ethcast.forecast import ForecastStats, forecast_scenarios, perturb_windows, windows_ending_at  # noqa: E402
+from ethcast.windows import make_xy  # noqa: E402
+
+WINDOW_SIZE = 30
+STEPS = 1140  # 与 R 4.8.py 一样预测 05:00-24:00
+
+
+def naive_forecast(model, windows, steps):
+    # 原脚本写法：每条路径单独递归，每一步 predict 一个 1×w 的数组
+    out = []
+    for window in windows:
+        history = list(window)
+        preds = []
+        for _ in range(steps):
+            pred = model.predict(np.array(history[-WINDOW_SIZE:]).reshape(1, -1))[0]
+            preds.append(pred)
+            history.append(pred)
+        out.append(preds)
+    return np.array(out)
+
+
+def run_forecast_benchmark(n_starts=4, n_perturb=4, naive_steps=120):
+    rng = np.random.default_rng(42)
+    close = 150 + np.cumsum(rng.standard_normal(10_000) * 0.2)
+    X, y = make_xy(close, WINDOW_SIZE)
+    models = {
+        'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1).fit(X, y),
+        'XGBoost': XGBRegressor(n_estimators=100, learning_rate=0.1).fit(X, y),
+    }
+
+    # 多个预测起点 × 每个起点若干扰动场景
+    starts = windows_ending_at(close, WINDOW_SIZE, np.linspace(2_000, len(close), n_starts, dtype=int))
+    windows = np.concatenate([perturb_windows(w, n_perturb, scale=0.001) for w in starts])
+    print(f"场景数: {len(windows)}（{n_starts} 个起点 × {n_perturb} 个扰动），模型数: {len(models)}")
+
+    results, stats = forecast_scenarios(models, windows, STEPS)
+    print("批量递归: " + stats.report())
+
+    # 逐条逐步的旧写法太慢，只跑 naive_steps 步再按比例估算
+    naive = ForecastStats(steps=naive_steps, paths=len(windows) * len(models))
+    t0 = time.perf_counter()
+    for name, model in models.items():
+        ref = naive_forecast(model, windows, naive_steps)
+        assert np.allclose(ref, results[name][:, :naive_steps])
+    naive.seconds = time.perf_counter() - t0
+    naive.predict_calls = naive.naive_calls
+    print("逐条逐步: " + naive.report())
+    print(f"吞吐提升: {stats.steps_per_sec / naive.steps_per_sec:.1f}x")
+
+
+if __name__ == "__main__":
+    run_forecast_benchmark()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ethcast.data import load_ohlcv  # noqa: E402
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKBOOKS = ['第四周大数据分析作业.xlsx', '4.8 all day.xlsx', 'ETH_USD_2019_04.xlsx']
+
+
+def _best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_load_benchmark(repeat=3):
+    print(f"{'文件':<28} | {'read_excel':>10} | {'建缓存':>8} | {'缓存读取':>8} | {'加速':>7}")
+    print("-" * 75)
+    # 在临时目录里跑，避免污染源码目录下的缓存
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in WORKBOOKS:
+            src = os.path.join(SRC_DIR, name)
+            if not os.path.exists(src):
+                print(f"{name:<28} | 未找到文件，跳过")
+                continue
+            path = os.path.join(tmp, name)
+            shutil.copy2(src, path)
+
+            # 原来的做法：read_excel + 排序 + 转时间
+            def old_path():
+                df = pd.read_excel(path).sort_values('datetime')
+                df['datetime'] = pd.to_datetime(df['datetime'])
+
+            t_excel = _best_of(old_path, repeat)
+
+            t0 = time.perf_counter()
+            load_ohlcv(path, refresh=True)
+            t_cold = time.perf_counter() - t0
+
+            t_warm = _best_of(lambda: load_ohlcv(path), max(repeat, 10))
+            print(f"{name:<28} | {t_excel:>9.3f}s | {t_cold:>7.3f}s | {t_warm * 1000:>6.2f}ms | {t_excel / t_warm:>6.0f}x")
+
+
+if __name__ == "__main__":
+    run_load_benchmark()
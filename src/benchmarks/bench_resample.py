@@ -0,0 +1,59 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+from ethcast.data import load_ohlcv  # noqa: E402
+from ethcast.resample import OHLCVPyramid, load_pyramid  # noqa: E402
+
+DATA_FILE = os.path.join(SRC, '第四周大数据分析作业.xlsx')
+RULES = {'5m': '5min', '15m': '15min', '1h': '1h', '1d': '1D'}
+
+
+def naive_resample(path):
+    # 每次都重新读 Excel，再用 pandas resample 逐个周期聚合
+    df = pd.read_excel(path)
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    return {res: df.set_index('datetime').resample(rule).agg(agg).dropna() for res, rule in RULES.items()}
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def run_resample_benchmark():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, os.path.basename(DATA_FILE))
+        shutil.copy(DATA_FILE, path)
+        _, naive = _timed(naive_resample, path)
+        _, cold = _timed(load_pyramid, path)
+        pyramid, warm = _timed(load_pyramid, path)
+        print(f"{'原写法 (读 Excel + resample)':<28}{naive * 1000:>9.1f} ms")
+        print(f"{'金字塔冷启动 (含解析 Excel)':<28}{cold * 1000:>9.1f} ms")
+        print(f"{'金字塔命中缓存':<28}{warm * 1000:>9.1f} ms")
+
+        # 逐分钟追加：后 500 分钟一根一根地到达
+        base = load_ohlcv(path)
+        live = OHLCVPyramid.build(base.iloc[:-500])
+        bars = base.iloc[-500:].drop(columns='datetime').to_dict('records')
+        t0 = time.perf_counter()
+        for bar in bars:
+            live.append([bar])
+        per_bar = (time.perf_counter() - t0) / len(bars) * 1000
+        print(f"{'逐分钟增量更新':<28}{per_bar:>9.2f} ms/根")
+        print("行数: " + ', '.join(f"{res}={n}" for res, n in pyramid.summary().items()))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    run_resample_benchmark()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_thresholds.json')
+
+# 冷启动基准：每个入口在新解释器里只做导入（脚本用 runpy 以非 __main__ 身份加载，不会真正运行），
+# 用 python -X importtime 拆出各顶层包的导入耗时，并检查模型后端 / matplotlib 是否被提前导入。
+# 结果与 startup_thresholds.json 对比，超时或出现禁止的模块时返回非零退出码
+
+SCRIPT_PROBE = "import runpy; runpy.run_path({target!r}, run_name='startup_probe')"
+MODULE_PROBE = "import {target}"
+REPORT = "import json, sys; print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))"
+
+# 入口 -> 类型；脚本相对 src/ 目录
+ENTRY_POINTS = {
+    '4.8  1 min.py': 'script',
+    '4.8 1 hour.py': 'script',
+    'all day.py': 'script',
+    'main.py': 'script',
+    'ethcast.cli': 'module',
+    'ethcast.stream': 'module',
+    'ethcast.serve': 'module',
+}
+HEAVY_MODULES = ('sklearn', 'xgboost', 'lightgbm', 'catboost', 'matplotlib', 'tensorflow')
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"，缩进为 0 的是入口直接触发的顶层导入
+    top = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        if not name[1:].startswith(' '):
+            top[name.strip()] = int(cumulative) / 1000
+    return top
+
+
+def probe(entry, kind, repeat=3):
+    # 取 repeat 次中最快的一次，减小磁盘缓存、调度带来的抖动
+    code = (SCRIPT_PROBE if kind == 'script' else MODULE_PROBE).format(target=entry)
+    code += '\n' + REPORT.format(heavy=HEAVY_MODULES)
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=SRC, capture_output=True,
+                              text=True, env={**os.environ, 'ETHCAST_HEADLESS': '1'})
+        wall = (time.perf_counter() - t0) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"{entry} 导入失败:\n{proc.stderr[-2000:]}")
+        if best is None or wall < best['wall_ms']:
+            best = {'wall_ms': round(wall, 1), 'imports': parse_importtime(proc.stderr),
+                    'heavy': json.loads(proc.stdout.strip().splitlines()[-1])}
+    return best
+
+
+def load_thresholds(path=THRESHOLDS_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check(results, thresholds):
+    failures = []
+    for entry, res in results.items():
+        limit = thresholds.get(entry)
+        if limit is None:
+            continue
+        if res['wall_ms'] > limit['max_ms']:
+            failures.append(f"{entry}: 启动 {res['wall_ms']:.0f} ms 超过阈值 {limit['max_ms']} ms")
+        forbidden = sorted(set(res['heavy']) & set(limit.get('forbidden', [])))
+        if forbidden:
+            failures.append(f"{entry}: 启动时导入了 {', '.join(forbidden)}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='入口脚本冷启动耗时基准')
+    parser.add_argument('entries', nargs='*', help='只测指定入口（默认全部）')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5, help='每个入口列出最慢的几个顶层导入')
+    parser.add_argument('--thresholds', default=THRESHOLDS_FILE)
+    parser.add_argument('--update', action='store_true', help='按本次结果的 2 倍重写阈值文件')
+    args = parser.parse_args(argv)
+
+    entries = {e: ENTRY_POINTS.get(e, 'script' if e.endswith('.py') else 'module')
+               for e in (args.entries or ENTRY_POINTS)}
+    results = {}
+    for entry, kind in entries.items():
+        res = results[entry] = probe(entry, kind, args.repeat)
+        slowest = sorted(res['imports'].items(), key=lambda kv: -kv[1])[:args.top]
+        print(f"{entry:<16} {res['wall_ms']:8.1f} ms  重型模块: {', '.join(res['heavy']) or '无'}")
+        print(f"{'':<16} " + '  '.join(f"{name} {ms:.0f}ms" for name, ms in slowest))
+
+    if args.update:
+        thresholds = load_thresholds(args.thresholds)
+        for entry, res in results.items():
+            thresholds[entry] = {'max_ms': max(300, int(round(res['wall_ms'] * 2, -2))),
+                                 'forbidden': list(HEAVY_MODULES)}
+        with open(args.thresholds, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"💾 阈值已写入 {args.thresholds}")
+        return 0
+
+    failures = check(results, load_thresholds(args.thresholds))
+    for msg in failures:
+        print(f"❌ {msg}")
+    if not failures:
+        print("✅ 启动耗时均在阈值内")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+from ethcast.data import load_ohlcv  # noqa: E402
+from ethcast.models import DEFAULT_PARAMS  # noqa: E402
+from ethcast.stream import StreamForecaster  # noqa: E402
+
+WINDOW_SIZE = 30
+FEATURES = ('close',)
+
+
+def naive_latency(model, history, bars):
+    # 批处理写法：每来一根就把历史拼回 list、重新取窗口、走 sklearn 的 predict
+    closes = list(history)
+    out = []
+    for close in bars:
+        t0 = time.perf_counter()
+        closes.append(close)
+        model.predict(np.array(closes[-WINDOW_SIZE:]).reshape(1, -1))
+        out.append((time.perf_counter() - t0) * 1000)
+    return np.array(out)
+
+
+def run_stream_benchmark(refresh_every=60):
+    history = load_ohlcv(os.path.join(SRC, '第四周大数据分析作业.xlsx')).tail(5000)
+    live = load_ohlcv(os.path.join(SRC, '4.8 all day.xlsx'))
+    bars = live[['timestamp', 'open', 'high', 'low', 'close', 'volume']].to_dict('records')
+
+    for name in ['XGBoost', 'LightGBM']:
+        forecaster = StreamForecaster(name, DEFAULT_PARAMS[name], WINDOW_SIZE, FEATURES, refresh_every=refresh_every,
+                                      n_threads=1)
+        forecaster.seed(history['timestamp'].to_numpy(), history[list(FEATURES)].to_numpy(dtype=float))
+        naive = naive_latency(forecaster.model, history['close'].to_numpy(), live['close'].to_numpy())
+
+        for bar in bars:
+            forecaster.on_bar(int(bar['timestamp']), bar)
+        forecaster.wait()
+        forecaster.close()
+        lat = np.array(forecaster.stats.latencies_ms)
+        print(f"{name:<10} 原写法 p50 {np.percentile(naive, 50):6.2f} ms  p99 {np.percentile(naive, 99):6.2f} ms | "
+              f"流式 p50 {np.percentile(lat, 50):6.2f} ms  p99 {np.percentile(lat, 99):6.2f} ms")
+        print(f"{'':<10} {forecaster.stats.report()}")
+
+
+if __name__ == "__main__":
+    run_stream_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
@@ -0,0 +1,52 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import jieba
+import pandas as pd
+
+PAWANGZHAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pawangzhan')
+sys.path.insert(0, PAWANGZHAN)
+from segment import tokenize_comments  # noqa: E402
+
+COMMENTS_FILE = os.path.join(PAWANGZHAN, 'douban_300_comments_26861685.xlsx')
+
+
+def make_comments(n, seed=42):
+    # 用真实短评打乱拼接，造出 n 条互不相同的评论
+    base = pd.read_excel(COMMENTS_FILE)['评论内容'].astype(str).tolist()
+    rng = random.Random(seed)
+    return [f"{rng.choice(base)}{rng.choice(base)[:20]}#{i}" for i in range(n)]
+
+
+def naive_tokenize(texts):
+    # 原 red word.py 写法：拼成一个大字符串后单核 jieba.cut
+    return list(jieba.cut(" ".join(texts)))
+
+
+def run_tokenize_benchmark(n=20000):
+    comments = make_comments(n)
+    more = comments + make_comments(n // 10, seed=7)
+    cache_dir = tempfile.mkdtemp()
+    try:
+        t0 = time.perf_counter()
+        naive_tokenize(comments)
+        print(f"{'原写法 (单核, 整段 cut)':<30}{time.perf_counter() - t0:>8.2f}s")
+
+        for label, texts, workers in [('冷缓存 (串行)', comments, 1), ('冷缓存 (进程池)', comments, None),
+                                      ('热缓存', comments, None), ('追加 10% 新评论', more, None)]:
+            db_path = os.path.join(cache_dir, 'tokens.db')
+            if label.startswith('冷缓存') and os.path.exists(db_path):
+                os.remove(db_path)
+            t0 = time.perf_counter()
+            tokenize_comments(texts, cache_dir=cache_dir, workers=workers, verbose=False)
+            print(f"{label:<30}{time.perf_counter() - t0:>8.2f}s")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_tokenize_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ethcast.windows import make_xy  # noqa: E402
+
+WINDOW_SIZE = 30
+ROW_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def loop_xy(values, window_size):
+    # 原脚本里的写法：逐个 append 再转 np.array
+    X, y = [], []
+    for i in range(len(values) - window_size):
+        X.append(values[i: i + window_size].flatten())
+        y.append(values[i + window_size] if values.ndim == 1 else values[i + window_size, 0])
+    return np.array(X), np.array(y)
+
+
+def _timeit(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_window_benchmark():
+    rng = np.random.default_rng(42)
+    print(f"{'行数':>9} | {'列数':>4} | {'append 循环':>11} | {'步长视图':>9} | {'连续副本':>9} | {'视图加速':>8} | {'副本加速':>8}")
+    print("-" * 86)
+    for n in ROW_COUNTS:
+        for k in (1, 5):
+            # 模拟 close（或 close/open/high/low/volume）的随机游走
+            values = 150 + np.cumsum(rng.standard_normal((n, k)), axis=0)
+            if k == 1:
+                values = values[:, 0]
+            repeat = 1 if n >= 1_000_000 else 3
+            t_loop = _timeit(lambda: loop_xy(values, WINDOW_SIZE), repeat)
+            t_view = _timeit(lambda: make_xy(values, WINDOW_SIZE), 5)
+            t_copy = _timeit(lambda: make_xy(values, WINDOW_SIZE, copy=True), repeat)
+            print(f"{n:>9,} | {k:>4} | {t_loop:>10.3f}s | {t_view * 1e6:>7.1f}µs | {t_copy:>8.3f}s | "
+                  f"{t_loop / t_view:>7.0f}x | {t_loop / t_copy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run_window_benchmark()
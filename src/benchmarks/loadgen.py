@@ -0,0 +1,112 @@
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 推理服务压测：多个线程各自保持一个 keep-alive 连接，连续发请求，
+# 统计客户端吞吐与延迟，最后读取服务端 /stats 的 p50 / p99 和平均批大小
+
+
+def _request(conn, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else None
+    conn.request(method, path, body=body, headers={'Content-Type': 'application/json'} if body else {})
+    resp = conn.getresponse()
+    data = json.loads(resp.read())
+    if resp.status != 200:
+        raise RuntimeError(f"{resp.status}: {data}")
+    return data
+
+
+def run_load(url, endpoint='predict', concurrency=16, n_requests=2000, steps=30, model=None, seed=42):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    health = _request(conn, 'GET', '/health')
+    _request(conn, 'POST', '/stats/reset', {})
+    conn.close()
+    alias = model or next(iter(health['models']))
+    info = health['models'][alias]
+    w, k = info['window'], len(info['features'])
+
+    rng = np.random.default_rng(seed)
+    base = 180 + np.cumsum(rng.standard_normal((n_requests, w)) * 0.2, axis=1)
+    windows = np.repeat(base[:, :, None], k, axis=2).tolist()
+    payload_key = {'predict': lambda i: {'model': alias, 'window': windows[i]},
+                   'forecast': lambda i: {'model': alias, 'window': windows[i], 'steps': steps}}[endpoint]
+
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def worker():
+        c = http.client.HTTPConnection(parsed.hostname, parsed.port)
+        local = []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            t0 = time.perf_counter()
+            _request(c, 'POST', '/' + endpoint, payload_key(i))
+            local.append((time.perf_counter() - t0) * 1000)
+        c.close()
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    stats = _request(conn, 'GET', '/stats')
+    conn.close()
+    lat = np.array(latencies)
+    server = stats['latency'].get('/' + endpoint, {})
+    model_info = stats['models'][alias]
+    print(f"/{endpoint} {alias} 并发 {concurrency}：{len(lat)} 个请求 {elapsed:.2f}s，{len(lat) / elapsed:,.0f} 请求/秒")
+    print(f"   客户端延迟 p50 {np.percentile(lat, 50):.2f} ms / p99 {np.percentile(lat, 99):.2f} ms；"
+          f"服务端 p50 {server.get('p50_ms')} ms / p99 {server.get('p99_ms')} ms；"
+          f"平均批大小 {model_info[endpoint + '_mean_batch']}")
+    return len(lat) / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='推理服务压测')
+    parser.add_argument('--url', default=None, help='已启动的服务地址；不给则在本进程内启动一个')
+    parser.add_argument('--endpoint', choices=['predict', 'forecast'], default='predict')
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        from ethcast.serve import InferenceServer, load_served_models
+        data = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '第四周大数据分析作业.xlsx')
+        served = load_served_models(data, [args.model or 'xgb'], 30, ['close'], max_wait_ms=args.max_wait_ms)
+        server = InferenceServer(served, port=0).start()
+        url = server.url
+    try:
+        for concurrency in args.concurrency:
+            run_load(url, args.endpoint, concurrency, args.requests, args.steps, args.model)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
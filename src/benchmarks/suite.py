@@ -0,0 +1,268 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ethcast.backtest import walk_forward_backtest  # noqa: E402
+from ethcast.compare import mape  # noqa: E402
+from ethcast.data import load_ohlcv  # noqa: E402
+from ethcast.envprobe import LIBRARIES, cpu_budget, probe_library  # noqa: E402
+from ethcast.forecast import forecast_path  # noqa: E402
+from ethcast.models import DEFAULT_PARAMS, build_model, resolve_name  # noqa: E402
+from ethcast.windows import make_xy  # noqa: E402
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXCEL_FILE = '第四周大数据分析作业.xlsx'
+
+# 预测流水线的分阶段基准：固定种子的合成分钟线 + 自带的 Excel，分别计时
+#   load（read_excel / 建缓存 / 命中缓存）、windows（构造滑动窗口）、fit（每个模型）、predict_1（单步预测）、
+#   recursive（与 R 4.8.py 一样递归 1140 步）、mape、backtest（与 XBGBoost收益率分析.py 相同的前向回测）
+# run 把结果和机器信息写成 JSON；compare 对比基线，慢于容差的阶段记为回退，退出码为 1
+#
+#   python benchmarks/suite.py run --out bench.json
+#   python benchmarks/suite.py compare baseline.json bench.json --tolerance 0.2
+
+WINDOW_SIZE = 30
+STEPS = 1140  # 05:00-24:00 的 1 分钟线
+SEED = 42
+SYNTHETIC_ROWS = 10_000
+DATASETS = ('synthetic', 'excel')
+
+
+def synthetic_ohlcv(n=SYNTHETIC_ROWS, seed=SEED, start='2019-04-01'):
+    # 几何布朗运动的收盘价，开高低量围绕收盘价生成；同一个种子每次完全相同
+    rng = np.random.default_rng(seed)
+    close = 160 * np.exp(np.cumsum(rng.standard_normal(n) * 8e-4))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.standard_normal(n)) * close * 5e-4
+    return pd.DataFrame({
+        'datetime': pd.date_range(start, periods=n, freq='min'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.gamma(2.0, 50.0, n),
+    })
+
+
+def measure(func, repeat=3, warmup=0):
+    # 返回各次耗时（毫秒）的统计；函数返回值取最后一次的
+    for _ in range(warmup):
+        func()
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {'median_ms': round(float(np.median(samples)), 4), 'min_ms': round(float(np.min(samples)), 4),
+            'repeat': repeat}, result
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, capture_output=True, text=True,
+                             timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def machine_metadata(n_threads):
+    libs = {name: probe_library(name, dist)['version'] for name, dist, group, _ in LIBRARIES
+            if group in ('核心', '模型')}
+    return {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'cpu_budget': cpu_budget(),
+        'model_threads': n_threads,
+        'libraries': libs,
+        'seed': SEED,
+    }
+
+
+def bench_load(name, tmp, repeat):
+    # 在临时目录里跑：源码目录下已有的缓存不受影响，每次都是真正的冷启动
+    path = os.path.join(tmp, f'{name}.xlsx')
+    if name == 'synthetic':
+        synthetic_ohlcv().to_excel(path, index=False)
+    else:
+        shutil.copy2(os.path.join(SRC_DIR, EXCEL_FILE), path)
+    out = {}
+    out['load/read_excel'], _ = measure(lambda: pd.read_excel(path), repeat)
+    out['load/cache_build'], _ = measure(lambda: load_ohlcv(path, refresh=True), repeat)
+    out['load/cache_hit'], df = measure(lambda: load_ohlcv(path), max(repeat, 10), warmup=1)
+    return out, df
+
+
+def bench_models(close, models, steps, repeat, n_threads):
+    out = {}
+    train, actual = close[:-steps], close[-steps:]
+    out['windows/make_xy'], (X, y) = measure(lambda: make_xy(train, WINDOW_SIZE, copy=True), max(repeat, 10))
+    row = np.ascontiguousarray(X[-1:])
+    for alias in models:
+        name = resolve_name(alias)
+        params = DEFAULT_PARAMS[name]
+        out[f'fit/{name}'], model = measure(lambda: build_model(name, params, n_threads).fit(X, y), repeat)
+        out[f'predict_1/{name}'], _ = measure(lambda: model.predict(row), 200, warmup=5)
+        window = train[-WINDOW_SIZE:]
+        out[f'recursive/{name}'], preds = measure(lambda: forecast_path(model.predict, window, steps), 1)
+        out[f'mape/{name}'], _ = measure(lambda: mape(actual, preds), 1000)
+    return out
+
+
+def bench_backtest(close, repeat):
+    # 参数与 XBGBoost收益率分析.py 相同；串行跑各折，计时不受进程池启动影响
+    lookback, horizon = 5, 3
+    start = int((len(close) - lookback - horizon) * 0.8)
+    stats, _ = measure(lambda: walk_forward_backtest(
+        close, 'XGBoost', {'objective': 'reg:squarederror', 'n_estimators': 100}, lookback=lookback,
+        horizon=horizon, test_size=240, start=start, parallel=False), repeat)
+    return {'backtest/XGBoost': stats}
+
+
+def run_suite(datasets=DATASETS, models=('rf', 'xgb', 'lgbm', 'cat'), steps=STEPS, repeat=3, n_threads=1,
+              verbose=True):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for dataset in datasets:
+            if dataset == 'excel' and not os.path.exists(os.path.join(SRC_DIR, EXCEL_FILE)):
+                print(f"⚠️ 找不到 {EXCEL_FILE}，跳过 excel 数据集")
+                continue
+            stages, df = bench_load(dataset, tmp, repeat)
+            close = df['close'].to_numpy(dtype=float)
+            stages.update(bench_models(close, models, steps, repeat, n_threads))
+            stages.update(bench_backtest(close, repeat))
+            for stage, stats in stages.items():
+                key = f'{dataset}/{stage}'
+                results[key] = stats
+                if verbose:
+                    print(f"  {key:<40} {stats['median_ms']:>12.3f} ms  (min {stats['min_ms']:.3f}, "
+                          f"×{stats['repeat']})")
+    return results
+
+
+def compare(baseline, current, tolerance=0.2, min_delta_ms=1.0):
+    # 中位数慢了超过 tolerance（比例）且绝对差值超过 min_delta_ms 才算回退，避免亚毫秒阶段的抖动误报
+    rows, regressions = [], []
+    for key in sorted(set(baseline['results']) | set(current['results'])):
+        old = baseline['results'].get(key)
+        new = current['results'].get(key)
+        if old is None or new is None:
+            rows.append((key, old and old['median_ms'], new and new['median_ms'], None, '新增' if old is None else '缺失'))
+            continue
+        ratio = new['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        delta = new['median_ms'] - old['median_ms']
+        if ratio > 1 + tolerance and delta > min_delta_ms:
+            status = '❌ 回退'
+            regressions.append(key)
+        elif ratio < 1 - tolerance and -delta > min_delta_ms:
+            status = '✅ 变快'
+        else:
+            status = ''
+        rows.append((key, old['median_ms'], new['median_ms'], ratio, status))
+    return rows, regressions
+
+
+def _machine_diff(baseline, current):
+    keys = ('platform', 'machine', 'cpu_count', 'cpu_budget', 'model_threads', 'python', 'libraries')
+    return [k for k in keys if baseline['meta'].get(k) != current['meta'].get(k)]
+
+
+def print_comparison(rows, tolerance, width=100):
+    print("=" * width)
+    print(f"{'阶段':<44} | {'基线(ms)':>11} | {'本次(ms)':>11} | {'倍数':>6} | 状态（容差 ±{tolerance:.0%}）")
+    print("-" * width)
+    for key, old, new, ratio, status in rows:
+        old_s = f"{old:.3f}" if old is not None else '-'
+        new_s = f"{new:.3f}" if new is not None else '-'
+        ratio_s = f"{ratio:.2f}x" if ratio is not None else '-'
+        print(f"{key:<44} | {old_s:>11} | {new_s:>11} | {ratio_s:>6} | {status}")
+    print("=" * width)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cmd_run(args):
+    n_threads = args.threads
+    report = {'meta': machine_metadata(n_threads), 'config': {'window': WINDOW_SIZE, 'steps': args.steps,
+                                                              'models': args.models, 'repeat': args.repeat},
+              'results': {}}
+    print(f"🧪 数据集: {', '.join(args.datasets)}  模型: {', '.join(args.models)}  递归 {args.steps} 步  "
+          f"模型线程 {n_threads}")
+    t0 = time.perf_counter()
+    report['results'] = run_suite(args.datasets, args.models, args.steps, args.repeat, n_threads)
+    report['meta']['total_sec'] = round(time.perf_counter() - t0, 1)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    print(f"💾 结果已写入 {args.out}（{report['meta']['total_sec']}s）")
+    if args.baseline:
+        return _compare_files(args.baseline, args.out, args.tolerance, args.min_delta_ms)
+    return 0
+
+
+def _compare_files(baseline_path, current_path, tolerance, min_delta_ms):
+    baseline, current = load_results(baseline_path), load_results(current_path)
+    diff = _machine_diff(baseline, current)
+    if diff:
+        print(f"⚠️ 两次运行的机器 / 环境不同（{', '.join(diff)}），对比结果仅供参考")
+    rows, regressions = compare(baseline, current, tolerance, min_delta_ms)
+    print_comparison(rows, tolerance)
+    if regressions:
+        print(f"❌ {len(regressions)} 个阶段变慢超过 {tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("✅ 没有超出容差的回退")
+    return 0
+
+
+def cmd_compare(args):
+    return _compare_files(args.baseline, args.current, args.tolerance, args.min_delta_ms)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预测流水线分阶段基准')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help='运行基准并写入 JSON')
+    p.add_argument('--datasets', type=lambda s: s.split(','), default=list(DATASETS), help='synthetic,excel')
+    p.add_argument('--models', type=lambda s: s.split(','), default=['rf', 'xgb', 'lgbm', 'cat'])
+    p.add_argument('--steps', type=int, default=STEPS, help='递归预测步数')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--threads', type=int, default=1, help='模型训练线程数（固定下来结果才可比）')
+    p.add_argument('--out', default='bench_results.json')
+    p.add_argument('--baseline', help='跑完后直接与该基线对比')
+    p.add_argument('--tolerance', type=float, default=0.2)
+    p.add_argument('--min-delta-ms', type=float, default=1.0)
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('compare', help='对比两次结果，超出容差的回退返回退出码 1')
+    p.add_argument('baseline')
+    p.add_argument('current')
+    p.add_argument('--tolerance', type=float, default=0.2, help='允许变慢的比例')
+    p.add_argument('--min-delta-ms', type=float, default=1.0, help='绝对差值小于此值的不算回退')
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
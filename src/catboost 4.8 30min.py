@@ -1,8 +1,11 @@
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-from catboost import CatBoostRegressor
-from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.windows import make_xy
+from ethcast.forecast import forecast_path
+from ethcast.registry import ModelRegistry
+from ethcast.plotting import finish_figure
+from ethcast.resample import bar_interval
 
 # 1. 环境配置
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac 字体
@@ -15,8 +18,7 @@ def catboost_30min_forecast():
 
     try:
         # 读取并排序数据
-        df = pd.read_excel(file_path).sort_values('datetime')
-        df['datetime'] = pd.to_datetime(df['datetime'])
+        df = load_ohlcv(file_path)
 
         # 设定预测起点
         start_time = pd.to_datetime('2019-04-08 05:04:00')
@@ -30,19 +32,14 @@ def catboost_30min_forecast():
         feature_cols = ['close', 'open', 'high', 'low', 'volume']
         train_data = train_df[feature_cols].values
 
-        X, y = [], []
-        for i in range(len(train_data) - window_size):
-            # 将 window_size 分钟内的所有特征拉平作为一行输入
-            X.append(train_data[i: i + window_size].flatten())
-            y.append(train_data[i + window_size, 0])  # 预测下一分钟的 close
-
-        X, y = np.array(X), np.array(y)
+        # 每行是窗口内 window_size 分钟的特征拉平，目标是下一分钟的 close
+        X, y = make_xy(train_data, window_size)
 
         # 3. 训练 CatBoost 模型
         # iterations: 迭代次数
         # learning_rate: 学习率
         # depth: 树的深度
-        model = CatBoostRegressor(
+        params = dict(
             iterations=600,
             learning_rate=0.05,
             depth=6,
@@ -53,32 +50,18 @@ def catboost_30min_forecast():
         )
 
         print("💡 CatBoost 正在训练中...")
-        model.fit(X, y)
+        # 数据、截止时间、特征、窗口与参数都没变时直接加载上次训练好的模型
+        model = ModelRegistry.for_data(file_path).get_or_fit(
+            'CatBoost', params, X, y, data_file=file_path, split_time=start_time,
+            feature_cols=feature_cols, window_size=window_size)
 
         # 4. 递归滚动预测未来 30 分钟
         prediction_steps = 30
         # 取最后 window_size 分钟的数据作为预测的起点输入
-        current_window = train_data[-window_size:].tolist()
-
-        forecast_prices = []
-        forecast_times = []
-        curr_time = start_time
-
-        for _ in range(prediction_steps):
-            # 准备输入数据
-            input_x = np.array(current_window[-window_size:]).flatten().reshape(1, -1)
-
-            # 获取预测值
-            pred_close = model.predict(input_x)[0]
-            forecast_prices.append(pred_close)
-
-            # 时间推进
-            curr_time += timedelta(minutes=1)
-            forecast_times.append(curr_time)
-
-            # 构造新的特征行：假设未来预测的 open/high/low/vol 与 close 接近（简化模拟）
-            new_row = [pred_close, pred_close, pred_close, pred_close, current_window[-1][-1]]
-            current_window.append(new_row)
+        # 新特征行假设 open/high/low 与预测的 close 接近，volume 沿用上一分钟（简化模拟）
+        forecast_prices = forecast_path(model.predict, train_data[-window_size:], prediction_steps, carry_cols=(4,))
+        interval = bar_interval(train_df)
+        forecast_times = [start_time + interval * (i + 1) for i in range(prediction_steps)]
 
         # 5. 可视化
         plt.figure(figsize=(12, 6))
@@ -100,7 +83,7 @@ def catboost_30min_forecast():
         plt.legend()
         plt.grid(True, alpha=0.3)
         plt.gcf().autofmt_xdate()  # 自动优化时间显示
-        plt.show()
+        finish_figure('CatBoost_30分钟预测.png')
 
         print(f"📊 预测完成！起点价格: {train_data[-1, 0]:.2f} -> 30分钟后预期价格: {forecast_prices[-1]:.2f}")
 
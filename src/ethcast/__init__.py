@@ -0,0 +1 @@
+# ethcast：以太币分钟线预测脚本共用的数据与模型工具
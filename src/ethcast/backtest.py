@@ -0,0 +1,192 @@
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ethcast.models import build_model
+from ethcast.trace import absorb, drain_child, span
+from ethcast.windows import lag_matrix
+
+
+def make_lag_features(close, lookback, horizon):
+    # 与 backtest_strategy 一致：第 t 行特征为 [lag_1, ..., lag_k] = close[t-1], ..., close[t-k]，
+    # 目标为 close[t + horizon]；返回 (X, y, t 的位置数组)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    t = np.arange(lookback, n - horizon)
+    X = lag_matrix(close, lookback)[:len(t), ::-1]
+    y = close[t + horizon]
+    return X, y, t
+
+
+def walk_forward_folds(n_samples, test_size, train_size=None, min_train=None, gap=0, start=None):
+    # 生成 (训练起点, 训练终点, 测试起点, 测试终点) 的样本下标区间
+    # train_size=None 为扩展窗口（从头训练到测试起点），否则为固定长度的滚动窗口；
+    # gap 为训练与测试之间空出的样本数，防止训练目标越过测试起点（取预测步数即可）
+    min_train = min_train or train_size or test_size
+    test_start = start if start is not None else min_train + gap
+    folds = []
+    while test_start < n_samples:
+        test_end = min(test_start + test_size, n_samples)
+        train_end = test_start - gap
+        train_start = 0 if train_size is None else max(0, train_end - train_size)
+        if train_end - train_start >= min_train:
+            folds.append((train_start, train_end, test_start, test_end))
+        test_start = test_end
+    return folds
+
+
+def _fit_predict_fold(name, params, X, y, fold, n_threads):
+    train_start, train_end, test_start, test_end = fold
+    model = build_model(name, params, n_threads)
+    with span('fold', train=train_end - train_start, test=test_end - test_start):
+        t0 = time.perf_counter()
+        with span('fit', model=name):
+            model.fit(X[train_start:train_end], y[train_start:train_end])
+        fit_sec = time.perf_counter() - t0
+        with span('predict'):
+            preds = model.predict(X[test_start:test_end])
+    return preds, fit_sec
+
+
+def _fold_worker(args):
+    # 进程池里每个折只收到自己用到的那一段数据
+    name, params, X_part, y_part, fold, n_threads = args
+    return (*_fit_predict_fold(name, params, X_part, y_part, fold, n_threads), drain_child())
+
+
+def _slice_for_fold(X, y, fold):
+    train_start, train_end, test_start, test_end = fold
+    lo = min(train_start, test_start)
+    hi = max(train_end, test_end)
+    shifted = (train_start - lo, train_end - lo, test_start - lo, test_end - lo)
+    return np.ascontiguousarray(X[lo:hi]), np.ascontiguousarray(y[lo:hi]), shifted
+
+
+def prefix_medians(values):
+    # out[k] = values[:k] 的中位数（out[0] 为 nan）；大顶堆 + 小顶堆逐个插入，O(n log n)
+    out = np.full(len(values) + 1, np.nan)
+    lo, hi = [], []  # lo 存较小的一半（取负数当大顶堆），hi 存较大的一半
+    for k, v in enumerate(values, start=1):
+        heapq.heappush(lo, -v)
+        heapq.heappush(hi, -heapq.heappop(lo))
+        if len(hi) > len(lo):
+            heapq.heappush(lo, -heapq.heappop(hi))
+        out[k] = -lo[0] if len(lo) > len(hi) else (hi[0] - lo[0]) / 2
+    return out
+
+
+def compute_pnl(pred, current, actual, stake=100.0, sizing='fixed', allow_short=False,
+                fee_bps=0.0, slippage_bps=0.0, max_leverage=3.0):
+    # 向量化计算每笔交易的收益（单位与 stake 相同）
+    # sizing='fixed'：每次投入 stake；sizing='edge'：按预测涨跌幅 / 之前各笔预测涨跌幅的中位数缩放，最多 max_leverage 倍
+    # （只用已经做出的预测，不看测试段后面的预测；第一笔没有参照时按 1 倍）
+    pred = np.asarray(pred, dtype=float)
+    current = np.asarray(current, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+
+    expected = pred / current - 1
+    direction = np.where(expected > 0, 1.0, np.where(expected < 0, -1.0, 0.0))
+    if not allow_short:
+        direction = np.maximum(direction, 0.0)
+
+    if sizing == 'fixed':
+        size = np.full_like(current, stake)
+    elif sizing == 'edge':
+        magnitude = np.abs(expected)
+        nonzero = magnitude != 0
+        # 第 i 笔之前有多少个非零预测，取这些预测的中位数
+        scale = prefix_medians(magnitude[nonzero])[np.cumsum(nonzero) - nonzero]
+        ratio = np.divide(magnitude, scale, out=np.ones_like(magnitude), where=~np.isnan(scale))
+        size = stake * np.clip(ratio, 0, max_leverage)
+    else:
+        raise ValueError(f"未知的仓位方式: {sizing}")
+
+    realized = actual / current - 1
+    # 手续费与滑点按开仓、平仓各算一次
+    cost = 2 * (fee_bps + slippage_bps) / 1e4
+    traded = direction != 0
+    return np.where(traded, size * (direction * realized - cost), 0.0), traded
+
+
+@dataclass
+class BacktestResult:
+    positions: np.ndarray
+    predicted: np.ndarray
+    current: np.ndarray
+    actual: np.ndarray
+    profits: np.ndarray
+    traded: np.ndarray
+    folds: list
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def cumulative(self):
+        return np.cumsum(self.profits)
+
+    def summary(self):
+        cum = self.cumulative
+        drawdown = np.maximum.accumulate(np.r_[0, cum])[1:] - cum
+        n_trades = int(self.traded.sum())
+        wins = int((self.profits[self.traded] > 0).sum())
+        return {
+            '折数': len(self.folds),
+            '测试样本': len(self.profits),
+            '交易次数': n_trades,
+            '胜率': wins / n_trades if n_trades else 0.0,
+            '总收益': float(cum[-1]) if len(cum) else 0.0,
+            '最大回撤': float(drawdown.max()) if len(drawdown) else 0.0,
+            '平均绝对误差': float(np.mean(np.abs(self.predicted - self.actual))),
+        }
+
+    def report(self):
+        s = self.summary()
+        t = self.timings
+        return (f"{s['折数']} 折 | 测试 {s['测试样本']} 个点 | 交易 {s['交易次数']} 次 | 胜率 {s['胜率']:.2%} | "
+                f"总收益 {s['总收益']:.2f} | 最大回撤 {s['最大回撤']:.2f} | "
+                f"训练 {t.get('fit', 0):.2f}s（累计）| 收益计算 {t.get('pnl', 0) * 1000:.1f}ms | 总耗时 {t.get('total', 0):.2f}s")
+
+
+def walk_forward_backtest(close, name='XGBoost', params=None, lookback=5, horizon=3, test_size=1440,
+                          train_size=None, start=None, parallel=True, n_workers=None, **pnl_kwargs):
+    # 滚动 / 扩展窗口的前向回测：每个折用之前的数据训练，预测下一段，再统一向量化算收益
+    # start 为第一段测试开始的样本下标（默认在 test_size 个训练样本之后）
+    t_total = time.perf_counter()
+    params = params if params is not None else {'objective': 'reg:squarederror', 'n_estimators': 100}
+    close = np.asarray(close, dtype=float)
+    X, y, t = make_lag_features(close, lookback, horizon)
+    folds = walk_forward_folds(len(y), test_size, train_size, gap=horizon, start=start)
+    if not folds:
+        raise ValueError("数据太短，无法切出任何一个训练/测试折")
+
+    if parallel and len(folds) > 1:
+        n_cores = os.cpu_count() or 1
+        n_workers = n_workers or min(len(folds), n_cores)
+        threads = max(1, n_cores // n_workers)
+        jobs = []
+        for fold in folds:
+            X_part, y_part, shifted = _slice_for_fold(X, y, fold)
+            jobs.append((name, params, X_part, y_part, shifted, threads))
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            outputs = list(pool.map(_fold_worker, jobs))
+        for out in outputs:
+            absorb(out[2])
+    else:
+        outputs = [_fit_predict_fold(name, params, X, y, fold, None) for fold in folds]
+
+    test_idx = np.concatenate([np.arange(f[2], f[3]) for f in folds])
+    predicted = np.concatenate([out[0] for out in outputs]).astype(float)
+    positions = t[test_idx]
+
+    t0 = time.perf_counter()
+    current = close[positions]
+    actual = y[test_idx]
+    with span('pnl', trades=len(test_idx)):
+        profits, traded = compute_pnl(predicted, current, actual, **pnl_kwargs)
+    pnl_sec = time.perf_counter() - t0
+
+    timings = {'fit': sum(out[1] for out in outputs), 'pnl': pnl_sec, 'total': time.perf_counter() - t_total}
+    return BacktestResult(positions, predicted, current, actual, profits, traded, folds, timings)
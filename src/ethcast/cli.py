@@ -0,0 +1,496 @@
+import argparse
+import itertools
+import json
+import sys
+
+from ethcast import profiling, trace
+from ethcast.models import DEFAULT_PARAMS, resolve_name
+
+DEFAULT_DATA = '第四周大数据分析作业.xlsx'
+DEFAULT_TRUTH = '4.8 all day.xlsx'
+
+
+def _csv(text):
+    return [part.strip() for part in text.split(',') if part.strip()]
+
+
+def _features(text):
+    # 逗号分隔的特征列，必须包含 close（预测目标）；在读参数时就报错
+    from ethcast.windows import target_index
+
+    features = tuple(_csv(text))
+    try:
+        target_index(features)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    return features
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _parse_params(items):
+    params = {}
+    for item in items or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise SystemExit(f"❌ 参数格式应为 key=value: {item}")
+        params[key] = _parse_value(value)
+    return params
+
+
+def _forecast_configs(args):
+    from ethcast.pipeline import ForecastConfig
+
+    if args.batch:
+        # 每行一个 JSON 配置，字段同 ForecastConfig
+        with open(args.batch, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        try:
+            return [ForecastConfig(**{**row, 'features': tuple(_csv(row['features'])
+                                                                if isinstance(row.get('features'), str)
+                                                                else row.get('features', ('close',)))})
+                    for row in rows]
+        except ValueError as e:
+            raise SystemExit(f"❌ {args.batch}: {e}")
+
+    feature_sets = [_features(f) for f in (args.features or ['close,open,high'])]
+    params = _parse_params(args.param)
+    combos = itertools.product(_csv(args.model), [int(w) for w in _csv(args.window)], feature_sets,
+                               _csv(args.start), [args.steps], _csv(args.resolution))
+    return [ForecastConfig(model, window, features, start, steps, params, resolution)
+            for model, window, features, start, steps, resolution in combos]
+
+
+def cmd_forecast(args):
+    from ethcast.compare import mape
+    from ethcast.pipeline import Pipeline
+
+    pipeline = Pipeline(args.data, args.truth, use_registry=not args.no_registry)
+    configs = _forecast_configs(args)
+    print(f"✅ 共 {len(configs)} 组配置，数据只加载一次: {args.data}")
+    results = pipeline.run(configs)
+
+    width = 118
+    print("\n" + "=" * width)
+    print(f"{'配置':<62} | {'起点价格':>8} | {'终点预测':>8} | {'MAPE':>8} | {'训练(s)':>7} | {'预测(ms)':>8}")
+    print("-" * width)
+    for r in results:
+        score = f"{mape(r['actual'], r['preds']):.4%}" if r['actual'] is not None else '-'
+        print(f"{r['config'].label():<62} | {r['last_close']:>8.2f} | {r['preds'][-1]:>8.2f} | {score:>8} | "
+              f"{r['fit_sec']:>7.2f} | {r['forecast_sec'] * 1000:>8.1f}")
+    print("=" * width)
+
+    if args.plot_dir:
+        _render_forecast_charts(pipeline, results, args.plot_dir)
+
+    if args.out:
+        import pandas as pd
+        frames = [pd.DataFrame({'config': r['config'].label(), 'datetime': r['times'], 'pred_close': r['preds'],
+                                'actual_close': r['actual'] if r['actual'] is not None else None})
+                  for r in results]
+        pd.concat(frames).to_csv(args.out, index=False)
+        print(f"💾 预测结果已保存: {args.out}")
+    return results
+
+
+def _render_forecast_charts(pipeline, results, plot_dir):
+    import os
+
+    from ethcast.plotting import render_charts
+
+    os.makedirs(plot_dir, exist_ok=True)
+    specs = []
+    for i, r in enumerate(results):
+        config = r['config']
+        df = pipeline.frame(config.resolution)
+        history = df[df['datetime'] <= r['times'][0]].tail(max(60, config.window * 3))
+        series = [{'x': history['datetime'].to_numpy(), 'y': history['close'].to_numpy(), 'label': '历史实际价格',
+                   'color': 'gray', 'alpha': 0.6},
+                  {'x': r['times'].to_numpy(), 'y': r['preds'], 'label': f'{config.name} 预测', 'color': 'red',
+                   'linestyle': '--'}]
+        if r['actual'] is not None:
+            series.append({'x': r['times'].to_numpy(), 'y': r['actual'], 'label': '真实走势', 'color': 'black'})
+        specs.append({'path': os.path.join(plot_dir, f'forecast_{i:02d}_{config.model}_w{config.window}_'
+                                                     f'{config.resolution}.png'),
+                      'title': config.label(), 'series': series, 'axvline': r['times'][0]})
+    for path in render_charts(specs):
+        print(f"🖼️ {path}")
+
+
+def _render_compare_charts(times, actual, results, plot_dir):
+    import os
+
+    from ethcast.compare import mape
+    from ethcast.plotting import render_charts
+
+    os.makedirs(plot_dir, exist_ok=True)
+    colors = {'Random Forest': 'blue', 'XGBoost': 'red', 'LightGBM': 'green', 'CatBoost': 'orange'}
+    truth = {'x': times, 'y': actual, 'label': '真实走势', 'color': 'black', 'linewidth': 2}
+    specs = [{'path': os.path.join(plot_dir, 'compare_all.png'), 'title': '四种算法递归预测对比',
+              'series': [truth] + [{'x': times, 'y': pred, 'label': f'{name} (MAPE: {mape(actual, pred):.2%})',
+                                    'color': colors.get(name), 'alpha': 0.8} for name, pred in results.items()]}]
+    for name, pred in results.items():
+        specs.append({'path': os.path.join(plot_dir, f"compare_{name.replace(' ', '_')}.png"), 'title': name,
+                      'series': [truth, {'x': times, 'y': pred, 'label': name, 'color': colors.get(name)}]})
+    for path in render_charts(specs):
+        print(f"🖼️ {path}")
+
+
+def cmd_compare(args):
+    import pandas as pd
+
+    from ethcast.compare import compare_modes, mape, print_report, run_comparison
+    from ethcast.pipeline import Pipeline
+
+    pipeline = Pipeline(args.data, args.truth)
+    start = pd.to_datetime(args.start)
+    truth = pipeline.truth
+    segment = truth[truth['datetime'] >= start]
+    if args.end:
+        segment = segment[segment['datetime'] <= pd.to_datetime(args.end)]
+    steps = len(segment)
+    actual = segment['close'].to_numpy()
+    values = pipeline.train_values(args.start, ('close',))[:, 0]
+    model_params = {resolve_name(m): DEFAULT_PARAMS[resolve_name(m)] for m in _csv(args.models)}
+    print(f"✅ 预测步数: {steps} 分钟，模型: {', '.join(model_params)}")
+
+    if args.mode == 'both':
+        return compare_modes(model_params, values, args.window, steps, actual, args.stride, parallel=not args.serial)
+    results, timings = run_comparison(model_params, values, args.window, steps, parallel=not args.serial,
+                                      mode=args.mode, stride=args.stride,
+                                      cache_key={'data_file': args.data, 'split_time': start, 'feature_cols': ['close']})
+    print_report({name: mape(actual, pred) for name, pred in results.items()}, timings,
+                 f"📊 模型误差率统计 (MAPE, {args.mode})", sort=True)
+    if args.plot_dir:
+        _render_compare_charts(segment['datetime'].to_numpy(), actual, results, args.plot_dir)
+    return results, timings
+
+
+def cmd_backtest(args):
+    from ethcast.pipeline import Pipeline
+    from ethcast.backtest import walk_forward_backtest
+
+    close = Pipeline(args.data).df['close'].to_numpy()
+    name = resolve_name(args.model)
+    params = {**DEFAULT_PARAMS[name], **_parse_params(args.param)}
+    result = walk_forward_backtest(close, name, params, lookback=args.lookback, horizon=args.horizon,
+                                   test_size=args.test_size, train_size=args.train_size,
+                                   start=int((len(close) - args.lookback - args.horizon) * (1 - args.test_fraction)),
+                                   parallel=not args.serial, stake=args.stake, sizing=args.sizing,
+                                   allow_short=args.allow_short, fee_bps=args.fee_bps,
+                                   slippage_bps=args.slippage_bps)
+    print("📈 " + result.report())
+    return result
+
+
+def cmd_search(args):
+    from ethcast.pipeline import Pipeline
+    from ethcast.search import forecast_command, parse_space, print_summary, search
+
+    names = [resolve_name(m) for m in _csv(args.models)]
+    feature_sets = [_features(f) for f in (args.features or ['close'])]
+    try:
+        space = parse_space(args.space, names)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    pipeline = Pipeline(args.data, use_registry=False)
+    values = {features: pipeline.train_values(args.start, features, args.resolution) for features in feature_sets}
+    windows = [int(w) for w in _csv(args.window)]
+    print(f"✅ 训练段 {min(len(v) for v in values.values())} 根 K 线，模型: {', '.join(names)}，"
+          f"窗口: {windows}，特征组: {len(feature_sets)}")
+    outcome = search(values, names, windows, space, method=args.method, n_trials=args.trials, n_folds=args.folds,
+                     test_size=args.test_size, train_size=args.train_size, eta=args.eta, budget_sec=args.budget,
+                     n_workers=1 if args.serial else args.workers, seed=args.seed, verbose=not args.quiet)
+    print_summary(outcome, top=args.top)
+    print("👉 " + forecast_command(outcome['best'], args.start, args.resolution))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for res in outcome['history']:
+                f.write(json.dumps({**res, 'features': list(res['features'])}, ensure_ascii=False) + '\n')
+        print(f"💾 全部试验已保存: {args.out}")
+    return outcome
+
+
+def cmd_ensemble(args):
+    from ethcast.compare import mape
+    from ethcast.ensemble import fit_ensemble, latency_report
+    from ethcast.pipeline import ForecastConfig, Pipeline
+
+    pipeline = Pipeline(args.data, args.truth, use_registry=not args.no_registry)
+    features = _features(args.features)
+    configs = [ForecastConfig(model, args.window, features, args.start, args.steps, resolution=args.resolution)
+               for model in _csv(args.models)]
+    ensemble, report = fit_ensemble(pipeline, configs, args.holdout, args.method,
+                                    parallel=False if args.serial else None)
+    try:
+        width = 60
+        print("\n" + "=" * width)
+        print(f"🧩 留出段 {report['holdout']} 根 K 线（截止 {report['cutoff']}），集成方式 {report['method']}")
+        print("-" * width)
+        print(f"{'模型':<15} | {'权重':>7} | {'留出段 MAPE':>11}")
+        for name, score in report['holdout_mape'].items():
+            weight = report['weights'].get(name)
+            print(f"{name:<15} | {f'{weight:.3f}' if weight is not None else '-':>7} | {score:>11.4%}")
+        print("=" * width)
+
+        result = pipeline.forecast(configs[0], model=ensemble)
+        if result['actual'] is not None:
+            print(f"📈 集成递归预测 {args.steps} 步 MAPE: {mape(result['actual'], result['preds']):.4%}")
+        print(f"📈 集成递归预测 {args.steps} 步，终点预测 {result['preds'][-1]:.2f}，"
+              f"用时 {result['forecast_sec'] * 1000:.1f} ms")
+
+        if args.latency:
+            values = pipeline.train_values(args.start, features, args.resolution)
+            window = values[-args.window:] if len(features) > 1 else values[-args.window:, 0]
+            carry = tuple(i for i, c in enumerate(features) if c == 'volume')
+            print("⏱️ 每步延迟（ms）: " + ' | '.join(
+                f"{name} {ms:.3f}" for name, ms in latency_report(ensemble, window, args.steps, carry,
+                                                                  configs[0].target_col).items()))
+    finally:
+        ensemble.close()
+    return report
+
+
+def cmd_stream(args):
+    import pandas as pd
+
+    from ethcast.pipeline import ForecastConfig, Pipeline
+    from ethcast.stream import StreamForecaster, open_source, run_stream
+
+    features = _features(args.features)
+    config = ForecastConfig(args.model, args.window, features, params=_parse_params(args.param))
+    pipeline = Pipeline(args.data, use_registry=not args.no_registry)
+    df = pipeline.df
+    config.start = str(df['datetime'].iloc[-1])
+
+    # 历史数据填满缓冲区，初始模型走模型缓存
+    forecaster = StreamForecaster(config.name, config.model_params, args.window, features,
+                                  train_bars=args.train_bars, refresh_every=args.refresh_every,
+                                  warm_rounds=args.warm_rounds, n_threads=args.refresh_threads)
+    tail = df.tail(args.train_bars)
+    forecaster.seed(tail['timestamp'].to_numpy(), tail[list(features)].to_numpy(dtype=float), pipeline.model(config))
+    print(f"✅ 已载入 {len(tail)} 根历史 K 线，模型 {config.name}，等待数据: {args.source}")
+
+    out = open(args.out, 'a', encoding='utf-8') if args.out else None
+
+    def on_forecast(r):
+        if not args.quiet:
+            now = pd.to_datetime(r.time, unit='s')
+            print(f"🕐 {now:%m-%d %H:%M} close={r.close:.2f} → {pd.to_datetime(r.next_time, unit='s'):%H:%M} "
+                  f"预测 {r.pred:.2f} ({r.latency_ms:.2f} ms)")
+        if out is not None:
+            out.write(f"{r.time},{r.next_time},{r.close},{r.pred},{r.latency_ms:.3f}\n")
+            out.flush()
+
+    try:
+        run_stream(forecaster, open_source(args.source, from_start=args.from_start), on_forecast, limit=args.limit)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        forecaster.close()
+        if out is not None:
+            out.close()
+    print("📈 " + forecaster.stats.report())
+    return forecaster.stats
+
+
+def cmd_replay(args):
+    from ethcast.pipeline import Pipeline
+    from ethcast.stream import replay
+
+    n = replay(Pipeline(args.data, use_registry=False).df, args.to, args.rate)
+    print(f"✅ 已发送 {n} 根 K 线到 {args.to}")
+
+
+def cmd_serve(args):
+    from ethcast.serve import InferenceServer, load_served_models
+
+    served = load_served_models(args.data, _csv(args.models), args.window, _features(args.features), args.start,
+                                use_registry=not args.no_registry, max_batch=args.max_batch,
+                                max_wait_ms=args.max_wait_ms)
+    server = InferenceServer(served, args.host, args.port)
+    print(f"✅ 推理服务已启动: {server.url}  模型: {', '.join(m.alias for m in served)}  窗口: {args.window}")
+    print("   POST /predict  POST /forecast  GET /stats  POST /stats/reset  GET /health  (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("📈 " + json.dumps(server.stats()['latency'], ensure_ascii=False))
+        server.shutdown()
+
+
+def cmd_models(args):
+    from ethcast import registry
+    return registry.main(args.rest)
+
+
+def cmd_env(args):
+    from ethcast import envprobe
+    return envprobe.main((['--json'] if args.json else []) + (['--runtime'] if args.runtime else []))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ethcast', description='以太币分钟线预测工具')
+    trace.add_argument(parser)
+    profiling.add_argument(parser)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('forecast', help='递归预测未来若干分钟，可一次运行多组配置')
+    p.add_argument('--data', default=DEFAULT_DATA)
+    p.add_argument('--truth', default=None, help='真实走势文件，提供后计算 MAPE')
+    p.add_argument('--model', default='xgb', help='rf / xgb / lgbm / cat，可用逗号分隔多个')
+    p.add_argument('--window', default='15', help='窗口大小，可用逗号分隔多个')
+    p.add_argument('--features', action='append', help='特征列，逗号分隔；可重复给出多组')
+    p.add_argument('--start', default='2019-04-08T05:04', help='预测起点，可用逗号分隔多个')
+    p.add_argument('--steps', type=int, default=30, help='预测多少根 K 线')
+    p.add_argument('--resolution', default='1m', help='K 线周期 1m / 5m / 15m / 1h / 1d，可用逗号分隔多个')
+    p.add_argument('--param', action='append', help='覆盖模型参数，例如 --param n_estimators=200')
+    p.add_argument('--batch', help='JSON Lines 配置文件，每行一组配置')
+    p.add_argument('--out', help='把所有预测结果写入 CSV')
+    p.add_argument('--no-registry', action='store_true', help='不读写模型缓存')
+    p.add_argument('--plot-dir', help='把每组配置的预测图写入该目录（并行渲染，不弹窗口）')
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser('compare', help='四种模型同时训练并对比 MAPE')
+    p.add_argument('--data', default=DEFAULT_DATA)
+    p.add_argument('--truth', default=DEFAULT_TRUTH)
+    p.add_argument('--models', default='rf,xgb,lgbm,cat')
+    p.add_argument('--window', type=int, default=30)
+    p.add_argument('--start', default='2019-04-08T05:04')
+    p.add_argument('--end', default=None)
+    p.add_argument('--mode', choices=['recursive', 'direct', 'both'], default='recursive')
+    p.add_argument('--stride', type=int, default=1)
+    p.add_argument('--serial', action='store_true', help='不使用进程池')
+    p.add_argument('--plot-dir', help='把对比图写入该目录（并行渲染，不弹窗口）')
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser('backtest', help='前向回测交易策略')
+    p.add_argument('--data', default=DEFAULT_DATA)
+    p.add_argument('--model', default='xgb')
+    p.add_argument('--param', action='append')
+    p.add_argument('--lookback', type=int, default=5)
+    p.add_argument('--horizon', type=int, default=3)
+    p.add_argument('--test-fraction', type=float, default=0.2)
+    p.add_argument('--test-size', type=int, default=240, help='每隔多少分钟重新训练一次')
+    p.add_argument('--train-size', type=int, default=None, help='滚动窗口长度，不给则为扩展窗口')
+    p.add_argument('--stake', type=float, default=100.0)
+    p.add_argument('--sizing', choices=['fixed', 'edge'], default='fixed')
+    p.add_argument('--allow-short', action='store_true')
+    p.add_argument('--fee-bps', type=float, default=0.0)
+    p.add_argument('--slippage-bps', type=float, default=0.0)
+    p.add_argument('--serial', action='store_true')
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser('search', help='按时间顺序的验证折搜索模型参数 × 窗口 × 特征组合')
+    p.add_argument('--data', default=DEFAULT_DATA)
+    p.add_argument('--models', default='xgb', help='rf / xgb / lgbm / cat，逗号分隔')
+    p.add_argument('--window', default='10,15,20,30', help='候选窗口大小，逗号分隔')
+    p.add_argument('--features', action='append', help='候选特征组，逗号分隔；可重复给出多组')
+    p.add_argument('--space', action='append',
+                   help='覆盖搜索范围，例如 --space max_depth=4,6,8 或 --space lgbm:num_leaves=15,31')
+    p.add_argument('--start', default='2019-04-08T05:04', help='只用这一时刻之前的数据')
+    p.add_argument('--resolution', default='1m')
+    p.add_argument('--method', choices=['halving', 'random'], default='halving',
+                   help='halving：先用最近一折粗筛再逐轮减半；random：所有试验都跑全部折')
+    p.add_argument('--trials', type=int, default=30, help='从网格里随机抽多少组')
+    p.add_argument('--folds', type=int, default=3, help='验证折数（每折 --test-size 根 K 线）')
+    p.add_argument('--test-size', type=int, default=240)
+    p.add_argument('--train-size', type=int, default=None, help='滚动训练窗口长度，不给则为扩展窗口')
+    p.add_argument('--eta', type=int, default=3, help='逐轮减半时每轮保留 1/eta')
+    p.add_argument('--budget', type=float, default=None, help='每个试验的时间预算（秒）')
+    p.add_argument('--workers', type=int, default=None, help='进程数，默认按核数')
+    p.add_argument('--serial', action='store_true', help='不使用进程池')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--top', type=int, default=10)
+    p.add_argument('--out', help='把全部试验写入 JSON Lines')
+    p.add_argument('--quiet', action='store_true', help='不逐条打印试验结果')
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser('ensemble', help='四种模型按留出段学到的权重组合，递归预测时并行调用各基模型')
+    p.add_argument('--data', default=DEFAULT_DATA)
+    p.add_argument('--truth', default=None, help='真实走势文件，提供后计算 MAPE')
+    p.add_argument('--models', default='rf,xgb,lgbm,cat')
+    p.add_argument('--method', choices=['stack', 'blend', 'mean'], default='stack',
+                   help='stack：非负最小二乘；blend：按留出段误差倒数加权；mean：等权')
+    p.add_argument('--holdout', type=int, default=240, help='用预测起点前多少根 K 线学习权重')
+    p.add_argument('--window', type=int, default=30)
+    p.add_argument('--features', default='close')
+    p.add_argument('--start', default='2019-04-08T05:04')
+    p.add_argument('--steps', type=int, default=30)
+    p.add_argument('--resolution', default='1m')
+    p.add_argument('--serial', action='store_true', help='基模型依次预测，不用线程（单核机器上默认如此）')
+    p.add_argument('--latency', action='store_true', help='对比单模型、集成串行 / 并行的每步延迟')
+    p.add_argument('--no-registry', action='store_true')
+    p.set_defaults(func=cmd_ensemble)
+
+    p = sub.add_parser('stream', help='流式接收分钟 K 线，实时预测下一分钟并在后台增量更新模型')
+    p.add_argument('--source', default='file:bars.csv', help='file:路径（类似 tail -f）或 tcp:主机:端口')
+    p.add_argument('--from-start', action='store_true', help='文件数据源从头读取，而不是只读新追加的行')
+    p.add_argument('--data', default=DEFAULT_DATA, help='启动时载入的历史数据')
+    p.add_argument('--model', default='xgb')
+    p.add_argument('--param', action='append')
+    p.add_argument('--window', type=int, default=30)
+    p.add_argument('--features', default='close')
+    p.add_argument('--train-bars', type=int, default=5000, help='后台更新时使用最近多少根 K 线')
+    p.add_argument('--refresh-every', type=int, default=60, help='每收到多少根新 K 线更新一次模型')
+    p.add_argument('--warm-rounds', type=int, default=20, help='每次增量训练追加的树的数量')
+    p.add_argument('--refresh-threads', type=int, default=None, help='后台训练使用的线程数')
+    p.add_argument('--limit', type=int, default=None, help='处理多少根后退出')
+    p.add_argument('--out', help='把预测追加写入 CSV')
+    p.add_argument('--quiet', action='store_true', help='不逐条打印预测')
+    p.add_argument('--no-registry', action='store_true')
+    p.set_defaults(func=cmd_stream)
+
+    p = sub.add_parser('replay', help='把历史 K 线按速率写到文件或 socket，模拟实时行情')
+    p.add_argument('--data', default=DEFAULT_TRUTH)
+    p.add_argument('--to', default='file:bars.csv', help='file:路径 或 tcp:主机:端口')
+    p.add_argument('--rate', type=float, default=0.0, help='每秒多少根，0 表示不限速')
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser('serve', help='常驻推理服务：模型只加载一次，合并同时到达的请求')
+    p.add_argument('--data', default=DEFAULT_DATA)
+    p.add_argument('--models', default='xgb', help='要加载的模型，逗号分隔')
+    p.add_argument('--window', type=int, default=30)
+    p.add_argument('--features', default='close')
+    p.add_argument('--start', default=None, help='训练截止时间，默认用全部数据')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8808)
+    p.add_argument('--max-batch', type=int, default=64, help='一次合并的最多请求数')
+    p.add_argument('--max-wait-ms', type=float, default=2.0, help='收到第一个请求后最多等多久再凑批')
+    p.add_argument('--no-registry', action='store_true')
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('models', help='查看或清理模型缓存（同 python -m ethcast.registry）')
+    p.add_argument('rest', nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_models)
+
+    p = sub.add_parser('env', help='检查依赖库版本与线程库配置，不导入这些库（同 python -m ethcast.envprobe）')
+    p.add_argument('--json', action='store_true', help='输出 JSON（给部署脚本 / 监控用）')
+    p.add_argument('--runtime', action='store_true', help='导入各库并读取线程池实际配置（较慢）')
+    p.set_defaults(func=cmd_env)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    trace.setup_from_args(args)
+    profiling.setup_from_args(args)
+    try:
+        with trace.span(args.command):
+            result = args.func(args)
+    except FileNotFoundError as e:
+        print(f"❌ 找不到文件: {e}")
+        return 1
+    # 各子命令返回结果对象；只有 env 这类检查命令返回整数退出码
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
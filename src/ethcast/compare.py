@@ -0,0 +1,150 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ethcast.direct import DirectForecaster
+from ethcast.forecast import forecast_path
+from ethcast.models import build_model
+from ethcast.registry import ModelRegistry
+from ethcast.trace import absorb, drain_child, span
+from ethcast.windows import make_xy
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # 没装 threadpoolctl 时只靠各库自己的线程参数
+    threadpool_limits = None
+
+
+def split_threads(n_models, n_cores=None):
+    # 把 CPU 核心平均分给同时训练的模型，避免各库线程池互相抢占
+    n_cores = n_cores or os.cpu_count() or 1
+    base, extra = divmod(n_cores, n_models)
+    return [max(1, base + (1 if i < extra else 0)) for i in range(n_models)]
+
+
+def fit_and_forecast(name, params, values, window_size, steps, n_threads=None, carry_cols=(),
+                     mode='recursive', stride=1, cache_key=None):
+    # 单个模型的完整流程：构造窗口 -> 训练 -> 预测；在工作进程里运行时把记录的 trace 阶段随结果带回
+    with span(f'fit_and_forecast {name}', mode=mode, steps=steps, threads=n_threads):
+        result = _fit_and_forecast(name, params, values, window_size, steps, n_threads, carry_cols, mode, stride,
+                                   cache_key)
+    result[2]['trace'] = drain_child()
+    return result
+
+
+def _fit_and_forecast(name, params, values, window_size, steps, n_threads, carry_cols, mode, stride, cache_key):
+    # mode='recursive' 逐步把预测值回填窗口；mode='direct' 训练多输出模型，一次 predict 得到整个区间
+    # cache_key 为 {'data_file': ..., 'split_time': ..., 'feature_cols': ...} 时递归模式走模型缓存
+    limits = threadpool_limits(n_threads) if threadpool_limits and n_threads else None
+    try:
+        if mode == 'direct':
+            model = DirectForecaster(name, params, steps, stride, n_threads)
+            t0 = time.perf_counter()
+            with span('fit', model=name):
+                model.fit(values, window_size)
+            fit_sec = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            with span('forecast', steps=steps):
+                preds = model.forecast(values[-window_size:])
+            forecast_sec = time.perf_counter() - t0
+        else:
+            t0 = time.perf_counter()
+            if cache_key is not None:
+                # 命中模型缓存时直接加载，连窗口都不用构造
+                model = ModelRegistry.for_data(cache_key['data_file']).get_or_fit(
+                    name, params, lambda: make_xy(values, window_size), n_threads=n_threads,
+                    window_size=window_size, **cache_key)
+            else:
+                with span('prepare_data', window=window_size):
+                    X, y = make_xy(values, window_size)
+                model = build_model(name, params, n_threads)
+                with span('fit', model=name, rows=len(X)):
+                    model.fit(X, y)
+            fit_sec = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            with span('forecast', steps=steps):
+                preds = forecast_path(model.predict, values[-window_size:], steps, carry_cols)
+            forecast_sec = time.perf_counter() - t0
+    finally:
+        if limits is not None:
+            limits.unregister()
+    return name, preds, {'fit': fit_sec, 'forecast': forecast_sec, 'threads': n_threads}
+
+
+def run_comparison(model_params, values, window_size, steps, parallel=True, n_cores=None, carry_cols=(),
+                   mode='recursive', stride=1, cache_key=None):
+    # model_params: {模型名: 参数字典}；返回 (各模型预测, 各模型耗时)
+    names = list(model_params)
+    results, timings = {}, {}
+    t0 = time.perf_counter()
+    if parallel and len(names) > 1:
+        threads = split_threads(len(names), n_cores)
+        with ProcessPoolExecutor(max_workers=len(names)) as pool:
+            futures = [pool.submit(fit_and_forecast, name, model_params[name], values, window_size,
+                                   steps, n, carry_cols, mode, stride, cache_key)
+                       for name, n in zip(names, threads)]
+            for future in as_completed(futures):
+                name, preds, timing = future.result()
+                absorb(timing.pop('trace'))
+                print(f"  {name} 完成：训练 {timing['fit']:.2f}s，预测 {timing['forecast']:.2f}s")
+                results[name], timings[name] = preds, timing
+    else:
+        for name in names:
+            print(f"正在训练并滚动预测: {name}...")
+            name, preds, timing = fit_and_forecast(name, model_params[name], values, window_size,
+                                                   steps, n_cores, carry_cols, mode, stride, cache_key)
+            timing.pop('trace')
+            results[name], timings[name] = preds, timing
+    # 按传入顺序返回，方便画图时颜色与图例保持一致
+    results = {name: results[name] for name in names}
+    timings = {name: timings[name] for name in names}
+    timings['总耗时'] = time.perf_counter() - t0
+    return results, timings
+
+
+def print_report(scores, timings, title, sort=False, width=60):
+    # MAPE 与训练/预测耗时并排输出
+    print("\n" + "=" * width)
+    print(title)
+    print("-" * width)
+    print(f"{'模型':<15} | {'MAPE':>9} | {'训练(s)':>8} | {'预测(s)':>8} | {'线程':>4}")
+    items = sorted(scores.items(), key=lambda x: x[1]) if sort else scores.items()
+    for name, score in items:
+        t = timings[name]
+        print(f"{name:<15} | {score:>9.4%} | {t['fit']:>8.2f} | {t['forecast']:>8.2f} | {t['threads'] or '-':>4}")
+    print("-" * width)
+    print(f"墙钟总耗时: {timings['总耗时']:.2f}s（各模型训练+预测之和: "
+          f"{sum(timings[n]['fit'] + timings[n]['forecast'] for n in scores):.2f}s）")
+    print("=" * width)
+
+
+def mape(actual, pred):
+    # 与 sklearn 的 mean_absolute_percentage_error 相同，预测长度不足时按实际长度截断
+    actual = np.asarray(actual, dtype=float)
+    pred = np.asarray(pred, dtype=float)[:len(actual)]
+    return float(np.mean(np.abs(actual - pred) / np.maximum(np.abs(actual), np.finfo(float).eps)))
+
+
+def compare_modes(model_params, values, window_size, steps, actual, stride=1, width=86, **kwargs):
+    # 同一组模型分别跑递归与直接多步两种模式，对比预测延迟与 MAPE
+    print("🔁 递归模式...")
+    rec, rec_t = run_comparison(model_params, values, window_size, steps, **kwargs)
+    print(f"🎯 直接多步模式（每 {stride} 分钟一个输出）...")
+    dire, dire_t = run_comparison(model_params, values, window_size, steps, mode='direct', stride=stride, **kwargs)
+
+    print("\n" + "=" * width)
+    print(f"📐 递归 vs 直接多步 ({steps} 步)")
+    print("-" * width)
+    print(f"{'模型':<15} | {'递归 MAPE':>9} | {'直接 MAPE':>9} | {'递归预测(ms)':>11} | "
+          f"{'直接预测(ms)':>11} | {'直接训练(s)':>10}")
+    for name in model_params:
+        r_ms = rec_t[name]['forecast'] * 1000
+        d_ms = dire_t[name]['forecast'] * 1000
+        print(f"{name:<15} | {mape(actual, rec[name]):>9.4%} | {mape(actual, dire[name]):>9.4%} | "
+              f"{r_ms:>11.1f} | {d_ms:>11.1f} | {dire_t[name]['fit']:>10.2f}")
+    print("=" * width)
+    return {'recursive': (rec, rec_t), 'direct': (dire, dire_t)}
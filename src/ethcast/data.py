@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from ethcast.trace import span, traced
+
+# 所有 ETH 分钟线 Excel 的统一列类型
+COLUMN_TYPES = {
+    'timestamp': 'int64',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'float64',
+}
+
+CACHE_DIR_NAME = '.ethcast_cache'
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # 没有 pyarrow 时退回 pickle 缓存
+    feather = None
+
+
+def file_digest(path, chunk_size=1 << 20):
+    # 按块计算文件内容的 sha1，避免一次性读入大文件
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_dir_for(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+
+
+def _meta_path(path):
+    return os.path.join(cache_dir_for(path), os.path.basename(path) + '.json')
+
+
+def frame_suffix():
+    return 'feather' if feather is not None else 'pkl'
+
+
+def _data_path(path, digest):
+    return os.path.join(cache_dir_for(path), f"{os.path.basename(path)}.{digest[:16]}.{frame_suffix()}")
+
+
+def normalize_ohlcv(df):
+    # 统一时间格式与数值类型，并按时间排序
+    df = df.copy()
+    if 'datetime' in df.columns:
+        df['datetime'] = pd.to_datetime(df['datetime'])
+    for col, dtype in COLUMN_TYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    if 'datetime' in df.columns:
+        df = df.sort_values('datetime', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def write_frame(df, data_path):
+    # 写列式缓存（K 线金字塔的各级也用这个格式）
+    if feather is not None:
+        # 不压缩，读取时才能直接内存映射
+        feather.write_feather(df, data_path, compression='uncompressed')
+    else:
+        df.to_pickle(data_path)
+
+
+def read_frame(data_path):
+    if feather is not None:
+        return feather.read_table(data_path, memory_map=True).to_pandas()
+    return pd.read_pickle(data_path)
+
+
+def _load_meta(path):
+    try:
+        with open(_meta_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(path, meta):
+    with open(_meta_path(path), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+@traced('load_ohlcv')
+def load_ohlcv(path, use_cache=True, refresh=False):
+    # 读取 ETH 分钟线 Excel；首次读取后写入列式缓存，之后直接内存映射读取
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if not use_cache:
+        with span('read_excel', file=os.path.basename(path)):
+            return normalize_ohlcv(pd.read_excel(path))
+
+    stat = os.stat(path)
+    meta = None if refresh else _load_meta(path)
+
+    # 1. mtime 与大小都没变：直接命中，不必重新计算哈希
+    if meta and meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        data_path = _data_path(path, meta['sha1'])
+        if os.path.exists(data_path):
+            with span('cache_read', file=os.path.basename(path)):
+                return read_frame(data_path)
+
+    # 2. mtime 变了但内容没变（例如重新拷贝）：只更新元数据
+    digest = file_digest(path)
+    data_path = _data_path(path, digest)
+    os.makedirs(cache_dir_for(path), exist_ok=True)
+    if refresh or not os.path.exists(data_path):
+        # 3. 内容变化或没有缓存：解析 Excel 并重建缓存
+        if meta and meta.get('sha1') != digest:
+            stale = _data_path(path, meta['sha1'])
+            if os.path.exists(stale):
+                os.remove(stale)
+        with span('read_excel', file=os.path.basename(path)):
+            df = normalize_ohlcv(pd.read_excel(path))
+        with span('cache_write'):
+            write_frame(df, data_path)
+    else:
+        with span('cache_read', file=os.path.basename(path)):
+            df = read_frame(data_path)
+
+    _save_meta(path, {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': digest})
+    return df
+
+
+def source_digest(path):
+    # 数据文件内容的 sha1；mtime 与大小没变时直接用缓存元数据里的值
+    stat = os.stat(path)
+    meta = _load_meta(path)
+    if meta and meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return meta['sha1']
+    return file_digest(path)
+
+
+def clear_cache(path):
+    # 删除某个 Excel 对应的全部缓存文件
+    meta = _load_meta(path)
+    if meta:
+        data_path = _data_path(path, meta['sha1'])
+        if os.path.exists(data_path):
+            os.remove(data_path)
+    if os.path.exists(_meta_path(path)):
+        os.remove(_meta_path(path))
@@ -0,0 +1,76 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ethcast.models import build_model
+from ethcast.windows import lag_matrix
+
+
+def horizon_anchors(steps, stride=1):
+    # 需要直接预测的步数（从 1 开始）：每隔 stride 步取一个，最后一步一定包含在内
+    return np.unique(np.r_[np.arange(stride, steps + 1, stride), steps])
+
+
+def make_direct_xy(values, window_size, anchors, target_col=0):
+    # X 与递归模式相同；Y 的第 j 列是窗口结束后第 anchors[j] 分钟的目标值
+    values = np.asarray(values)
+    target = values if values.ndim == 1 else values[:, target_col]
+    horizon = int(anchors[-1])
+    n_samples = len(values) - window_size - horizon + 1
+    if n_samples < 1:
+        raise ValueError(f"数据长度 {len(values)} 不足以构造窗口 {window_size} + 预测 {horizon} 步的样本")
+    X = lag_matrix(values, window_size)[:n_samples]
+    Y = sliding_window_view(target[window_size:], horizon)[:n_samples]
+    return X, Y[:, np.asarray(anchors) - 1]
+
+
+def build_multi_output(name, params, n_threads=None):
+    # 随机森林和 XGBoost 原生支持二维 y；CatBoost 用 MultiRMSE；
+    # LightGBM 不支持多输出，为每个预测步单独训练一个模型
+    if name == 'CatBoost':
+        params = {**params, 'loss_function': 'MultiRMSE'}
+    model = build_model(name, params, n_threads)
+    if name == 'LightGBM':
+        from sklearn.multioutput import MultiOutputRegressor
+        model = MultiOutputRegressor(model)
+    return model
+
+
+class DirectForecaster:
+    # 直接多步预测：一次 predict 得到整个预测区间，不再把预测值回填窗口
+    # stride > 1 时只训练每隔 stride 分钟的输出，中间分钟线性插值，适合 1140 步这类长区间
+
+    def __init__(self, name, params, steps, stride=1, n_threads=None, target_col=0):
+        self.name = name
+        self.steps = steps
+        self.anchors = horizon_anchors(steps, stride)
+        self.target_col = target_col
+        # 只有一个锚点（steps <= stride）时就是普通的单输出回归，不能用 MultiRMSE 这类多输出设置去拟合一维 y
+        self.model = build_multi_output(name, params, n_threads) if len(self.anchors) > 1 \
+            else build_model(name, params, n_threads)
+
+    def fit(self, values, window_size):
+        X, Y = make_direct_xy(values, window_size, self.anchors, self.target_col)
+        self.model.fit(X, Y if len(self.anchors) > 1 else Y[:, 0])
+        return self
+
+    def predict(self, windows):
+        # windows: (路径数, w) 或 (路径数, w, 特征数)；返回 (路径数, steps)
+        windows = np.asarray(windows, dtype=float)
+        n_paths = len(windows)
+        anchor_preds = np.asarray(self.model.predict(windows.reshape(n_paths, -1)), dtype=float)
+        anchor_preds = anchor_preds.reshape(n_paths, -1)
+        if len(self.anchors) == self.steps:
+            return anchor_preds
+
+        # 以窗口最后一个收盘价作为第 0 步，在各锚点之间线性插值
+        last = windows[:, -1] if windows.ndim == 2 else windows[:, -1, self.target_col]
+        xp = np.r_[0, self.anchors]
+        fp = np.column_stack([last, anchor_preds])
+        pos = np.arange(1, self.steps + 1)
+        hi = np.searchsorted(xp, pos)
+        lo = hi - 1
+        weight = (pos - xp[lo]) / (xp[hi] - xp[lo])
+        return fp[:, lo] * (1 - weight) + fp[:, hi] * weight
+
+    def forecast(self, window):
+        return self.predict(np.asarray(window)[None])[0]
@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ethcast.compare import mape
+from ethcast.envprobe import cpu_budget
+from ethcast.forecast import ForecastStats, forecast_path
+from ethcast.stream import fast_predictor
+
+# 四种模型的堆叠 / 加权集成：基模型先用预测起点前 holdout 根 K 线之前的数据训练，
+# 在留出段上做一步预测，学出组合权重，再换成用全部数据训练的基模型（两套都走模型缓存）。
+# 递归预测时每一步所有基模型读同一个窗口缓冲区，各自在线程里 predict（XGBoost / LightGBM / CatBoost
+# 预测时释放 GIL），每步延迟接近最慢的单模型，而不是四个之和
+
+METHODS = ('stack', 'blend', 'mean')
+
+
+def combine_weights(preds, actual, method='stack'):
+    # preds: (留出样本数, 模型数)
+    # stack：非负最小二乘（不加截距，权重之和不强制为 1）；blend：按留出段 MSE 的倒数加权；mean：等权
+    preds = np.asarray(preds, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    m = preds.shape[1]
+    if method == 'mean':
+        return np.full(m, 1.0 / m)
+    if method == 'blend':
+        inv = 1.0 / np.maximum(np.mean((preds - actual[:, None]) ** 2, axis=0), np.finfo(float).tiny)
+        return inv / inv.sum()
+    if method == 'stack':
+        from scipy.optimize import nnls  # 只在训练集成时用到，推理进程不导入 scipy
+        return nnls(preds, actual)[0]
+    raise ValueError(f"未知的集成方式: {method}（可选: {', '.join(METHODS)}）")
+
+
+class StackedEnsemble:
+    # predict(X) 与单个模型接口一致，可以直接交给 recursive_forecast / 推理服务
+
+    def __init__(self, models, weights, parallel=None):
+        self.names = list(models)
+        self.models = dict(models)
+        self.weights = np.asarray(weights, dtype=float)
+        self._predictors = [fast_predictor(m) for m in self.models.values()]
+        # 非负最小二乘常把个别模型的权重压到 0，这些模型推理时直接跳过
+        self._active = [i for i, w in enumerate(self.weights) if w != 0] or list(range(len(self.names)))
+        # 第一个基模型在调用线程里跑，其余交给常驻线程，少一次线程切换；
+        # parallel=None 时按可用核数决定（单核上线程只会互相抢占）
+        if parallel is None:
+            parallel = cpu_budget() > 1
+        self._pool = ThreadPoolExecutor(len(self._predictors) - 1, thread_name_prefix='ensemble') \
+            if parallel and len(self._predictors) > 1 else None
+
+    @property
+    def parallel(self):
+        return self._pool is not None
+
+    def predict_base(self, X, indices=None):
+        # 返回 (样本数, 模型数)，每列一个基模型的预测；indices 只算其中几个模型
+        predictors = [self._predictors[i] for i in (range(len(self._predictors)) if indices is None else indices)]
+        if self._pool is None or len(predictors) == 1:
+            cols = [p(X) for p in predictors]
+        else:
+            futures = [self._pool.submit(p, X) for p in predictors[1:]]
+            cols = [predictors[0](X), *(f.result() for f in futures)]
+        return np.column_stack([np.asarray(c, dtype=float).reshape(-1) for c in cols])
+
+    def predict(self, X):
+        return self.predict_base(X, self._active) @ self.weights[self._active]
+
+    def describe(self):
+        return ', '.join(f"{name} {w:.3f}" for name, w in zip(self.names, self.weights))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def holdout_split(pipeline, config, holdout):
+    # 留出段为预测起点前最后 holdout 个训练目标；返回基模型的截止时间和留出段的 (X, y)
+    X, y = pipeline.xy(config.start, config.features, config.window, config.resolution)
+    if holdout >= len(y) // 2:
+        raise ValueError(f"留出段 {holdout} 太长，训练样本只有 {len(y)} 个")
+    df = pipeline.frame(config.resolution)
+    times = df.loc[pipeline._train_mask(df, config.start, config.resolution), 'datetime']
+    return str(times.iloc[-holdout - 1]), np.asarray(X[-holdout:]), np.asarray(y[-holdout:])
+
+
+def fit_ensemble(pipeline, configs, holdout=240, method='stack', parallel=None):
+    # configs: 只有 model 不同的一组 ForecastConfig；返回 (集成模型, 留出段报告)
+    from dataclasses import replace
+
+    base = configs[0]
+    cutoff, X_hold, y_hold = holdout_split(pipeline, base, holdout)
+    t0 = time.perf_counter()
+    hold_models = {c.name: pipeline.model(replace(c, start=cutoff)) for c in configs}
+    preds = StackedEnsemble(hold_models, np.zeros(len(hold_models)), parallel=False).predict_base(X_hold)
+    weights = combine_weights(preds, y_hold, method)
+    scores = {name: mape(y_hold, preds[:, i]) for i, name in enumerate(hold_models)}
+    scores['集成'] = mape(y_hold, preds @ weights)
+    models = {c.name: pipeline.model(c) for c in configs}
+    report = {'cutoff': cutoff, 'holdout': holdout, 'method': method, 'weights': dict(zip(models, weights)),
+              'holdout_mape': scores, 'fit_sec': time.perf_counter() - t0}
+    return StackedEnsemble(models, weights, parallel=parallel), report
+
+
+def step_latency(predict, window, steps, carry_cols=(), target_col=0):
+    # 递归预测的平均每步延迟（毫秒）
+    stats = ForecastStats()
+    forecast_path(predict, window, steps, carry_cols, stats, target_col=target_col)
+    return stats.seconds / max(stats.steps, 1) * 1000
+
+
+def latency_report(ensemble, window, steps, carry_cols=(), target_col=0):
+    # 对比：每个基模型单独递归、集成串行、集成并行的每步延迟
+    out = {name: step_latency(p, window, steps, carry_cols, target_col)
+           for name, p in zip(ensemble.names, ensemble._predictors)}
+    serial = StackedEnsemble(ensemble.models, ensemble.weights, parallel=False)
+    out['集成(串行)'] = step_latency(serial.predict, window, steps, carry_cols, target_col)
+    threaded = ensemble if ensemble.parallel else StackedEnsemble(ensemble.models, ensemble.weights, parallel=True)
+    out['集成(并行)'] = step_latency(threaded.predict, window, steps, carry_cols, target_col)
+    if threaded is not ensemble:
+        threaded.close()
+    return out
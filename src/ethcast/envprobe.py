@@ -0,0 +1,176 @@
+import argparse
+import importlib.metadata as metadata
+import importlib.util
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+# 环境探测：版本号读已安装发行包的元数据，线程库看包里带的 / 链接的动态库文件名，
+# 全程不导入任何被检查的库，几十毫秒出结果，可直接作为部署后的健康检查（缺必需库时退出码为 1）
+
+# (导入名, 发行包名, 分组, 控制线程数的参数)
+LIBRARIES = [
+    ('numpy', 'numpy', '核心', 'OPENBLAS_NUM_THREADS / OMP_NUM_THREADS'),
+    ('pandas', 'pandas', '核心', ''),
+    ('sklearn', 'scikit-learn', '模型', 'n_jobs'),
+    ('xgboost', 'xgboost', '模型', 'n_jobs'),
+    ('lightgbm', 'lightgbm', '模型', 'n_jobs'),
+    ('catboost', 'catboost', '模型', 'thread_count'),
+    ('threadpoolctl', 'threadpoolctl', '模型', ''),
+    ('matplotlib', 'matplotlib', '画图', ''),
+    ('mplfinance', 'mplfinance', '画图', ''),
+    ('openpyxl', 'openpyxl', '数据', ''),
+    ('requests', 'requests', '爬虫', ''),
+    ('aiohttp', 'aiohttp', '爬虫', ''),
+    ('bs4', 'beautifulsoup4', '爬虫', ''),
+    ('lxml', 'lxml', '爬虫', ''),
+    ('jieba', 'jieba', '词云', ''),
+    ('wordcloud', 'wordcloud', '词云', ''),
+    ('tensorflow', 'tensorflow', '可选', 'intra/inter_op_parallelism_threads'),
+]
+REQUIRED_GROUPS = ('核心', '模型')
+
+# 影响 BLAS / OpenMP 线程池大小的环境变量
+THREAD_ENV = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS',
+              'NUMEXPR_NUM_THREADS')
+
+_RUNTIME_NAMES = {
+    b'openblas': 'OpenBLAS', b'mkl_rt': 'MKL', b'gomp': 'GNU OpenMP', b'iomp5': 'Intel OpenMP',
+    b'omp': 'LLVM OpenMP',
+}
+_RUNTIME_RE = re.compile(rb'lib(?:scipy_)?(openblas|mkl_rt|gomp|iomp5|omp)(?:64_)?[\w.-]*?\.(?:so|dylib|dll)')
+_NATIVE_SUFFIXES = ('.so', '.dylib', '.dll', '.pyd')
+# 动态库的依赖名（ELF 的 DT_NEEDED、Mach-O 的 load command）都在文件开头，读 1MB 足够
+_HEAD_BYTES = 1 << 20
+
+
+def cpu_budget():
+    # 进程实际可用的核数（容器 / taskset 限制后），而不是整机核数
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _native_files(dist):
+    for f in dist.files or ():
+        name = f.name.lower()
+        if name.endswith(_NATIVE_SUFFIXES) or '.so.' in name:
+            yield f
+
+
+def native_runtimes(dist):
+    # 随包捆绑的运行库（numpy.libs/libscipy_openblas…、xgboost.libs/libgomp…）直接看文件名；
+    # 包自己的主动态库（非 Cython 扩展）再读文件头，找它链接的系统 OpenMP
+    found = {}
+    for f in _native_files(dist):
+        m = _RUNTIME_RE.search(f.name.encode())
+        if m:
+            found.setdefault(_RUNTIME_NAMES[m.group(1)], '捆绑')
+            continue
+        if 'cpython' in f.name or 'abi3' in f.name:
+            continue
+        try:
+            with open(dist.locate_file(f), 'rb') as fh:
+                head = fh.read(_HEAD_BYTES)
+        except OSError:
+            continue
+        for m in _RUNTIME_RE.finditer(head):
+            found.setdefault(_RUNTIME_NAMES[m.group(1)], '系统')
+    return found
+
+
+def probe_library(import_name, dist_name):
+    info = {'name': import_name, 'distribution': dist_name, 'installed': False, 'version': None,
+            'location': None, 'runtimes': {}}
+    try:
+        dist = metadata.distribution(dist_name)
+    except metadata.PackageNotFoundError:
+        return info
+    info['version'] = dist.version
+    # 顶层包的 find_spec 只定位文件，不执行包代码
+    spec = importlib.util.find_spec(import_name)
+    info['installed'] = spec is not None
+    if spec is not None:
+        info['location'] = os.path.dirname(spec.origin) if spec.origin else None
+    info['runtimes'] = native_runtimes(dist)
+    return info
+
+
+def runtime_threadpools(import_names):
+    # --runtime：真正导入各库，用 threadpoolctl 读线程池的实际大小（慢，只在排查问题时用）
+    from threadpoolctl import threadpool_info
+
+    for name in import_names:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    return [{'library': p.get('internal_api'), 'prefix': p.get('prefix'), 'version': p.get('version'),
+             'num_threads': p.get('num_threads'), 'filepath': p.get('filepath')} for p in threadpool_info()]
+
+
+def probe_environment(libraries=LIBRARIES, runtime=False):
+    t0 = time.perf_counter()
+    report = {
+        'python': sys.version.split()[0],
+        'executable': sys.executable,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'cpu_budget': cpu_budget(),
+        'thread_env': {k: os.environ[k] for k in THREAD_ENV if k in os.environ},
+        'libraries': [],
+    }
+    for import_name, dist_name, group, thread_param in libraries:
+        info = probe_library(import_name, dist_name)
+        info.update(group=group, thread_param=thread_param)
+        report['libraries'].append(info)
+    if runtime:
+        report['threadpools'] = runtime_threadpools(
+            [lib['name'] for lib in report['libraries'] if lib['installed'] and lib['group'] in REQUIRED_GROUPS])
+    report['missing_required'] = [lib['name'] for lib in report['libraries']
+                                  if lib['group'] in REQUIRED_GROUPS and not lib['installed']]
+    report['elapsed_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    return report
+
+
+def print_report(report):
+    print(f"Python {report['python']}  ({report['executable']})")
+    print(f"平台: {report['platform']}  可用核数: {report['cpu_budget']}/{report['cpu_count']}")
+    env = ', '.join(f"{k}={v}" for k, v in report['thread_env'].items()) or '未设置（各库默认按核数开线程）'
+    print(f"线程环境变量: {env}")
+    print()
+    print(f"{'库名':<15} | {'分组':<4} | {'状态':<6} | {'版本号':<12} | 线程库 / 线程参数")
+    print("-" * 80)
+    for lib in report['libraries']:
+        status = '✅ 成功' if lib['installed'] else '❌ 失败'
+        version = lib['version'] or '未找到模块'
+        threads = ', '.join(f"{name}({how})" for name, how in lib['runtimes'].items())
+        if lib['thread_param']:
+            threads = f"{threads}  [{lib['thread_param']}]" if threads else f"[{lib['thread_param']}]"
+        print(f"{lib['name']:<15} | {lib['group']:<4} | {status:<6} | {version:<12} | {threads}")
+    for pool in report.get('threadpools', []):
+        print(f"🧵 {pool['library']:<8} {pool['prefix']:<24} 线程数 {pool['num_threads']}  {pool['filepath']}")
+    if report['missing_required']:
+        print(f"\n❌ 缺少必需库: {', '.join(report['missing_required'])}")
+    print(f"\n⏱️ 探测耗时 {report['elapsed_ms']} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m ethcast.envprobe', description='不导入依赖库的环境检查')
+    parser.add_argument('--json', action='store_true', help='输出 JSON（给部署脚本 / 监控用）')
+    parser.add_argument('--runtime', action='store_true', help='导入各库并读取线程池实际配置（较慢）')
+    args = parser.parse_args(argv)
+
+    report = probe_environment(runtime=args.runtime)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 1 if report['missing_required'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
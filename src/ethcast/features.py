@@ -0,0 +1,314 @@
+import re
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 技术指标特征：收益率、均线、波动率、EMA、RSI、ATR、VWAP、成交量 z 分数。
+# 批量计算时对整段 NumPy 数组一次算完（滚动窗口用步长视图，EMA 类用分块展开的递推）；
+# 递归预测时用 FeatureState 逐根更新，每根新 K 线的代价是 O(1)，不随窗口长度增长。
+# 特征名形如 'rsi_14'、'ema_12'，也可以直接写原始列 'close' / 'volume'，与 ForecastConfig.features 通用
+
+RAW_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+INDICATORS = {
+    'ret': '收益率 close/close[t-n] - 1',
+    'sma': '简单均线',
+    'std': '1 分钟收益率的滚动标准差',
+    'ema': '指数均线 alpha=2/(n+1)',
+    'rsi': 'RSI（Wilder 平滑）',
+    'atr': 'ATR（Wilder 平滑）',
+    'vwap': '滚动 VWAP（典型价 (h+l+c)/3 按成交量加权）',
+    'volz': '成交量 z 分数',
+}
+DEFAULT_FEATURES = ('close', 'ret_1', 'ret_5', 'sma_10', 'std_30', 'ema_12', 'ema_26', 'rsi_14', 'atr_14',
+                    'vwap_30', 'volz_30')
+
+# 每隔多少根用环形缓冲区里的原值重算一次滚动和，消除浮点累加误差
+RESUM_EVERY = 4096
+
+
+def parse_feature(name):
+    # 'rsi_14' -> ('rsi', 14)；原始列 -> (列名, 0)
+    if name in RAW_COLUMNS:
+        return name, 0
+    m = re.fullmatch(r'([a-z]+)_(\d+)', name)
+    if not m or m.group(1) not in INDICATORS or int(m.group(2)) < 1:
+        raise ValueError(f"未知特征: {name}（可用: {', '.join(RAW_COLUMNS)}，"
+                         f"或 {' / '.join(k + '_n' for k in INDICATORS)}）")
+    return m.group(1), int(m.group(2))
+
+
+def has_indicators(names):
+    return any(parse_feature(name)[1] for name in names)
+
+
+def ewm(x, alpha, init=None):
+    # y[t] = (1 - a) * y[t-1] + a * x[t]，y[-1] = init（默认 x[0]，即 y[0] = x[0]）。
+    # 块内展开成 y[s+j] = d^(j+1) * y[s-1] + a * d^j * cumsum(x * d^-i)，块长保证 d^-j 不溢出
+    x = np.asarray(x, dtype=float)
+    out = np.empty_like(x)
+    if len(x) == 0:
+        return out
+    d = 1.0 - alpha
+    if d <= 0:
+        out[:] = x
+        return out
+    prev = x[0] if init is None else init
+    block = max(1, int(300 / -np.log(d)))
+    for s in range(0, len(x), block):
+        seg = x[s:s + block]
+        j = np.arange(len(seg))
+        out[s:s + len(seg)] = d ** (j + 1) * prev + alpha * d ** j * np.cumsum(seg * d ** -j)
+        prev = out[s + len(seg) - 1]
+    return out
+
+
+def _rolling_sum(x, n):
+    # 窗口 [t-n+1, t] 的和，前 n-1 个为 NaN。逐窗口求和而不是全局 cumsum 相减，
+    # 否则成交量全为 0 的窗口会得到 1e-12 量级的残差而不是 0
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1:] = sliding_window_view(x, n).sum(axis=1)
+    return out
+
+
+def _rolling_moments(x, n):
+    # 窗口均值与方差（ddof=0）；逐窗口两遍法，避免 E[x^2] - E[x]^2 的相消误差
+    mean, var = np.full(len(x), np.nan), np.full(len(x), np.nan)
+    if len(x) >= n:
+        view = sliding_window_view(x, n)
+        mean[n - 1:] = view.mean(axis=1)
+        var[n - 1:] = view.var(axis=1)
+    return mean, var
+
+
+def _volume_stats(v, mean, var, nonzero):
+    # 窗口内成交量全为 0（按精确计数判断）或几乎不变时 z 分数记为 0
+    std = np.sqrt(np.maximum(var, 0))
+    ok = (nonzero > 0) & (std > 1e-6 * np.abs(mean))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ok, (v - mean) / std, 0.0)
+
+
+def _true_range(high, low, close):
+    prev = np.concatenate([close[:1], close[:-1]])
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+    tr[0] = high[0] - low[0]
+    return tr
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return rsi
+
+
+def _as_arrays(data):
+    # DataFrame / dict -> 各原始列的 float 数组；缺的列用 close 补（例如只有 close 的模拟数据）
+    close = np.asarray(data['close'], dtype=float)
+    cols = {}
+    for col in RAW_COLUMNS:
+        try:
+            cols[col] = np.asarray(data[col], dtype=float)
+        except (KeyError, IndexError):
+            cols[col] = np.zeros_like(close) if col == 'volume' else close
+    return cols
+
+
+class FeatureEngine:
+    def __init__(self, names=DEFAULT_FEATURES):
+        self.names = tuple(names)
+        self.parsed = [parse_feature(name) for name in self.names]
+        periods = [n for _, n in self.parsed]
+        # warmup：从这一行起所有特征都有定义；ring：增量更新需要保留的历史长度
+        self.warmup = max(periods, default=0)
+        self.ring = self.warmup + 1
+
+    def compute(self, data):
+        # 一次遍历整段数据，返回 (n, 特征数)；前 warmup 行里滚动类特征为 NaN
+        cols = _as_arrays(data)
+        c, v = cols['close'], cols['volume']
+        n_rows = len(c)
+        shared = {}
+
+        def ret1():
+            if 'ret1' not in shared:
+                r = np.full(n_rows, np.nan)
+                r[1:] = c[1:] / c[:-1] - 1
+                shared['ret1'] = r
+            return shared['ret1']
+
+        out = np.empty((n_rows, len(self.names)))
+        for i, (kind, n) in enumerate(self.parsed):
+            if n == 0:
+                out[:, i] = cols[kind]
+            elif kind == 'ret':
+                out[:, i] = np.nan
+                out[n:, i] = c[n:] / c[:-n] - 1
+            elif kind == 'sma':
+                out[:, i] = _rolling_sum(c, n) / n
+            elif kind == 'std':
+                out[:, i] = np.sqrt(_rolling_moments(np.nan_to_num(ret1()), n)[1])
+                out[:n, i] = np.nan
+            elif kind == 'ema':
+                out[:, i] = ewm(c, 2 / (n + 1))
+            elif kind == 'rsi':
+                delta = np.diff(c, prepend=c[:1])
+                out[:, i] = _rsi(ewm(np.maximum(delta, 0), 1 / n), ewm(np.maximum(-delta, 0), 1 / n))
+                out[:n, i] = np.nan
+            elif kind == 'atr':
+                out[:, i] = ewm(_true_range(cols['high'], cols['low'], c), 1 / n)
+                out[:n, i] = np.nan
+            elif kind == 'vwap':
+                typical = (cols['high'] + cols['low'] + c) / 3
+                pv, vs = _rolling_sum(typical * v, n), _rolling_sum(v, n)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    out[:, i] = np.where(_rolling_sum(v != 0, n) > 0, pv / vs, c)
+                out[:n - 1, i] = np.nan
+            elif kind == 'volz':
+                out[:, i] = _volume_stats(v, *_rolling_moments(v, n), _rolling_sum(v != 0, n))
+                out[:n - 1, i] = np.nan
+        return out
+
+    def state(self, history, n_paths=1):
+        return FeatureState(self, history, n_paths)
+
+
+class FeatureState:
+    # 增量版本：各条路径共用同一套历史起点，每次 update 传入 (路径数,) 的新 K 线，
+    # 返回 (路径数, 特征数) 的特征行，数值与 FeatureEngine.compute 在同一位置的结果一致
+
+    def __init__(self, engine, history, n_paths=1):
+        self.engine = engine
+        cols = _as_arrays(history)
+        n_hist = len(cols['close'])
+        if n_hist < engine.ring:
+            raise ValueError(f"历史数据只有 {n_hist} 行，增量计算至少需要 {engine.ring} 行")
+        self.n_paths = n_paths
+        L = engine.ring
+        self._pos = 0  # 下一次写入的位置；最近一根在 pos-1
+        self._updates = 0
+
+        def tile(x):
+            return np.repeat(np.asarray(x, dtype=float)[None], n_paths, axis=0)
+
+        c, v = cols['close'], cols['volume']
+        r = np.zeros(n_hist)
+        r[1:] = c[1:] / c[:-1] - 1
+        typical = (cols['high'] + cols['low'] + c) / 3
+        self._rings = {'close': tile(c[-L:]), 'ret1': tile(r[-L:]), 'volume': tile(v[-L:]),
+                       'pv': tile((typical * v)[-L:]), 'nonzero': tile((v != 0)[-L:])}
+        self._sums = {}
+        self._moments = {}
+        self._ewm = {}
+        self._resum()
+
+        for kind, n in engine.parsed:
+            if kind == 'ema':
+                self._ewm[('ema', n)] = tile(ewm(c, 2 / (n + 1))[-1:])[:, 0]
+            elif kind == 'rsi':
+                delta = np.diff(c, prepend=c[:1])
+                self._ewm[('gain', n)] = tile(ewm(np.maximum(delta, 0), 1 / n)[-1:])[:, 0]
+                self._ewm[('loss', n)] = tile(ewm(np.maximum(-delta, 0), 1 / n)[-1:])[:, 0]
+            elif kind == 'atr':
+                self._ewm[('atr', n)] = tile(ewm(_true_range(cols['high'], cols['low'], c), 1 / n)[-1:])[:, 0]
+
+    def _recent(self, key, n):
+        # 环形缓冲区里最近 n 个值，(路径数, n)
+        L = self.engine.ring
+        idx = (self._pos - n + np.arange(n)) % L
+        return self._rings[key][:, idx]
+
+    def _resum(self):
+        for kind, n in self.engine.parsed:
+            if kind == 'sma':
+                self._sums[('close', n)] = self._recent('close', n).sum(axis=1)
+            elif kind == 'std':
+                r = self._recent('ret1', n)
+                self._moments[('ret1', n)] = [r.mean(axis=1), r.var(axis=1) * n]
+            elif kind in ('vwap', 'volz'):
+                vol = self._recent('volume', n)
+                self._sums[('volume', n)] = vol.sum(axis=1)
+                self._sums[('pv', n)] = self._recent('pv', n).sum(axis=1)
+                self._sums[('nonzero', n)] = self._recent('nonzero', n).sum(axis=1)
+                self._moments[('volume', n)] = [vol.mean(axis=1), vol.var(axis=1) * n]
+
+    @property
+    def last_close(self):
+        return self._rings['close'][:, (self._pos - 1) % self.engine.ring]
+
+    @property
+    def last_volume(self):
+        return self._rings['volume'][:, (self._pos - 1) % self.engine.ring]
+
+    def update(self, open_, high, low, close, volume):
+        L = self.engine.ring
+        shape = (self.n_paths,)
+        o, h, lo, c, v = (np.broadcast_to(np.asarray(x, dtype=float), shape) for x in (open_, high, low, close,
+                                                                                           volume))
+        prev_close = self.last_close
+        r1 = c / prev_close - 1
+        pv = (h + lo + c) / 3 * v
+        new = {'close': c, 'ret1': r1, 'volume': v, 'pv': pv, 'nonzero': (v != 0).astype(float)}
+
+        # 先更新滚动量：滚动和加上新值、减去滑出窗口的值（位置 t-n）；
+        # 均值 / 二阶中心矩用滑动窗口版 Welford 更新，数值上等价于逐窗口两遍法
+        for (key, n), total in self._sums.items():
+            self._sums[(key, n)] = total + new[key] - self._rings[key][:, (self._pos - n) % L]
+        stale = []
+        for (key, n), (mean, m2) in self._moments.items():
+            x, y = new[key], self._rings[key][:, (self._pos - n) % L]
+            new_mean = mean + (x - y) / n
+            m2 = m2 + (x - y) * (x - new_mean + y - mean)
+            self._moments[(key, n)] = [new_mean, m2]
+            # 滑出的值远大于窗口剩余的波动时（例如放量后连续几分钟零成交），残留的舍入误差会盖过真实方差，
+            # 这时直接用环形缓冲区重算这一个窗口
+            if np.any(m2 < 1e-6 * y * y):
+                stale.append((key, n))
+        for key, value in new.items():
+            self._rings[key][:, self._pos] = value
+        self._pos = (self._pos + 1) % L
+        for key, n in stale:
+            window = self._recent(key, n)
+            self._moments[(key, n)] = [window.mean(axis=1), window.var(axis=1) * n]
+        self._updates += 1
+        if self._updates % RESUM_EVERY == 0:
+            self._resum()
+
+        row = np.empty((self.n_paths, len(self.engine.names)))
+        raw = {'open': o, 'high': h, 'low': lo, 'close': c, 'volume': v}
+        for i, (kind, n) in enumerate(self.engine.parsed):
+            if n == 0:
+                row[:, i] = raw[kind]
+            elif kind == 'ret':
+                row[:, i] = c / self._rings['close'][:, (self._pos - 1 - n) % L] - 1
+            elif kind == 'sma':
+                row[:, i] = self._sums[('close', n)] / n
+            elif kind == 'std':
+                row[:, i] = np.sqrt(np.maximum(self._moments[('ret1', n)][1] / n, 0))
+            elif kind == 'ema':
+                a = 2 / (n + 1)
+                self._ewm[('ema', n)] = (1 - a) * self._ewm[('ema', n)] + a * c
+                row[:, i] = self._ewm[('ema', n)]
+            elif kind == 'rsi':
+                delta = c - prev_close
+                for key, x in (('gain', np.maximum(delta, 0)), ('loss', np.maximum(-delta, 0))):
+                    self._ewm[(key, n)] = (1 - 1 / n) * self._ewm[(key, n)] + x / n
+                row[:, i] = _rsi(self._ewm[('gain', n)], self._ewm[('loss', n)])
+            elif kind == 'atr':
+                tr = np.maximum(h - lo, np.maximum(np.abs(h - prev_close), np.abs(lo - prev_close)))
+                self._ewm[('atr', n)] = (1 - 1 / n) * self._ewm[('atr', n)] + tr / n
+                row[:, i] = self._ewm[('atr', n)]
+            elif kind == 'vwap':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    row[:, i] = np.where(self._sums[('nonzero', n)] > 0,
+                                         self._sums[('pv', n)] / self._sums[('volume', n)], c)
+            elif kind == 'volz':
+                mean, m2 = self._moments[('volume', n)]
+                row[:, i] = _volume_stats(v, mean, m2 / n, self._sums[('nonzero', n)])
+        return row
+
+    def advance(self, close, volume=None):
+        # 递归预测用：下一根 K 线的 open/high/low 都假设等于预测的 close，成交量沿用上一根
+        volume = self.last_volume if volume is None else volume
+        return self.update(close, close, close, close, volume)
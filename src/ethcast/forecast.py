@@ -0,0 +1,144 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from ethcast import trace
+
+
+class WindowRing:
+    # 多条路径共用的环形窗口：缓冲区长度为 2w，每行同时写入 s 和 s+w 两个位置，
+    # 这样最近 w 行永远是一段连续切片，不需要 list.append + np.array 重新拼接
+
+    def __init__(self, windows):
+        windows = np.asarray(windows, dtype=float)
+        if windows.ndim == 2:  # (路径数, w) 的单列窗口
+            windows = windows[:, :, None]
+        if windows.ndim != 3:
+            raise ValueError("windows 的形状应为 (路径数, w) 或 (路径数, w, 特征数)")
+        n_paths, window_size, n_features = windows.shape
+        self.window_size = window_size
+        self._buf = np.empty((n_paths, 2 * window_size, n_features))
+        self._buf[:, :window_size] = windows
+        self._buf[:, window_size:] = windows
+        self._start = 0
+
+    @property
+    def n_paths(self):
+        return self._buf.shape[0]
+
+    @property
+    def n_features(self):
+        return self._buf.shape[2]
+
+    def push(self, rows):
+        # rows: (路径数, 特征数)，覆盖最旧的一行
+        s, w = self._start, self.window_size
+        self._buf[:, s] = rows
+        self._buf[:, s + w] = rows
+        self._start = (s + 1) % w
+
+    def window(self):
+        return self._buf[:, self._start:self._start + self.window_size]
+
+    def last_row(self):
+        return self._buf[:, self._start + self.window_size - 1]
+
+    def features(self):
+        # (路径数, w * 特征数)，排列与原脚本 np.array(window).flatten() 一致
+        return self.window().reshape(self.n_paths, -1)
+
+
+@dataclass
+class ForecastStats:
+    steps: int = 0
+    paths: int = 0
+    predict_calls: int = 0
+    seconds: float = 0.0
+
+    @property
+    def naive_calls(self):
+        # 原脚本写法：每条路径每一步单独 predict 一次
+        return self.steps * self.paths
+
+    @property
+    def calls_saved(self):
+        return self.naive_calls - self.predict_calls
+
+    @property
+    def steps_per_sec(self):
+        # 按“路径 × 步数”计的吞吐
+        return self.naive_calls / self.seconds if self.seconds else float('inf')
+
+    def report(self):
+        return (f"{self.paths} 条路径 × {self.steps} 步 | 用时 {self.seconds:.3f}s | "
+                f"{self.steps_per_sec:,.0f} 步/秒 | predict 调用 {self.predict_calls} 次 "
+                f"(逐条逐步需要 {self.naive_calls} 次，节省 {self.calls_saved} 次)")
+
+
+def next_rows(pred, last_row, carry_cols=(), target_col=0):
+    # 构造下一分钟的特征行：所有列都假设等于预测的 close（与原脚本一致），
+    # carry_cols 中的列沿用上一行的值（例如 catboost 脚本里的 volume）；目标列（close）总是写入预测值
+    rows = np.repeat(pred[:, None], last_row.shape[1], axis=1)
+    for col in carry_cols:
+        if col != target_col:
+            rows[:, col] = last_row[:, col]
+    return rows
+
+
+def recursive_forecast(predict, windows, steps, carry_cols=(), stats=None, make_rows=None, target_col=0):
+    # 批量递归预测：每一步对所有路径只调用一次 predict
+    # windows: (路径数, w) 或 (路径数, w, 特征数)；返回 (路径数, steps)
+    # make_rows(pred, last_row) 用来构造下一行特征（例如技术指标的增量更新），默认用 next_rows
+    ring = WindowRing(windows)
+    make_rows = make_rows or (lambda pred, last_row: next_rows(pred, last_row, carry_cols, target_col))
+    preds = np.empty((ring.n_paths, steps))
+    t0 = time.perf_counter()
+    if trace.enabled():
+        # 开启 trace 时每一步拆成 predict / make_rows 两个阶段（未开启时走下面没有任何额外开销的循环）
+        with trace.span('recursive_forecast', steps=steps, paths=ring.n_paths):
+            for step in range(steps):
+                with trace.span('predict'):
+                    pred = np.asarray(predict(ring.features()), dtype=float).reshape(-1)
+                preds[:, step] = pred
+                with trace.span('make_rows'):
+                    ring.push(make_rows(pred, ring.last_row()))
+    else:
+        for step in range(steps):
+            pred = np.asarray(predict(ring.features()), dtype=float).reshape(-1)
+            preds[:, step] = pred
+            ring.push(make_rows(pred, ring.last_row()))
+    if stats is not None:
+        stats.steps = steps
+        stats.paths += ring.n_paths
+        stats.predict_calls += steps
+        stats.seconds += time.perf_counter() - t0
+    return preds
+
+
+def forecast_path(predict, window, steps, carry_cols=(), stats=None, make_rows=None, target_col=0):
+    # 单条路径的便捷写法：window 为 (w,) 或 (w, 特征数)，返回 (steps,)
+    return recursive_forecast(predict, np.asarray(window)[None], steps, carry_cols, stats, make_rows, target_col)[0]
+
+
+def forecast_scenarios(models, windows, steps, carry_cols=()):
+    # 多模型 × 多场景：每个模型每一步对全部场景做一次 (路径数 × w) 的 predict
+    stats = ForecastStats()
+    results = {name: recursive_forecast(model.predict, windows, steps, carry_cols, stats)
+               for name, model in models.items()}
+    return results, stats
+
+
+def windows_ending_at(values, window_size, end_positions):
+    # 取若干预测起点之前的窗口：第 i 个窗口为 values[end - w: end]
+    values = np.asarray(values, dtype=float)
+    return np.stack([values[end - window_size:end] for end in end_positions])
+
+
+def perturb_windows(window, n_paths, scale=0.001, seed=42):
+    # 在同一个起始窗口上加乘性高斯噪声，生成 n_paths 个扰动场景（第 0 条保持原样）
+    window = np.asarray(window, dtype=float)
+    rng = np.random.default_rng(seed)
+    noise = 1 + scale * rng.standard_normal((n_paths,) + window.shape)
+    noise[0] = 1
+    return window[None] * noise
@@ -0,0 +1,58 @@
+# 四种模型的统一构造入口
+
+# 各库控制线程数的参数名（XGBoost 的 nthread 在 sklearn 接口里叫 n_jobs）
+THREAD_PARAMS = {
+    'Random Forest': 'n_jobs',
+    'XGBoost': 'n_jobs',
+    'LightGBM': 'n_jobs',
+    'CatBoost': 'thread_count',
+}
+
+
+def build_model(name, params, n_threads=None):
+    # 按名字构造模型，只导入用到的库
+    params = dict(params)
+    if n_threads is not None:
+        params[THREAD_PARAMS[name]] = n_threads
+    if name == 'Random Forest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**params)
+    if name == 'XGBoost':
+        from xgboost import XGBRegressor
+        return XGBRegressor(**params)
+    if name == 'LightGBM':
+        from lightgbm import LGBMRegressor
+        return LGBMRegressor(**params)
+    if name == 'CatBoost':
+        from catboost import CatBoostRegressor
+        return CatBoostRegressor(**params)
+    raise ValueError(f"未知模型: {name}")
+
+
+# 命令行里的简写
+MODEL_ALIASES = {
+    'rf': 'Random Forest',
+    'xgb': 'XGBoost',
+    'lgbm': 'LightGBM',
+    'cat': 'CatBoost',
+}
+
+# 默认参数取自各单模型脚本
+DEFAULT_PARAMS = {
+    'Random Forest': {'n_estimators': 100, 'random_state': 42},
+    'XGBoost': {'n_estimators': 300, 'learning_rate': 0.05, 'max_depth': 6, 'objective': 'reg:squarederror'},
+    'LightGBM': {'n_estimators': 300, 'learning_rate': 0.03, 'num_leaves': 20, 'min_child_samples': 5,
+                 'verbose': -1},
+    'CatBoost': {'iterations': 600, 'learning_rate': 0.05, 'depth': 6, 'l2_leaf_reg': 3, 'loss_function': 'RMSE',
+                 'random_seed': 42, 'verbose': 0},
+}
+
+
+def resolve_name(name):
+    # 'xgb' / 'XGBoost' 都可以
+    if name in THREAD_PARAMS:
+        return name
+    try:
+        return MODEL_ALIASES[name.lower()]
+    except KeyError:
+        raise ValueError(f"未知模型: {name}（可选: {', '.join(MODEL_ALIASES)}）") from None
@@ -0,0 +1,210 @@
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from ethcast.data import load_ohlcv
+from ethcast.features import FeatureEngine, has_indicators
+from ethcast.forecast import forecast_path
+from ethcast.models import DEFAULT_PARAMS, resolve_name
+from ethcast.registry import ModelRegistry
+from ethcast.resample import BASE, load_resolution, parse_resolution
+from ethcast.trace import span
+from ethcast.windows import make_xy, target_index
+
+
+@dataclass
+class ForecastConfig:
+    model: str = 'xgb'
+    window: int = 30
+    features: tuple = ('close', 'open', 'high')
+    start: str = '2019-04-08 05:04:00'
+    steps: int = 30
+    params: dict = field(default_factory=dict)
+    resolution: str = BASE
+
+    def __post_init__(self):
+        # 特征列里必须有 close（预测目标），在解析配置时就报错，而不是训练到一半
+        self.features = tuple(self.features)
+        target_index(self.features)
+
+    @property
+    def target_col(self):
+        return target_index(self.features)
+
+    @property
+    def name(self):
+        return resolve_name(self.model)
+
+    @property
+    def model_params(self):
+        return {**DEFAULT_PARAMS[self.name], **self.params}
+
+    @property
+    def bar(self):
+        return pd.Timedelta(seconds=parse_resolution(self.resolution)[1])
+
+    def label(self):
+        bars = f" x{parse_resolution(self.resolution)[0]}" if parse_resolution(self.resolution)[0] != BASE else ''
+        return f"{self.name} w={self.window} [{','.join(self.features)}] @ {self.start} +{self.steps}{bars}"
+
+
+class Pipeline:
+    # 一次加载数据，在同一进程里的多个配置之间共享训练切片、窗口特征和模型；
+    # 模型同时写入磁盘上的模型缓存，其他子命令 / 下次运行也能直接用
+
+    def __init__(self, data_file='第四周大数据分析作业.xlsx', truth_file=None, use_registry=True):
+        self.data_file = data_file
+        self.truth_file = truth_file
+        self.registry = ModelRegistry.for_data(data_file) if use_registry else None
+        self._df = None
+        self._truth = None
+        self._frames = {}
+        self._truths = {}
+        self._features = {}
+        self._train = {}
+        self._xy = {}
+        self._models = {}
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = load_ohlcv(self.data_file)
+        return self._df
+
+    @property
+    def truth(self):
+        if self._truth is None and self.truth_file:
+            self._truth = load_ohlcv(self.truth_file)
+        return self._truth
+
+    def frame(self, resolution=BASE):
+        # 粗周期 K 线从 .ethcast_cache 里的金字塔读取，不再重新聚合 1 分钟数据
+        name = parse_resolution(resolution)[0]
+        if name == BASE:
+            return self.df
+        if name not in self._frames:
+            self._frames[name] = load_resolution(self.data_file, name)
+        return self._frames[name]
+
+    def truth_frame(self, resolution=BASE):
+        name = parse_resolution(resolution)[0]
+        if name == BASE or not self.truth_file:
+            return self.truth
+        if name not in self._truths:
+            self._truths[name] = load_resolution(self.truth_file, name)
+        return self._truths[name]
+
+    def _train_mask(self, df, start, resolution):
+        # 只用在预测起点那一分钟（含）之前已经走完的 K 线；1 分钟线即 datetime <= start
+        bar = pd.Timedelta(seconds=parse_resolution(resolution)[1])
+        return df['datetime'] + bar <= pd.to_datetime(start) + pd.Timedelta(minutes=1)
+
+    def feature_matrix(self, features, resolution=BASE):
+        # 原始列直接取；含技术指标（'rsi_14' 等）时对整段数据一次算完，
+        # 指标只依赖当前及之前的 K 线，先算后截断不会泄漏未来数据
+        key = (tuple(features), parse_resolution(resolution)[0])
+        if key not in self._features:
+            df = self.frame(resolution)
+            if has_indicators(features):
+                self._features[key] = FeatureEngine(features).compute(df)
+            else:
+                self._features[key] = df[list(features)].to_numpy(dtype=float)
+        return self._features[key]
+
+    def train_values(self, start, features, resolution=BASE):
+        # 预测起点（含）之前的特征矩阵；技术指标的预热行（前 warmup 行）不参与训练
+        key = (str(start), tuple(features), parse_resolution(resolution)[0])
+        if key not in self._train:
+            end = int(self._train_mask(self.frame(resolution), start, resolution).sum())
+            begin = FeatureEngine(features).warmup if has_indicators(features) else 0
+            self._train[key] = np.ascontiguousarray(self.feature_matrix(features, resolution)[begin:end])
+        return self._train[key]
+
+    def xy(self, start, features, window, resolution=BASE):
+        key = (str(start), tuple(features), window, parse_resolution(resolution)[0])
+        if key not in self._xy:
+            values = self.train_values(start, features, resolution)
+            with span('prepare_data', window=window):
+                self._xy[key] = make_xy(values if len(features) > 1 else values[:, 0], window,
+                                        target_col=target_index(features))
+        return self._xy[key]
+
+    def model(self, config):
+        resolution = parse_resolution(config.resolution)[0]
+        key = (config.name, repr(sorted(config.model_params.items())), str(config.start),
+               tuple(config.features), config.window, resolution)
+        if key not in self._models:
+            if self.registry is not None:
+                # 1 分钟线、close 在第一列时沿用原来的缓存键，已保存的模型继续有效；
+                # close 不在第一列时以前误用第一列做目标训练，键里加上目标列，旧模型不再命中
+                extra = {} if resolution == BASE else {'resolution': resolution}
+                if config.target_col != 0:
+                    extra['target'] = 'close'
+                extra = {'extra': extra} if extra else {}
+                model = self.registry.get_or_fit(
+                    config.name, config.model_params,
+                    lambda: self.xy(config.start, config.features, config.window, resolution),
+                    data_file=self.data_file, split_time=pd.to_datetime(config.start),
+                    feature_cols=list(config.features), window_size=config.window, **extra)
+            else:
+                from ethcast.models import build_model
+                model = build_model(config.name, config.model_params)
+                X, y = self.xy(config.start, config.features, config.window, resolution)
+                with span('fit', model=config.name, rows=len(X)):
+                    model.fit(X, y)
+            self._models[key] = model
+        return self._models[key]
+
+    def forecast(self, config, model=None):
+        with span(f'forecast {config.name}', label=config.label()):
+            return self._forecast(config, model)
+
+    def _forecast(self, config, model=None):
+        # model 可以传入外部构造好的模型（例如集成模型），只要有 predict(X)
+        t0 = time.perf_counter()
+        model = model if model is not None else self.model(config)
+        fit_sec = time.perf_counter() - t0
+
+        values = self.train_values(config.start, config.features, config.resolution)
+        window = values[-config.window:] if len(config.features) > 1 else values[-config.window:, 0]
+        # 递归时 volume 沿用上一分钟，其余特征假设等于预测的 close（与 catboost 脚本一致）；
+        # 技术指标用 FeatureState 按预测出的 K 线逐根增量更新
+        carry = tuple(i for i, c in enumerate(config.features) if c == 'volume')
+        target = config.target_col
+        df = self.frame(config.resolution)
+        mask = self._train_mask(df, config.start, config.resolution)
+        make_rows = None
+        if has_indicators(config.features):
+            state = FeatureEngine(config.features).state(df.loc[mask])
+            make_rows = lambda pred, last_row: state.advance(pred)  # noqa: E731
+        t0 = time.perf_counter()
+        preds = forecast_path(model.predict, window, config.steps, carry_cols=carry, make_rows=make_rows,
+                              target_col=target)
+        forecast_sec = time.perf_counter() - t0
+
+        last_time = df.loc[mask, 'datetime'].iloc[-1]
+        times = pd.date_range(last_time + config.bar, periods=config.steps, freq=config.bar)
+        return {
+            'config': config,
+            'times': times,
+            'preds': preds,
+            'last_close': float(values[-1, target]),
+            'actual': self.actual_for(times, config.resolution),
+            'fit_sec': fit_sec,
+            'forecast_sec': forecast_sec,
+        }
+
+    def actual_for(self, times, resolution=BASE):
+        # 有真实走势文件（或训练文件本身覆盖了预测区间）时，取出对应 K 线的实际收盘价
+        for df in (self.truth_frame(resolution), self.frame(resolution)):
+            if df is None:
+                continue
+            actual = df.set_index('datetime')['close'].reindex(times)
+            if actual.notna().all():
+                return actual.to_numpy()
+        return None
+
+    def run(self, configs):
+        return [self.forecast(config) for config in configs]
@@ -0,0 +1,166 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ethcast.trace import absorb, drain_child, span
+
+# 每条曲线最多画的点数：15 英寸宽、300dpi 时约 4500 像素，再多也看不出区别
+DEFAULT_MAX_POINTS = 4000
+
+
+def is_headless():
+    # ETHCAST_HEADLESS=1、MPLBACKEND=Agg 或 Linux 下没有显示器时不弹窗口，只写文件
+    if os.environ.get('ETHCAST_HEADLESS', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if os.environ.get('MPLBACKEND', '').lower() == 'agg':
+        return True
+    return sys.platform.startswith('linux') and not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY')
+
+
+def use_headless():
+    # 切换到非交互后端；之后 plt.show() 不再阻塞
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+# 脚本在创建任何图之前导入本模块，无界面时提前切到 Agg。
+# matplotlib 还没导入时只设环境变量，等第一次画图才真正加载（约 0.5s）
+if is_headless():
+    if 'matplotlib' in sys.modules:
+        use_headless()
+    else:
+        os.environ['MPLBACKEND'] = 'Agg'
+
+
+def setup_pyplot(fonts=('Arial Unicode MS',)):
+    # 画图时才导入 pyplot 并配置中文字体，只跑预测 / 不出图时不付这部分启动开销
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.sans-serif'] = list(fonts)
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def minmax_indices(y, n_out):
+    # 每个桶保留最小值和最大值（按原顺序），保证尖峰不会被抽样抹掉
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(1, (n_out - 2) // 2)
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+    idx = [0]
+    for s, e in zip(starts, ends):
+        if e <= s:
+            continue
+        seg = y[s:e]
+        lo, hi = s + int(np.argmin(seg)), s + int(np.argmax(seg))
+        idx.extend(sorted({lo, hi}))
+    idx.append(n - 1)
+    return np.unique(idx)
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets：每个桶挑与前一选中点、后一桶均值围成三角形面积最大的点
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = edges[i], max(edges[i + 1], edges[i] + 1)
+        ns, ne = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[ns:ne].mean() if ne > ns else x[-1]
+        avg_y = y[ns:ne].mean() if ne > ns else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (avg_y - y[a]))
+        a = s + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def downsample(x, y, n_out=DEFAULT_MAX_POINTS, method='lttb'):
+    # 返回抽样后的 (x, y)；点数不超过 n_out 时原样返回
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= n_out:
+        return x, y
+    idx = lttb_indices(x, y, n_out) if method == 'lttb' else minmax_indices(y, n_out)
+    return x[idx], y[idx]
+
+
+def finish_figure(path=None, dpi=150, always_save=False, fig=None):
+    # 交互环境下照常 plt.show()；无界面模式下把图写入 path 并关闭，不阻塞批量运行
+    import matplotlib.pyplot as plt
+    fig = fig or plt.gcf()
+    headless = is_headless()
+    if path and (always_save or headless):
+        with span('savefig', path=path, dpi=dpi):
+            fig.savefig(path, dpi=dpi)
+        if headless:
+            print(f"🖼️ 图表已保存: {path}")
+    if headless:
+        plt.close(fig)
+    else:
+        plt.show()
+
+
+def render_chart(spec):
+    # spec: {'path', 'title', 'series': [{'x', 'y', 'label', ...plot 参数}], 'xlabel', 'ylabel',
+    #        'axvline', 'figsize', 'dpi', 'max_points', 'method'}
+    use_headless()
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.sans-serif'] = spec.get('fonts', ['Arial Unicode MS', 'SimHei', 'DejaVu Sans'])
+    plt.rcParams['axes.unicode_minus'] = False
+
+    fig, ax = plt.subplots(figsize=spec.get('figsize', (15, 7)))
+    max_points = spec.get('max_points', DEFAULT_MAX_POINTS)
+    for series in spec['series']:
+        series = dict(series)
+        x, y = downsample(series.pop('x'), series.pop('y'), max_points, spec.get('method', 'lttb'))
+        ax.plot(x, y, **series)
+    if spec.get('axvline') is not None:
+        ax.axvline(x=spec['axvline'], color='red', linestyle='--', alpha=0.6)
+    ax.set_title(spec.get('title', ''), fontsize=14)
+    ax.set_xlabel(spec.get('xlabel', '时间'))
+    ax.set_ylabel(spec.get('ylabel', '价格 (USD)'))
+    ax.legend(loc='best')
+    ax.grid(True, alpha=0.3)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    with span('savefig', path=spec['path'], dpi=spec.get('dpi', 150)):
+        fig.savefig(spec['path'], dpi=spec.get('dpi', 150))
+    plt.close(fig)
+    return spec['path']
+
+
+def render_charts(specs, workers=None):
+    # 多张图在进程池里并行渲染，返回写出的文件路径
+    specs = list(specs)
+    if not specs:
+        return []
+    workers = workers or min(len(specs), os.cpu_count() or 1)
+    if workers <= 1:
+        return [render_chart(spec) for spec in specs]
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, events in pool.map(_render_chart_worker, specs):
+            absorb(events)
+            paths.append(path)
+    return paths
+
+
+def _render_chart_worker(spec):
+    return render_chart(spec), drain_child()
@@ -0,0 +1,341 @@
+import atexit
+import glob
+import json
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from multiprocessing import util as mp_util
+
+from ethcast import trace
+
+# --profile cpu / --profile mem：不改脚本就能看到时间花在哪、内存分配在哪。
+# cpu：后台线程每隔 interval 用 sys._current_frames() 采样所有线程的调用栈，按折叠格式计数，
+#      输出 “根;...;叶 次数” 的 .folded 文件，可直接交给 flamegraph.pl 或拖进 speedscope.app；
+# mem：tracemalloc 在每个 trace 阶段（load_ohlcv / prepare_data / fit / forecast / savefig …）前后各拍一次快照，
+#      记录阶段内的净增内存、峰值和最主要的分配位置。
+# 进程池的工作进程同样采样，退出时各写一个分片文件，主进程退出时合并
+
+MODES = ('cpu', 'mem')
+DEFAULT_OUTPUT = {'cpu': 'profile_cpu.folded', 'mem': 'profile_mem.txt'}
+DEFAULT_INTERVAL = 0.005
+# 每一步都会进入的细粒度阶段不拍快照，否则快照本身比阶段还慢
+FINE_SPANS = ('predict', 'make_rows')
+TOP_SITES = 10
+# 栈顶是这些函数时线程在等锁 / 等 I/O（例如主线程等进程池的结果），计为空闲，不写进折叠栈
+IDLE_FRAMES = {('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'), ('selectors.py', 'select'),
+               ('connection.py', '_recv'), ('connection.py', 'wait'), ('popen_fork.py', 'poll'),
+               ('queues.py', 'get'), ('queue.py', 'get'), ('synchronize.py', '__enter__'),
+               ('base_events.py', '_run_once')}
+
+_STDLIB = os.path.dirname(os.__file__) + os.sep
+# 内存报告里不列出的分配位置（采样本身、导入机制）
+_SKIP_FILES = {tracemalloc.__file__, __file__, trace.__file__, '<unknown>'}
+
+_profiler = None
+_part_written = False
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    # 纯 Python 的统计采样：采样线程要拿到 GIL 才能采，长时间持有 GIL 的 C 扩展调用会被记在调用它的那一行上
+
+    def __init__(self, interval=DEFAULT_INTERVAL, root='main'):
+        self.interval = interval
+        self.root = root
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ethcast-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    self.idle += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(f"{self.root}:{names.get(tid, tid)}")
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top(self, n=15):
+        # (函数, 自身采样数, 包含子调用的采样数)，按自身排序
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames[1:]):
+                total[frame] += count
+        return [(frame, count, total[frame]) for frame, count in own.most_common(n)]
+
+
+def _site(stat):
+    # 分配位置写短一点：第三方库从 site-packages 之后开始，标准库从 lib/pythonX.Y 之后开始，项目文件用相对路径
+    frame = stat.traceback[0]
+    path = frame.filename
+    if 'site-packages' in path:
+        path = path.rpartition('site-packages' + os.sep)[2]
+    elif path.startswith(_STDLIB):
+        path = os.path.relpath(path, _STDLIB)
+    elif os.path.isabs(path):
+        rel = os.path.relpath(path)
+        path = rel if not rel.startswith('..') else os.path.basename(path)
+    return f"{path}:{frame.lineno}"
+
+
+def _keep(stat):
+    # 去掉采样本身和导入机制的分配；在统计结果上过滤，比 Snapshot.filter_traces 逐条过滤快得多
+    path = stat.traceback[0].filename
+    return path not in _SKIP_FILES and not path.startswith('<frozen importlib')
+
+
+class MemoryProfiler:
+    # 每个阶段：进入时拍快照并重置峰值，退出时与进入时的快照比较；嵌套阶段的峰值向外层传递
+
+    def __init__(self, nframes=1, top=TOP_SITES):
+        self.nframes = nframes
+        self.top = top
+        self.stages = []
+        # reset_peak 之后 tracemalloc 只给最近一段的峰值，整个进程的峰值自己记
+        self.peak = 0
+        self._open = {}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+        tracer = trace._tracer or trace.enable()
+        tracer.listeners.append(self.on_span)
+        return self
+
+    def stop(self):
+        if trace._tracer is not None and self.on_span in trace._tracer.listeners:
+            trace._tracer.listeners.remove(self.on_span)
+
+    def on_span(self, event, span):
+        if span.name in FINE_SPANS:
+            return
+        if event == 'enter':
+            current, peak = tracemalloc.get_traced_memory()
+            self._carry_peak(peak)
+            tracemalloc.reset_peak()
+            self._open[id(span)] = (tracemalloc.take_snapshot(), current, [current])
+            return
+        opened = self._open.pop(id(span), None)
+        if opened is None:
+            return
+        before, start_bytes, carried = opened
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, carried[0])
+        diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+        sites = [{'site': _site(stat), 'size_kb': round(stat.size_diff / 1024, 1), 'count': stat.count_diff}
+                 for stat in diff if stat.size_diff > 0 and _keep(stat)][:self.top]
+        self.stages.append({'stage': span.path, 'pid': os.getpid(), 'start_mb': start_bytes / 2**20,
+                            'net_mb': (current - start_bytes) / 2**20, 'peak_mb': peak / 2**20,
+                            'peak_over_start_mb': (peak - start_bytes) / 2**20, 'sites': sites})
+        self._carry_peak(peak)
+
+    def _carry_peak(self, peak):
+        # 内层阶段会 reset_peak，先把到目前为止的峰值记到外层阶段上
+        self.peak = max(self.peak, peak)
+        for _, _, carried in self._open.values():
+            carried[0] = max(carried[0], peak)
+
+    def final_sites(self, n=15):
+        stats = [stat for stat in tracemalloc.take_snapshot().statistics('lineno') if _keep(stat)][:n]
+        return [{'site': _site(stat), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count} for stat in stats]
+
+
+def _is_owner():
+    return os.environ.get('ETHCAST_PROFILE_OWNER') == str(os.getpid())
+
+
+def _part_paths(path):
+    return sorted(glob.glob(f"{glob.escape(path)}.part.*"))
+
+
+def start(mode, path=None, interval=DEFAULT_INTERVAL):
+    # 主进程开启；通过环境变量让 spawn 出来的工作进程也开启，fork 出来的由 register_at_fork 接上
+    global _profiler
+    if mode not in MODES:
+        raise ValueError(f"未知的 profile 模式: {mode}（可选: {', '.join(MODES)}）")
+    path = path or DEFAULT_OUTPUT[mode]
+    for stale in _part_paths(path):
+        os.remove(stale)
+    os.environ.update(ETHCAST_PROFILE=mode, ETHCAST_PROFILE_PATH=os.path.abspath(path),
+                      ETHCAST_PROFILE_INTERVAL=str(interval), ETHCAST_PROFILE_OWNER=str(os.getpid()))
+    _profiler = _make(mode, interval, 'main')
+    atexit.register(_finish)
+    return _profiler
+
+
+def _make(mode, interval, root):
+    return (SamplingProfiler(interval, root) if mode == 'cpu' else MemoryProfiler()).start()
+
+
+def _start_worker():
+    # 工作进程：丢掉从父进程继承的计数重新开始，进程退出时（multiprocessing 的退出钩子）写分片文件
+    global _profiler, _part_written
+    mode = os.environ['ETHCAST_PROFILE']
+    if isinstance(_profiler, MemoryProfiler):
+        _profiler.stop()
+    _profiler = _make(mode, float(os.environ.get('ETHCAST_PROFILE_INTERVAL', DEFAULT_INTERVAL)), 'worker')
+    _part_written = False
+    _register_part_writer()
+
+
+def _register_part_writer(_=None):
+    # multiprocessing 启动子进程时会清空已登记的退出钩子，所以在它的 after-fork 回调里再登记一次
+    if _profiler is not None and not _is_owner():
+        mp_util.Finalize(None, _write_part, exitpriority=10)
+
+
+def _after_fork():
+    if os.environ.get('ETHCAST_PROFILE') and not _is_owner():
+        _start_worker()
+
+
+def _write_part():
+    global _part_written
+    if _profiler is None or _part_written:
+        return
+    _part_written = True
+    path = f"{os.environ['ETHCAST_PROFILE_PATH']}.part.{os.getpid()}"
+    _profiler.stop()
+    if isinstance(_profiler, SamplingProfiler):
+        payload = {'stacks': dict(_profiler.stacks), 'samples': _profiler.samples, 'idle': _profiler.idle}
+    else:
+        payload = {'stages': _profiler.stages}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+
+def _merge_parts(path):
+    parts = []
+    for part in _part_paths(path):
+        try:
+            with open(part, encoding='utf-8') as f:
+                parts.append(json.load(f))
+        except (OSError, ValueError):
+            pass
+        os.remove(part)
+    return parts
+
+
+def write_folded(profiler, path, parts=()):
+    stacks = Counter(profiler.stacks)
+    for part in parts:
+        stacks.update(part['stacks'])
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+    return stacks
+
+
+def print_cpu_report(profiler, stacks, path, parts=(), n=15, width=110):
+    merged = SamplingProfiler(profiler.interval)
+    merged.stacks = stacks
+    total = max(sum(stacks.values()), 1)
+    idle = profiler.idle + sum(part.get('idle', 0) for part in parts)
+    print("\n" + "=" * width)
+    print(f"🔥 CPU 采样：{total} 个栈样本（间隔 {profiler.interval * 1000:.0f} ms，主进程 + {len(parts)} 个工作进程；"
+          f"另有 {idle} 个空闲样本未计入）")
+    print("-" * width)
+    print(f"{'函数（自身耗时最多）':<80} | {'自身':>7} | {'含子调用':>8}")
+    for frame, own, incl in merged.top(n):
+        print(f"{frame[:80]:<80} | {own / total:>7.1%} | {incl / total:>8.1%}")
+    print("=" * width)
+    print(f"🔥 折叠栈已写入 {path}（flamegraph.pl {path} > flame.svg，或拖进 https://speedscope.app）")
+
+
+def write_mem_report(profiler, path, parts=()):
+    stages = profiler.stages + [s for part in parts for s in part['stages']]
+    current, peak = tracemalloc.get_traced_memory()
+    peak = max(peak, profiler.peak)
+    lines = [f"tracemalloc 峰值 {peak / 2**20:.1f} MB，退出前占用 {current / 2**20:.1f} MB（主进程）", '']
+    for s in stages:
+        who = '主进程' if str(s['pid']) == os.environ.get('ETHCAST_PROFILE_OWNER') else f"工作进程 {s['pid']}"
+        lines.append(f"[{s['stage']}] {who}  净增 {s['net_mb']:+.2f} MB  阶段峰值比开始时多 "
+                     f"{s['peak_over_start_mb']:.2f} MB")
+        for site in s['sites']:
+            lines.append(f"    {site['size_kb']:>10.1f} KB  {site['count']:>+8} 个  {site['site']}")
+    lines += ['', '退出前仍占用内存最多的位置:']
+    lines += [f"    {s['size_kb']:>10.1f} KB  {s['count']:>8} 个  {s['site']}" for s in profiler.final_sites()]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return stages, peak
+
+
+def print_mem_report(stages, peak, path, width=110):
+    print("\n" + "=" * width)
+    print(f"🧠 内存分配：tracemalloc 峰值 {peak / 2**20:.1f} MB（主进程）")
+    print("-" * width)
+    print(f"{'阶段':<56} | {'净增(MB)':>9} | {'峰值增量(MB)':>12} | 主要分配位置")
+    for s in sorted(stages, key=lambda s: -s['peak_over_start_mb'])[:15]:
+        top = s['sites'][0]['site'] if s['sites'] else '-'
+        print(f"{s['stage'][:56]:<56} | {s['net_mb']:>+9.2f} | {s['peak_over_start_mb']:>12.2f} | {top}")
+    print("=" * width)
+    print(f"🧠 完整报告（每个阶段前 {TOP_SITES} 个分配位置）已写入 {path}")
+
+
+def _finish():
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None or not _is_owner():
+        return
+    path = os.environ['ETHCAST_PROFILE_PATH']
+    parts = _merge_parts(path)
+    profiler.stop()
+    if isinstance(profiler, SamplingProfiler):
+        stacks = write_folded(profiler, path, parts)
+        print_cpu_report(profiler, stacks, path, parts)
+    else:
+        stages, peak = write_mem_report(profiler, path, parts)
+        print_mem_report(stages, peak, path)
+
+
+def add_argument(parser):
+    # 入口脚本共用的 --profile 参数
+    parser.add_argument('--profile', choices=MODES, help='cpu：采样调用栈写折叠栈文件；mem：按阶段记录内存分配')
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help=f"输出文件（默认 {DEFAULT_OUTPUT['cpu']} / {DEFAULT_OUTPUT['mem']}）")
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_INTERVAL * 1000,
+                        help='cpu 模式的采样间隔（毫秒）')
+
+
+def setup_from_args(args):
+    if getattr(args, 'profile', None):
+        start(args.profile, args.profile_out, args.profile_interval / 1000)
+
+
+os.register_at_fork(after_in_child=_after_fork)
+mp_util.register_after_fork(_register_part_writer, _register_part_writer)
+
+# spawn 方式启动的工作进程导入本模块时接着采样（主进程由 start() 开启）
+if os.environ.get('ETHCAST_PROFILE') and not _is_owner():
+    _start_worker()
@@ -0,0 +1,255 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，淘汰时不加锁（删除时已容忍文件被别的进程删掉）
+    fcntl = None
+
+from ethcast.data import cache_dir_for, source_digest
+from ethcast.models import THREAD_PARAMS, build_model
+from ethcast.trace import span
+
+# 各库的原生模型文件格式（随机森林没有原生格式，用 sklearn 推荐的 joblib）
+FILE_SUFFIX = {
+    'Random Forest': 'joblib',
+    'XGBoost': 'ubj',
+    'LightGBM': 'txt',
+    'CatBoost': 'cbm',
+}
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def _save_native(name, model, path):
+    if name == 'Random Forest':
+        import joblib
+        joblib.dump(model, path)
+    elif name == 'XGBoost':
+        model.save_model(path)
+    elif name == 'LightGBM':
+        model.booster_.save_model(path)
+    elif name == 'CatBoost':
+        model.save_model(path)
+    else:
+        raise ValueError(f"未知模型: {name}")
+
+
+def _load_native(name, path):
+    # 返回的对象都有 predict(X)；LightGBM 返回的是 Booster
+    if name == 'Random Forest':
+        import joblib
+        return joblib.load(path)
+    if name == 'XGBoost':
+        from xgboost import XGBRegressor
+        model = XGBRegressor()
+        model.load_model(path)
+        return model
+    if name == 'LightGBM':
+        import lightgbm as lgb
+        return lgb.Booster(model_file=path)
+    if name == 'CatBoost':
+        from catboost import CatBoostRegressor
+        return CatBoostRegressor().load_model(path)
+    raise ValueError(f"未知模型: {name}")
+
+
+def _write_json(path, obj):
+    # 先写临时文件再替换，多个进程同时写也不会留下半截文件
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    # 训练好的模型按 (数据文件, 截止时间, 特征列, 窗口大小, 模型参数) 的哈希存放，
+    # 每个模型一个原生格式文件加一个 json 元数据，按最近使用时间淘汰
+
+    def __init__(self, root, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def for_data(cls, data_file, **kwargs):
+        # 默认放在数据缓存目录下的 models/ 里
+        return cls(os.path.join(cache_dir_for(data_file), 'models'), **kwargs)
+
+    @staticmethod
+    def make_key(name, params, data_file, split_time=None, feature_cols=('close',), window_size=None, extra=None):
+        # 线程数不影响模型结果，不参与哈希
+        params = {k: v for k, v in params.items() if k != THREAD_PARAMS.get(name)}
+        parts = {
+            'model': name,
+            'params': params,
+            'data': source_digest(data_file),
+            'split_time': None if split_time is None else str(split_time),
+            'feature_cols': list(feature_cols) if not isinstance(feature_cols, str) else [feature_cols],
+            'window_size': window_size,
+            'extra': extra,
+        }
+        blob = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha1(blob).hexdigest()[:20]
+
+    def _meta_path(self, key):
+        return os.path.join(self.root, key + '.json')
+
+    def _model_path(self, key, name):
+        return os.path.join(self.root, f"{key}.{FILE_SUFFIX[name]}")
+
+    def load(self, key):
+        # 元数据或模型文件不存在 / 读不出来（例如正被别的进程淘汰）都按未命中处理，重新训练即可
+        meta_path = self._meta_path(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            model = _load_native(meta['model'], self._model_path(key, meta['model']))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ 模型缓存 {key} 无法读取，按未命中处理: {type(e).__name__}: {e}")
+            return None
+        meta['last_used'] = time.time()
+        meta['hits'] = meta.get('hits', 0) + 1
+        try:
+            _write_json(meta_path, meta)
+        except OSError:
+            pass  # 只是更新使用时间，写不进去不影响这次命中
+        return model
+
+    def save(self, key, name, model, info=None):
+        model_path = self._model_path(key, name)
+        _save_native(name, model, model_path)
+        try:
+            size = os.path.getsize(model_path)
+        except FileNotFoundError:
+            return  # 刚写完就被并发的淘汰删掉了，这次不入缓存，不影响本次结果
+        now = time.time()
+        _write_json(self._meta_path(key), {
+            'key': key,
+            'model': name,
+            'file': os.path.basename(model_path),
+            'size': size,
+            'created': now,
+            'last_used': now,
+            'hits': 0,
+            'info': info or {},
+        })
+        self.prune(self.max_entries, self.max_bytes, blocking=False)
+
+    def get_or_fit(self, name, params, X, y=None, n_threads=None, verbose=True, **key_parts):
+        # 命中则毫秒级加载，否则训练并存入；X、y 可以是返回 (X, y) 的函数，命中时不必构造窗口
+        key = self.make_key(name, params, **key_parts)
+        t0 = time.perf_counter()
+        with span('registry_load', model=name, key=key):
+            model = self.load(key)
+        if model is not None:
+            if verbose:
+                print(f"📦 {name} 命中模型缓存 {key}（加载 {(time.perf_counter() - t0) * 1000:.1f}ms）")
+            return model
+        if callable(X):
+            with span('prepare_data'):
+                X, y = X()
+        model = build_model(name, params, n_threads)
+        with span('fit', model=name, rows=len(X)):
+            model.fit(X, y)
+        info = {k: (list(v) if isinstance(v, (list, tuple)) else str(v)) for k, v in key_parts.items()}
+        info['params'] = {k: str(v) for k, v in params.items()}
+        self.save(key, name, model, info)
+        if verbose:
+            print(f"💾 {name} 训练完成并存入模型缓存 {key}（{time.perf_counter() - t0:.2f}s）")
+        return model
+
+    def entries(self):
+        out = []
+        for meta_path in glob.glob(os.path.join(self.root, '*.json')):
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    out.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(out, key=lambda m: m['last_used'], reverse=True)
+
+    def remove(self, key):
+        for path in glob.glob(os.path.join(self.root, key + '.*')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # 别的进程已经删了
+
+    def prune(self, max_entries=None, max_bytes=None, older_than_days=None, blocking=True):
+        # 进程池里的多个模型会同时保存、同时淘汰，用锁文件让同一时刻只有一个进程在淘汰；
+        # blocking=False 时（save 之后顺手淘汰）别的进程正在淘汰就直接跳过
+        with open(os.path.join(self.root, '.prune.lock'), 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return []
+            return self._prune(max_entries, max_bytes, older_than_days)
+
+    def _prune(self, max_entries, max_bytes, older_than_days):
+        # LRU 淘汰：先删超过天数未使用的，再从最久未使用的开始删，直到数量和总大小都达标
+        entries = self.entries()
+        removed = []
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 86400
+            for meta in [m for m in entries if m['last_used'] < cutoff]:
+                self.remove(meta['key'])
+                removed.append(meta)
+                entries.remove(meta)
+        total = sum(m['size'] for m in entries)
+        while entries and ((max_entries is not None and len(entries) > max_entries)
+                           or (max_bytes is not None and total > max_bytes)):
+            meta = entries.pop()
+            self.remove(meta['key'])
+            removed.append(meta)
+            total -= meta['size']
+        return removed
+
+
+def _print_entries(entries):
+    print(f"{'键':<20} | {'模型':<13} | {'大小(MB)':>8} | {'命中':>4} | {'最近使用':<16} | 数据/窗口")
+    print("-" * 90)
+    for m in entries:
+        used = time.strftime('%Y-%m-%d %H:%M', time.localtime(m['last_used']))
+        info = m.get('info', {})
+        desc = f"{os.path.basename(info.get('data_file', '?'))} w={info.get('window_size', '?')}"
+        print(f"{m['key']:<20} | {m['model']:<13} | {m['size'] / 1e6:>8.2f} | {m.get('hits', 0):>4} | {used:<16} | {desc}")
+    print("-" * 90)
+    print(f"共 {len(entries)} 个模型，{sum(m['size'] for m in entries) / 1e6:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='查看或清理已保存的模型缓存')
+    parser.add_argument('--root', default=os.path.join('.', '.ethcast_cache', 'models'), help='模型缓存目录')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='列出所有缓存的模型')
+    prune = sub.add_parser('prune', help='按数量、总大小或闲置天数淘汰模型')
+    prune.add_argument('--max-entries', type=int)
+    prune.add_argument('--max-mb', type=float)
+    prune.add_argument('--older-than', type=float, help='删除超过这么多天没用过的模型')
+    prune.add_argument('--all', action='store_true', help='清空全部')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        _print_entries(registry.entries())
+    else:
+        if args.all:
+            removed = registry.prune(max_entries=0)
+        else:
+            max_bytes = None if args.max_mb is None else int(args.max_mb * 1e6)
+            removed = registry.prune(args.max_entries, max_bytes, args.older_than)
+        print(f"🧹 已删除 {len(removed)} 个模型，释放 {sum(m['size'] for m in removed) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from ethcast.data import (COLUMN_TYPES, cache_dir_for, frame_suffix, load_ohlcv, read_frame, source_digest,
+                          write_frame)
+
+# 多周期 K 线金字塔：从 1 分钟线逐级聚合出 5m / 15m / 1h / 1d
+# （open 取第一根、high 取最大、low 取最小、close 取最后一根、volume 求和，minutes 记录这根 K 线包含几分钟）。
+# 每一级从能整除它的最粗一级聚合，和 1 分钟缓存一起存在 .ethcast_cache 里；
+# 新的分钟到来时每一级只重算最后一根，小时线 / 日线模型直接拿几百行的小数组训练
+
+RESOLUTIONS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400, '1d': 86400}
+DEFAULT_LEVELS = ('1m', '5m', '15m', '1h', '1d')
+BASE = '1m'
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+_UNITS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_resolution(text):
+    # '5m' / '5min' / '1h' / '1d' -> (规范名, 秒数)
+    m = re.fullmatch(r'\s*(\d+)\s*([a-zA-Z]+)\s*', str(text))
+    if not m or m.group(2).lower() not in _UNITS:
+        raise ValueError(f"无法识别的周期: {text}（例如 1m / 5m / 15m / 1h / 1d）")
+    seconds = int(m.group(1)) * _UNITS[m.group(2).lower()]
+    if seconds % 60:
+        raise ValueError(f"周期必须是整分钟: {text}")
+    name = next((k for k, v in RESOLUTIONS.items() if v == seconds), None)
+    if name is None:
+        name = f"{seconds // 3600}h" if seconds % 3600 == 0 else f"{seconds // 60}m"
+    return name, seconds
+
+
+def bar_interval(df):
+    # 数据本身的 K 线间隔（相邻时间差的中位数），替代脚本里写死的 timedelta(minutes=1)
+    diffs = np.diff(df['timestamp'].to_numpy()[-1000:])
+    return pd.Timedelta(seconds=int(np.median(diffs))) if len(diffs) else pd.Timedelta(minutes=1)
+
+
+def aggregate(df, seconds):
+    # df 必须按时间排序；桶按 UTC 秒级时间戳对齐（日线从 00:00 开始）
+    ts = df['timestamp'].to_numpy(dtype='int64')
+    if len(ts) == 0:
+        return _frame(np.empty(0, dtype='int64'), *(np.empty(0) for _ in OHLCV), np.empty(0, dtype='int64'))
+    bucket = ts // seconds * seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    minutes = df['minutes'].to_numpy(dtype='int64') if 'minutes' in df.columns else np.ones(len(ts), dtype='int64')
+    return _frame(
+        bucket[starts],
+        df['open'].to_numpy(dtype=float)[starts],
+        np.maximum.reduceat(df['high'].to_numpy(dtype=float), starts),
+        np.minimum.reduceat(df['low'].to_numpy(dtype=float), starts),
+        df['close'].to_numpy(dtype=float)[ends],
+        np.add.reduceat(df['volume'].to_numpy(dtype=float), starts),
+        np.add.reduceat(minutes, starts),
+    )
+
+
+def _frame(timestamp, open_, high, low, close, volume, minutes):
+    return pd.DataFrame({
+        'datetime': pd.to_datetime(timestamp, unit='s').astype('datetime64[us]'),
+        'timestamp': timestamp.astype('int64'),
+        'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+        'minutes': minutes.astype('int64'),
+    })
+
+
+def _sources(resolutions):
+    # 每一级从能整除它的最粗一级聚合（1d 从 1h 聚合，而不是从 1 分钟）
+    ordered = sorted({BASE, *(parse_resolution(r)[0] for r in resolutions)}, key=lambda r: parse_resolution(r)[1])
+    sources = {}
+    for i, res in enumerate(ordered[1:], start=1):
+        seconds = parse_resolution(res)[1]
+        sources[res] = next(src for src in reversed(ordered[:i]) if seconds % parse_resolution(src)[1] == 0)
+    return ordered, sources
+
+
+def _as_bars(bars):
+    # 接受 DataFrame 或 stream 里的 bar 字典列表，补齐 datetime 并统一列类型
+    df = pd.DataFrame(bars).copy()
+    if 'datetime' not in df.columns:
+        df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
+    df['datetime'] = pd.to_datetime(df['datetime']).astype('datetime64[us]')
+    for col, dtype in COLUMN_TYPES.items():
+        df[col] = df[col].astype(dtype)
+    return df[['datetime', *COLUMN_TYPES]].sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+class OHLCVPyramid:
+    def __init__(self, levels):
+        self.levels = dict(levels)
+        self.order, self.sources = _sources(self.levels)
+
+    @classmethod
+    def build(cls, base, resolutions=DEFAULT_LEVELS):
+        pyramid = cls({BASE: base})
+        pyramid.ensure(resolutions)
+        return pyramid
+
+    def ensure(self, resolutions):
+        # 补齐缺少的周期（从已有的更细一级聚合），返回新建的周期
+        order, sources = _sources([*self.levels, *resolutions])
+        missing = [res for res in order if res not in self.levels]
+        for res in missing:
+            self.levels[res] = aggregate(self.levels[sources[res]], parse_resolution(res)[1])
+        self.order, self.sources = order, sources
+        return missing
+
+    @property
+    def resolutions(self):
+        return list(self.order)
+
+    def __getitem__(self, resolution):
+        name = parse_resolution(resolution)[0]
+        if name not in self.levels:
+            raise KeyError(f"金字塔里没有 {name}（已有: {', '.join(self.order)}）")
+        return self.levels[name]
+
+    def __contains__(self, resolution):
+        return parse_resolution(resolution)[0] in self.levels
+
+    def append(self, bars):
+        # 追加新的 1 分钟 K 线：早于最后一分钟的忽略，等于最后一分钟的视为更新（未收盘的分钟），
+        # 每一级只从最后一根（可能未走完的）K 线开始重新聚合。返回实际新增的分钟数
+        new = _as_bars(bars)
+        base = self.levels[BASE]
+        if len(base):
+            last_ts = int(base['timestamp'].iloc[-1])
+            new = new[new['timestamp'] >= last_ts]
+            if new.empty:
+                return 0
+            if int(new['timestamp'].iloc[0]) == last_ts:
+                base = base.iloc[:-1]
+        added = len(new) - (len(self.levels[BASE]) - len(base))
+        self.levels[BASE] = pd.concat([base, new], ignore_index=True)
+
+        for res in self.order[1:]:
+            src, old = self.levels[self.sources[res]], self.levels[res]
+            seconds = parse_resolution(res)[1]
+            if old.empty:
+                self.levels[res] = aggregate(src, seconds)
+                continue
+            last_bucket = int(old['timestamp'].iloc[-1])
+            tail = src.iloc[np.searchsorted(src['timestamp'].to_numpy(), last_bucket):]
+            self.levels[res] = pd.concat([old.iloc[:-1], aggregate(tail, seconds)], ignore_index=True)
+        return added
+
+    def summary(self):
+        return {res: len(self.levels[res]) for res in self.order}
+
+
+def _base_fingerprint(base, rows):
+    # 1 分钟数据前 rows 行的内容指纹：Excel 只是在末尾追加了新分钟时，旧的聚合结果可以接着用
+    block = np.ascontiguousarray(base[list(COLUMN_TYPES)].to_numpy(dtype=float)[:rows])
+    return hashlib.sha1(block.tobytes()).hexdigest()
+
+
+def _pyramid_meta_path(path):
+    return os.path.join(cache_dir_for(path), os.path.basename(path) + '.pyramid.json')
+
+
+def _level_path(path, digest, res):
+    return os.path.join(cache_dir_for(path), f"{os.path.basename(path)}.{digest[:16]}.{res}.{frame_suffix()}")
+
+
+def _load_pyramid_meta(path):
+    try:
+        with open(_pyramid_meta_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_pyramid(path, resolutions=DEFAULT_LEVELS, use_cache=True, verbose=False):
+    # 1. 源文件没变：直接内存映射读取各级缓存，只聚合缓存里还没有的周期
+    # 2. 源文件只在末尾追加了分钟：读旧的各级，append 新分钟后写回
+    # 3. 其他情况：从 1 分钟数据整体重建
+    base = load_ohlcv(path, use_cache=use_cache)
+    wanted = _sources(resolutions)[0]
+    if not use_cache:
+        return OHLCVPyramid.build(base, wanted)
+
+    digest = source_digest(path)
+    meta = _load_pyramid_meta(path)
+    old_levels = {}
+    if meta:
+        old_levels = {res: _level_path(path, meta['sha1'], res) for res in meta['levels']}
+        old_levels = {res: p for res, p in old_levels.items() if os.path.exists(p) and res in wanted}
+    rows = meta['base_rows'] if meta else 0
+
+    if meta and meta['sha1'] == digest:
+        pyramid = OHLCVPyramid({BASE: base, **{res: read_frame(p) for res, p in old_levels.items()}})
+        dirty = pyramid.ensure(wanted)
+        if verbose:
+            print(f"📦 K 线金字塔命中缓存: {', '.join(f'{r}={n}' for r, n in pyramid.summary().items())}"
+                  + (f"（新建 {', '.join(dirty)}）" if dirty else ''))
+        if not dirty:
+            return pyramid
+    elif old_levels and 0 < rows <= len(base) and _base_fingerprint(base, rows) == meta['base_fingerprint']:
+        pyramid = OHLCVPyramid({BASE: base.iloc[:rows], **{res: read_frame(p) for res, p in old_levels.items()}})
+        added = pyramid.append(base.iloc[rows:])
+        pyramid.ensure(wanted)
+        dirty = wanted[1:]
+        if verbose:
+            print(f"🔁 K 线金字塔增量更新: 新增 {added} 分钟")
+    else:
+        pyramid = OHLCVPyramid.build(base, wanted)
+        dirty = wanted[1:]
+        if verbose:
+            print(f"🧱 K 线金字塔重建: {', '.join(f'{r}={n}' for r, n in pyramid.summary().items())}")
+
+    os.makedirs(cache_dir_for(path), exist_ok=True)
+    for res in dirty:
+        write_frame(pyramid[res], _level_path(path, digest, res))
+    kept = set(meta['levels']) if meta and meta['sha1'] == digest else set()
+    if meta and meta['sha1'] != digest:
+        for res in meta['levels']:
+            stale = _level_path(path, meta['sha1'], res)
+            if os.path.exists(stale):
+                os.remove(stale)
+    levels = sorted(kept | set(wanted[1:]), key=lambda r: parse_resolution(r)[1])
+    with open(_pyramid_meta_path(path), 'w', encoding='utf-8') as f:
+        json.dump({'sha1': digest, 'levels': levels, 'base_rows': len(base),
+                   'base_fingerprint': _base_fingerprint(base, len(base))}, f)
+    return pyramid
+
+
+def load_resolution(path, resolution='1m', use_cache=True):
+    # 取某一周期的 K 线；1m 就是 load_ohlcv 的结果
+    name = parse_resolution(resolution)[0]
+    if name == BASE:
+        return load_ohlcv(path, use_cache=use_cache)
+    levels = DEFAULT_LEVELS if name in DEFAULT_LEVELS else (*DEFAULT_LEVELS, name)
+    return load_pyramid(path, levels, use_cache=use_cache)[name]
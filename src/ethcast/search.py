@@ -0,0 +1,270 @@
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ethcast.backtest import walk_forward_folds
+from ethcast.compare import mape, split_threads
+from ethcast.models import DEFAULT_PARAMS, MODEL_ALIASES, build_model, resolve_name
+from ethcast.trace import absorb, drain_child, span
+from ethcast.windows import make_xy, target_index
+
+# 超参数 × 窗口大小 × 特征组合的搜索：按时间顺序切验证折（扩展窗口训练，预测后面一段的下一分钟收盘价），
+# 每个 (特征, 窗口) 的滞后矩阵只构造一次、写成 .npy，进程池里的试验按内存映射读取，不再逐个试验复制数据。
+# 支持随机搜索和逐轮减半（先用最近一折粗筛，留下前 1/eta 再用更多折细比）；
+# 每个试验有时间预算，折与折之间检查，超时的试验不再继续
+
+# 各模型默认的搜索范围，取值来自各单模型脚本里手工挑的参数
+SEARCH_SPACE = {
+    'Random Forest': {'n_estimators': [100, 200], 'max_depth': [None, 10, 20], 'min_samples_leaf': [1, 5]},
+    'XGBoost': {'n_estimators': [100, 200, 300], 'learning_rate': [0.03, 0.05, 0.1], 'max_depth': [4, 6, 8]},
+    'LightGBM': {'n_estimators': [100, 300], 'learning_rate': [0.03, 0.05, 0.1], 'num_leaves': [15, 20, 31]},
+    'CatBoost': {'iterations': [300, 600], 'learning_rate': [0.03, 0.05, 0.1], 'depth': [4, 6]},
+}
+
+TRIAL_KEYS = ('model', 'params', 'window', 'features')
+
+# 进程内已打开的滞后矩阵（路径 -> 内存映射数组），同一个工作进程的后续试验直接复用
+_MATRICES = {}
+
+
+def _parse_value(text):
+    if text in ('', 'None'):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_space(items, names):
+    # 'max_depth=4,6,8' 作用于参数里有这个键的模型；'xgb:max_depth=4,6' 只作用于指定模型
+    space = {name: dict(SEARCH_SPACE[name]) for name in names}
+    for item in items or []:
+        key, sep, values = item.partition('=')
+        if not sep:
+            raise ValueError(f"搜索范围格式应为 key=v1,v2 或 model:key=v1,v2: {item}")
+        target, _, key = key.rpartition(':')
+        parsed = [_parse_value(v.strip()) for v in values.split(',')]
+        targets = [resolve_name(target)] if target else [
+            name for name in names if key in space[name] or key in DEFAULT_PARAMS[name]]
+        if not targets:
+            raise ValueError(f"没有模型使用参数 {key}，请用 model:{key}=... 指定")
+        for name in targets:
+            if name in space:
+                space[name][key] = parsed
+    return space
+
+
+def candidates(names, space, windows, feature_sets):
+    # 全部网格组合：(模型名, 参数, 窗口, 特征)
+    out = []
+    for name in names:
+        keys = list(space[name])
+        for combo in itertools.product(*(space[name][k] for k in keys)):
+            params = {**DEFAULT_PARAMS[name], **dict(zip(keys, combo))}
+            for window, features in itertools.product(windows, feature_sets):
+                out.append({'model': name, 'params': params, 'window': window, 'features': tuple(features)})
+    return out
+
+
+def target_folds(n_values, n_folds, test_size, train_size=None, min_train=None):
+    # 以“目标在原序列中的位置”定义验证折，不同窗口大小的试验在完全相同的时间段上比较
+    start = n_values - n_folds * test_size
+    folds = walk_forward_folds(n_values, test_size, train_size, min_train=min_train or test_size, start=start)
+    if len(folds) < n_folds:
+        raise ValueError(f"数据长度 {n_values} 不足以切出 {n_folds} 个长度 {test_size} 的验证折")
+    return folds
+
+
+def _rows_for(fold, window):
+    # 窗口为 w 时，滞后矩阵第 i 行的目标是原序列第 w + i 个值
+    train_start, train_end, test_start, test_end = fold
+    return max(0, train_start - window), train_end - window, test_start - window, test_end - window
+
+
+class LagCache:
+    # 每个 (特征, 窗口) 的 (X, y) 只构造一次，写成连续内存的 .npy；进程池里按内存映射读取
+
+    def __init__(self, values_by_features, root=None):
+        self.values = values_by_features
+        self.root = root or tempfile.mkdtemp(prefix='ethcast_search_')
+        self.paths = {}
+        self.build_sec = 0.0
+
+    def get(self, features, window):
+        key = (tuple(features), window)
+        if key not in self.paths:
+            t0 = time.perf_counter()
+            values = self.values[tuple(features)]
+            # 每个特征组都以 close 为目标，不同特征组的 MAPE 才是在比同一个量
+            X, y = make_xy(values if values.shape[1] > 1 else values[:, 0], window,
+                           target_col=target_index(features), copy=True)
+            stem = os.path.join(self.root, f"{'-'.join(features)}_w{window}")
+            np.save(stem + '.X.npy', X)
+            np.save(stem + '.y.npy', y)
+            self.paths[key] = stem
+            self.build_sec += time.perf_counter() - t0
+        return self.paths[key]
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _open_matrix(stem):
+    if stem not in _MATRICES:
+        _MATRICES[stem] = (np.load(stem + '.X.npy', mmap_mode='r'), np.load(stem + '.y.npy', mmap_mode='r'))
+    return _MATRICES[stem]
+
+
+def run_trial(trial, stem, folds, budget_sec=None, n_threads=None):
+    # 依次在各折上训练、预测，返回平均 MAPE；超过预算时剩下的折不再跑
+    X, y = _open_matrix(stem)
+    window = trial['window']
+    scores, fit_sec = [], 0.0
+    t_start = time.perf_counter()
+    status = 'ok'
+    for fold in folds:
+        if budget_sec is not None and time.perf_counter() - t_start > budget_sec:
+            status = 'timeout'
+            break
+        train_start, train_end, test_start, test_end = _rows_for(fold, window)
+        model = build_model(trial['model'], trial['params'], n_threads)
+        t0 = time.perf_counter()
+        with span('fit', model=trial['model'], window=window, rows=train_end - train_start):
+            model.fit(X[train_start:train_end], y[train_start:train_end])
+        fit_sec += time.perf_counter() - t0
+        with span('predict'):
+            scores.append(mape(y[test_start:test_end], model.predict(X[test_start:test_end])))
+    if budget_sec is not None and time.perf_counter() - t_start > budget_sec:
+        status = 'timeout'
+    # 超时的试验保留已跑完几折的平均 MAPE 供参考，排序时排在所有完成的试验之后
+    return {**trial, 'folds': len(scores), 'mape': float(np.mean(scores)) if scores else float('inf'),
+            'fold_mape': scores, 'fit_sec': fit_sec, 'sec': time.perf_counter() - t_start, 'status': status}
+
+
+def rank_key(result):
+    return result['status'] != 'ok', result['mape']
+
+
+def _trial_worker(args):
+    result = run_trial(*args)
+    return result, drain_child()
+
+
+def evaluate(trials, cache, folds, budget_sec=None, n_workers=None, on_result=None):
+    # 一批试验：矩阵先在主进程里全部构造好，再分发到进程池（n_workers=1 时在本进程里跑）
+    jobs = [(trial, cache.get(trial['features'], trial['window'])) for trial in trials]
+    n_cores = os.cpu_count() or 1
+    n_workers = min(n_workers or n_cores, len(jobs))
+    results = []
+    if n_workers > 1:
+        threads = split_threads(n_workers, n_cores)[-1]
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            for result, events in pool.map(_trial_worker, [(t, s, folds, budget_sec, threads) for t, s in jobs]):
+                absorb(events)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    else:
+        for trial, stem in jobs:
+            result = run_trial(trial, stem, folds, budget_sec)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def rungs_for(n_folds, eta):
+    # 逐轮减半每一轮使用的折数：1, eta, eta², ...，最后一轮用全部折
+    sizes, k = [], 1
+    while k < n_folds:
+        sizes.append(k)
+        k *= eta
+    return sizes + [n_folds]
+
+
+def search(values_by_features, names, windows, space=None, method='halving', n_trials=30, n_folds=3,
+           test_size=240, train_size=None, eta=3, budget_sec=None, n_workers=None, seed=42, verbose=True):
+    # values_by_features: {特征元组: 训练段的特征矩阵 (n, k)}，都截到训练起点之前；
+    # 含技术指标的特征组去掉了预热行，这里统一取最后 n 行，保证各组在同一时间段上比较
+    n_values = min(len(v) for v in values_by_features.values())
+    values_by_features = {tuple(f): np.asarray(v, dtype=float)[-n_values:] for f, v in values_by_features.items()}
+    for features in values_by_features:
+        target_index(features)  # 每组都必须含 close，开跑前就报错
+    names = [resolve_name(n) for n in names]
+    space = space or {name: SEARCH_SPACE[name] for name in names}
+    feature_sets = list(values_by_features)
+    pool = candidates(names, space, windows, feature_sets)
+    rng = random.Random(seed)
+    trials = rng.sample(pool, min(n_trials, len(pool)))
+
+    folds = target_folds(n_values, n_folds, test_size, train_size, min_train=max(windows) + test_size)
+    cache = LagCache(values_by_features)
+    t0 = time.perf_counter()
+    history = []
+
+    def report(result):
+        if verbose:
+            mark = '⏱️' if result['status'] == 'timeout' else '  '
+            print(f"{mark} {label(result):<70} 折数 {result['folds']}  MAPE {result['mape']:.4%}  "
+                  f"{result['sec']:.2f}s")
+
+    try:
+        rungs = rungs_for(n_folds, eta) if method == 'halving' else [n_folds]
+        for r, n in enumerate(rungs):
+            if verbose:
+                print(f"🔎 第 {r + 1}/{len(rungs)} 轮：{len(trials)} 个试验，最近 {n} 折")
+            results = evaluate(trials, cache, folds[-n:], budget_sec, n_workers, report)
+            history.extend({**res, 'rung': r} for res in results)
+            ranked = sorted(results, key=rank_key)
+            if r < len(rungs) - 1:
+                keep = max(1, len(ranked) // eta)
+                trials = [{k: res[k] for k in TRIAL_KEYS} for res in ranked[:keep] if res['status'] == 'ok'] \
+                    or [{k: ranked[0][k] for k in TRIAL_KEYS}]
+    finally:
+        cache.close()
+    return {'best': ranked[0], 'ranked': ranked, 'history': history, 'folds': folds,
+            'lag_build_sec': cache.build_sec, 'total_sec': time.perf_counter() - t0}
+
+
+def label(result):
+    tuned = {k: v for k, v in result['params'].items() if DEFAULT_PARAMS[result['model']].get(k) != v
+             or k in SEARCH_SPACE[result['model']]}
+    params = ' '.join(f"{k}={v}" for k, v in tuned.items())
+    return f"{result['model']} w={result['window']} [{','.join(result['features'])}] {params}"
+
+
+def print_summary(outcome, top=10, width=110):
+    print("\n" + "=" * width)
+    print(f"🏆 搜索结果（按最后一轮的平均 MAPE 排序，验证折 {len(outcome['folds'])} 个）")
+    print("-" * width)
+    for i, res in enumerate(outcome['ranked'][:top], start=1):
+        mark = f"超时({res['folds']}折)" if res['status'] == 'timeout' else ''
+        print(f"{i:>2}. {label(res):<80} | {res['mape']:>8.4%} | {res['fit_sec']:>6.2f}s {mark}")
+    print("-" * width)
+    if outcome['best']['status'] != 'ok':
+        print("⚠️ 所有试验都超出了时间预算，可以调大 --budget 或减少候选")
+    print(f"共 {len(outcome['history'])} 次试验，滞后矩阵构造 {outcome['lag_build_sec'] * 1000:.0f} ms，"
+          f"总耗时 {outcome['total_sec']:.1f}s")
+    print("=" * width)
+
+
+def forecast_command(result, start=None, resolution='1m'):
+    # 最优配置对应的 ethcast forecast 命令行，直接复制就能用
+    alias = next((a for a, n in MODEL_ALIASES.items() if n == result['model']), result['model'])
+    parts = [f"python -m ethcast forecast --model {alias} --window {result['window']}",
+             f"--features {','.join(result['features'])}"]
+    parts += [f"--param {k}={json.dumps(v)}" for k, v in result['params'].items()
+              if DEFAULT_PARAMS[result['model']].get(k) != v]
+    if start:
+        parts.append(f"--start {start}")
+    if resolution != '1m':
+        parts.append(f"--resolution {resolution}")
+    return ' '.join(parts)
@@ -0,0 +1,267 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from ethcast.forecast import recursive_forecast
+from ethcast.stream import fast_predictor
+from ethcast.windows import target_index
+
+# 常驻推理服务：启动时从模型缓存加载一次模型，之后每个请求只做预测。
+# 同一时刻到达的请求由 MicroBatcher 合并成一次 predict（递归预测则合并成多路径一起走），
+# 每个接口记录服务端延迟，GET /stats 查看 p50 / p99
+
+MAX_STEPS = 1440
+
+
+class MicroBatcher:
+    # 请求线程把样本放进队列后等待结果；后台线程取到第一个样本后最多再等 max_wait_ms，
+    # 把这段时间内到达的样本（最多 max_batch 个）合并成一批处理
+
+    def __init__(self, run_batch, max_batch=64, max_wait_ms=2.0):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, item):
+        fut = Future()
+        self._queue.put((item, fut))
+        return fut.result()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                results = self.run_batch([item for item, _ in batch])
+                for (_, fut), result in zip(batch, results):
+                    fut.set_result(result)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+    @property
+    def mean_batch(self):
+        return self.items / self.batches if self.batches else 0.0
+
+
+class LatencyTracker:
+    def __init__(self, maxlen=100_000):
+        self._samples = {}
+        self._counts = {}
+        self._maxlen = maxlen
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, ms):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._maxlen)).append(ms)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def summary(self):
+        with self._lock:
+            out = {}
+            for endpoint, samples in self._samples.items():
+                lat = np.array(samples)
+                out[endpoint] = {'count': self._counts[endpoint], 'p50_ms': round(float(np.percentile(lat, 50)), 3),
+                                 'p99_ms': round(float(np.percentile(lat, 99)), 3),
+                                 'max_ms': round(float(lat.max()), 3)}
+            return out
+
+
+class ServedModel:
+    def __init__(self, alias, name, model, window_size, features, max_batch=64, max_wait_ms=2.0):
+        self.alias = alias
+        self.name = name
+        self.window_size = window_size
+        self.features = tuple(features)
+        self.predict = fast_predictor(model)
+        # 递归时 volume 沿用上一分钟，其余特征假设等于预测的 close（与 pipeline 一致）
+        self.carry_cols = tuple(i for i, c in enumerate(self.features) if c == 'volume')
+        self.target_col = target_index(self.features)
+        self.predict_batcher = MicroBatcher(self._predict_batch, max_batch, max_wait_ms)
+        self.forecast_batcher = MicroBatcher(self._forecast_batch, max_batch, max_wait_ms)
+
+    def check_window(self, window):
+        window = np.asarray(window, dtype=float)
+        if window.ndim == 1:
+            window = window[:, None]
+        if window.shape != (self.window_size, len(self.features)):
+            raise ValueError(f"window 形状应为 ({self.window_size}, {len(self.features)})，收到 {window.shape}"
+                             f"（特征: {', '.join(self.features)}）")
+        return window
+
+    def _predict_batch(self, windows):
+        X = np.stack(windows).reshape(len(windows), -1)
+        return np.asarray(self.predict(X), dtype=float).reshape(-1).tolist()
+
+    def _forecast_batch(self, items):
+        # 同一批里步数不同的请求一起走最长的步数，再各自截取
+        windows = np.stack([w for w, _ in items])
+        steps = max(s for _, s in items)
+        preds = recursive_forecast(self.predict, windows, steps, self.carry_cols, target_col=self.target_col)
+        return [preds[i, :s].tolist() for i, (_, s) in enumerate(items)]
+
+    def info(self):
+        return {'model': self.name, 'window': self.window_size, 'features': list(self.features),
+                'predict_batches': self.predict_batcher.batches,
+                'predict_mean_batch': round(self.predict_batcher.mean_batch, 2),
+                'forecast_batches': self.forecast_batcher.batches,
+                'forecast_mean_batch': round(self.forecast_batcher.mean_batch, 2)}
+
+
+class InferenceServer:
+    def __init__(self, models, host='127.0.0.1', port=8808):
+        self.models = {m.alias: m for m in models}
+        self.latency = LatencyTracker()
+        self.started = time.time()
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def get_model(self, body):
+        alias = body.get('model') or next(iter(self.models))
+        if alias not in self.models:
+            raise KeyError(f"未加载的模型: {alias}（可选: {', '.join(self.models)}）")
+        return self.models[alias]
+
+    def handle_predict(self, body):
+        served = self.get_model(body)
+        return {'model': served.alias, 'pred': served.predict_batcher.submit(served.check_window(body['window']))}
+
+    def handle_forecast(self, body):
+        served = self.get_model(body)
+        steps = int(body.get('steps', 30))
+        if not 1 <= steps <= MAX_STEPS:
+            raise ValueError(f"steps 应在 1~{MAX_STEPS} 之间")
+        window = served.check_window(body['window'])
+        return {'model': served.alias, 'preds': served.forecast_batcher.submit((window, steps))}
+
+    def reset_stats(self):
+        self.latency.reset()
+        for m in self.models.values():
+            for batcher in (m.predict_batcher, m.forecast_batcher):
+                batcher.batches = batcher.items = 0
+        return {'status': 'ok'}
+
+    def stats(self):
+        return {'uptime_sec': round(time.time() - self.started, 1), 'latency': self.latency.summary(),
+                'models': {alias: m.info() for alias, m in self.models.items()}}
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        # 后台线程运行（测试 / 压测脚本用）
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _make_handler(server):
+    routes = {'/predict': server.handle_predict, '/forecast': server.handle_forecast}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive，压测客户端可以复用连接
+        disable_nagle_algorithm = True  # 响应头和正文分两次写，不关 Nagle 会被延迟 ACK 卡住约 40ms
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok', 'models': {a: m.info() for a, m in server.models.items()}})
+            elif self.path == '/stats':
+                self._send(200, server.stats())
+            else:
+                self._send(404, {'error': f'未知路径: {self.path}'})
+
+        def do_POST(self):
+            t0 = time.perf_counter()
+            handler = routes.get(self.path)
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                # 读不出正文长度就没法确定下一个请求从哪开始，回 400 后关闭连接
+                self.close_connection = True
+                self._send(400, {'error': f"Content-Length 无效: {self.headers.get('Content-Length')!r}"})
+                return
+            body = self.rfile.read(length)
+            if self.path == '/stats/reset':
+                self._send(200, server.reset_stats())
+                return
+            if handler is None:
+                self._send(404, {'error': f'未知路径: {self.path}'})
+                return
+            try:
+                payload = json.loads(body or b'{}')
+                if not isinstance(payload, dict):
+                    raise TypeError(f'请求体必须是 JSON 对象，收到 {type(payload).__name__}')
+                result = handler(payload)
+                status = 200
+            except (KeyError, ValueError, TypeError) as e:
+                result, status = {'error': str(e)}, 400
+            except Exception as e:
+                # 模型本身出错（例如 XGBoostError，由批处理线程转交过来）：返回 500，不让连接直接断开
+                print(f"❌ {self.path} 处理失败: {type(e).__name__}: {e}")
+                result, status = {'error': f"{type(e).__name__}: {e}"}, 500
+            self._send(status, result)
+            if status == 200:
+                server.latency.record(self.path, (time.perf_counter() - t0) * 1000)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def load_served_models(data_file, aliases, window_size, features, start=None, use_registry=True, max_batch=64,
+                       max_wait_ms=2.0):
+    # 通过 Pipeline 取模型：模型缓存命中时毫秒级加载，否则训练一次并存入
+    from ethcast.pipeline import ForecastConfig, Pipeline
+
+    pipeline = Pipeline(data_file, use_registry=use_registry)
+    start = start or str(pipeline.df['datetime'].iloc[-1])
+    served = []
+    for alias in aliases:
+        config = ForecastConfig(alias, window_size, tuple(features), start)
+        served.append(ServedModel(alias, config.name, pipeline.model(config), window_size, features, max_batch,
+                                  max_wait_ms))
+    return served
@@ -0,0 +1,356 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ethcast.models import build_model
+from ethcast.windows import make_xy, target_index
+
+# 流式模式：新的一分钟 K 线到达后追加进环形缓冲区，最近 w 行就是下一次预测的特征（不重新拼窗口），
+# 立即给出下一分钟的预测；模型在后台线程里用最新数据增量训练（XGBoost / LightGBM / CatBoost
+# 在旧模型上继续加树），训练完成后直接替换模型引用，预测路径不用等
+
+# 线路格式：每行一根 K 线，CSV "timestamp,open,high,low,close,volume"（秒级时间戳，同 Excel 的 timestamp 列），
+# 或者含这些字段的 JSON 对象
+BAR_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+def parse_bar(line):
+    # 返回 (秒级时间戳, {字段: 值})；空行、表头返回 None
+    line = line.strip()
+    if not line or line.startswith('timestamp'):
+        return None
+    if line.startswith('{'):
+        raw = json.loads(line)
+        bar = {k: float(raw[k]) for k in BAR_FIELDS[1:] if k in raw}
+        return int(raw['timestamp']), bar
+    parts = line.split(',')
+    return int(float(parts[0])), {k: float(v) for k, v in zip(BAR_FIELDS[1:], parts[1:])}
+
+
+def format_bar(row):
+    return ','.join([str(int(row['timestamp']))] + [f"{row[k]:.6g}" for k in BAR_FIELDS[1:]])
+
+
+def tail_file(path, from_start=False, poll=0.05, stop=None):
+    # 类似 tail -f：逐行产出文件新追加的内容；半行先留着，等换行符到了再产出
+    while not os.path.exists(path):
+        if stop is not None and stop.is_set():
+            return
+        time.sleep(poll)
+    with open(path, encoding='utf-8') as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        pending = ''
+        while stop is None or not stop.is_set():
+            chunk = f.readline()
+            if not chunk:
+                time.sleep(poll)
+                continue
+            pending += chunk
+            if pending.endswith('\n'):
+                yield pending
+                pending = ''
+
+
+def listen_tcp(host='127.0.0.1', port=9009, stop=None):
+    # 本地 socket：任意客户端连上来逐行发送 K 线（例如 replay 子命令或 nc），按到达顺序产出
+    lines = queue.Queue()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                lines.put(raw.decode('utf-8'))
+
+    server = socketserver.ThreadingTCPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        while stop is None or not stop.is_set():
+            try:
+                yield lines.get(timeout=0.2)
+            except queue.Empty:
+                continue
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def open_source(spec, from_start=False, stop=None):
+    # "file:路径" 或 "tcp:主机:端口"
+    kind, _, rest = spec.partition(':')
+    if kind == 'file':
+        return tail_file(rest, from_start=from_start, stop=stop)
+    if kind == 'tcp':
+        host, _, port = rest.rpartition(':')
+        return listen_tcp(host or '127.0.0.1', int(port), stop=stop)
+    raise ValueError(f"不支持的数据源: {spec}（应为 file:路径 或 tcp:主机:端口）")
+
+
+def replay(df, target, rate=0.0):
+    # 把历史 K 线按 rate 根/秒写到文件或 socket（rate=0 表示不限速），用来模拟实时行情
+    rows = df[list(BAR_FIELDS)].to_dict('records')
+    kind, _, rest = target.partition(':')
+    if kind == 'file':
+        out = open(rest, 'a', encoding='utf-8')
+        send = lambda text: (out.write(text), out.flush())  # noqa: E731
+    elif kind == 'tcp':
+        host, _, port = rest.rpartition(':')
+        out = socket.create_connection((host or '127.0.0.1', int(port)))
+        send = lambda text: out.sendall(text.encode('utf-8'))  # noqa: E731
+    else:
+        raise ValueError(f"不支持的输出: {target}")
+    sent = 0
+    try:
+        for row in rows:
+            send(format_bar(row) + '\n')
+            sent += 1
+            if rate:
+                time.sleep(1.0 / rate)
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # 接收端已退出（例如 stream --limit），不算错误
+    finally:
+        out.close()
+    return sent
+
+
+class BarBuffer:
+    # 定长环形缓冲区，和 WindowRing 一样每行写两份（位置 i 和 i+capacity），
+    # 所以最近 n 行永远是一段连续切片，取预测特征不用拷贝
+
+    def __init__(self, capacity, n_features):
+        self.capacity = capacity
+        self._buf = np.empty((2 * capacity, n_features))
+        self._times = np.empty(2 * capacity, dtype='int64')
+        self._start = 0
+        self._size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def _write(self, i, t, row):
+        self._buf[i] = row
+        self._buf[i + self.capacity] = row
+        self._times[i] = t
+        self._times[i + self.capacity] = t
+
+    def append(self, t, row):
+        with self.lock:
+            if self._size < self.capacity:
+                self._write(self._size, t, row)
+                self._size += 1
+            else:
+                self._write(self._start, t, row)
+                self._start = (self._start + 1) % self.capacity
+
+    def replace_last(self, t, row):
+        # 同一分钟的 K 线被修正（例如交易所重发），覆盖最后一行
+        with self.lock:
+            self._write((self._start + self._size - 1) % self.capacity, t, row)
+
+    def extend(self, times, rows):
+        for t, row in zip(times, rows):
+            self.append(t, row)
+
+    def last(self, n):
+        end = self._start + self._size
+        return self._buf[end - n:end]
+
+    @property
+    def last_time(self):
+        return int(self._times[self._start + self._size - 1]) if self._size else None
+
+    def snapshot(self, n=None):
+        # 后台训练用的副本：加锁拷贝，之后写入不会影响训练数据
+        with self.lock:
+            n = self._size if n is None else min(n, self._size)
+            end = self._start + self._size
+            return self._times[end - n:end].copy(), self._buf[end - n:end].copy()
+
+
+def warm_start_fit(name, model, params, X, y, rounds, n_threads=None):
+    # 在旧模型的基础上继续训练 rounds 轮；随机森林没有增量训练，直接重训
+    if name == 'XGBoost':
+        new = build_model(name, {**params, 'n_estimators': rounds}, n_threads)
+        new.fit(X, y, xgb_model=model.get_booster())
+    elif name == 'LightGBM':
+        new = build_model(name, {**params, 'n_estimators': rounds}, n_threads)
+        new.fit(X, y, init_model=getattr(model, 'booster_', model))
+    elif name == 'CatBoost':
+        new = build_model(name, {**params, 'iterations': rounds}, n_threads)
+        new.fit(X, y, init_model=model)
+    else:
+        new = build_model(name, params, n_threads)
+        new.fit(X, y)
+    return new
+
+
+def fast_predictor(model):
+    # 单行预测时 sklearn 包装层的参数检查比树模型本身还慢，直接调用底层 booster
+    if hasattr(model, 'get_booster'):
+        booster = model.get_booster()
+        return lambda x: booster.inplace_predict(x)
+    if hasattr(model, 'booster_'):
+        return model.booster_.predict
+    return model.predict
+
+
+def _base_rounds(name, params):
+    if name == 'CatBoost':
+        return params.get('iterations', 1000)
+    return params.get('n_estimators', 100)
+
+
+@dataclass
+class StreamStats:
+    bars: int = 0
+    forecasts: int = 0
+    revised: int = 0
+    dropped: int = 0
+    refreshes: int = 0
+    full_refits: int = 0
+    refresh_seconds: float = 0.0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=10_000))
+
+    def report(self):
+        lat = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return (f"K 线 {self.bars} 根（修正 {self.revised}，丢弃 {self.dropped}）| 预测 {self.forecasts} 次 | "
+                f"延迟 p50 {np.percentile(lat, 50):.2f} ms / p99 {np.percentile(lat, 99):.2f} ms / "
+                f"max {lat.max():.2f} ms | 后台更新 {self.refreshes} 次（其中全量重训 {self.full_refits} 次，"
+                f"共 {self.refresh_seconds:.1f}s）")
+
+
+@dataclass
+class StreamForecast:
+    time: int
+    next_time: int
+    close: float
+    pred: float
+    latency_ms: float
+
+
+class StreamForecaster:
+    def __init__(self, name, params, window_size, features=('close',), capacity=10_000, train_bars=5_000,
+                 refresh_every=60, warm_rounds=20, max_rounds=None, n_threads=None):
+        self.name = name
+        self.params = dict(params)
+        self.window_size = window_size
+        self.features = tuple(features)
+        # 与 Pipeline.model 训练初始模型用的是同一个目标列，刷新前后预测的是同一个量
+        self.target_col = target_index(self.features)
+        self.buffer = BarBuffer(capacity, len(self.features))
+        self.train_bars = train_bars
+        self.refresh_every = refresh_every
+        self.warm_rounds = warm_rounds
+        # 加的树越多单次预测越慢，累计超过 max_rounds 轮就在最近的数据上全量重训
+        self.max_rounds = max_rounds or 3 * _base_rounds(name, self.params)
+        self.n_threads = n_threads
+        self.model = None
+        self._predict = None
+        self.rounds = 0
+        self.stats = StreamStats()
+        self._since_refresh = 0
+        self._pending = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ethcast-refresh')
+
+    def seed(self, times, values, model=None):
+        # 用历史数据填满缓冲区；没有现成模型时先在这些数据上训练一个
+        self.buffer.extend(times, np.asarray(values, dtype=float))
+        if model is None:
+            model = build_model(self.name, self.params, self.n_threads)
+            model.fit(*self._training_set(*self.buffer.snapshot(self.train_bars)))
+        self._swap(model)
+        self.rounds = _base_rounds(self.name, self.params)
+        return self
+
+    def _swap(self, model):
+        # 模型与预测函数一起替换，预测线程拿到的是同一个模型的函数
+        self._predict = fast_predictor(model)
+        self.model = model
+
+    def _training_set(self, times, values):
+        X, y = make_xy(values if values.shape[1] > 1 else values[:, 0], self.window_size,
+                       target_col=self.target_col, copy=True)
+        return X, y
+
+    def _row(self, bar):
+        return np.array([bar[c] for c in self.features])
+
+    def on_bar(self, t, bar):
+        start = time.perf_counter()
+        last = self.buffer.last_time
+        if last is not None and t < last:
+            self.stats.dropped += 1  # 乱序到达的旧 K 线
+            return None
+        if last is not None and t == last:
+            self.buffer.replace_last(t, self._row(bar))
+            self.stats.revised += 1
+        else:
+            self.buffer.append(t, self._row(bar))
+            self.stats.bars += 1
+            self._since_refresh += 1
+        if len(self.buffer) < self.window_size or self._predict is None:
+            return None
+
+        x = self.buffer.last(self.window_size).reshape(1, -1)
+        pred = float(self._predict(x)[0])
+        latency = (time.perf_counter() - start) * 1000
+        self.stats.forecasts += 1
+        self.stats.latencies_ms.append(latency)
+        self._maybe_refresh()
+        return StreamForecast(t, t + 60, float(bar['close']), pred, latency)
+
+    def _maybe_refresh(self):
+        if self._since_refresh < self.refresh_every or (self._pending is not None and not self._pending.done()):
+            return
+        self._since_refresh = 0
+        self._pending = self._executor.submit(self._refresh, self.buffer.snapshot(self.train_bars))
+
+    def _refresh(self, snapshot):
+        t0 = time.perf_counter()
+        X, y = self._training_set(*snapshot)
+        if self.rounds + self.warm_rounds > self.max_rounds or self.name == 'Random Forest':
+            model = build_model(self.name, self.params, self.n_threads)
+            model.fit(X, y)
+            self.rounds = _base_rounds(self.name, self.params)
+            self.stats.full_refits += 1
+        else:
+            model = warm_start_fit(self.name, self.model, self.params, X, y, self.warm_rounds, self.n_threads)
+            self.rounds += self.warm_rounds
+        self._swap(model)  # 替换引用是原子操作，预测线程下一次就用新模型
+        self.stats.refreshes += 1
+        self.stats.refresh_seconds += time.perf_counter() - t0
+
+    def wait(self):
+        if self._pending is not None:
+            self._pending.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def run_stream(forecaster, lines, on_forecast=None, limit=None):
+    # 主循环：逐行解析 K 线并预测；limit 为处理多少根后退出（测试 / 回放用）
+    for line in lines:
+        try:
+            parsed = parse_bar(line)
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"❌ 无法解析的行: {line.strip()!r} ({e})")
+            continue
+        if parsed is None:
+            continue
+        result = forecaster.on_bar(*parsed)
+        if result is not None and on_forecast is not None:
+            on_forecast(result)
+        if limit is not None and forecaster.stats.bars >= limit:
+            break
+    return forecaster.stats
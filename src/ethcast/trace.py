@@ -0,0 +1,306 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，只记录耗时
+    resource = None
+
+# 轻量的分阶段计时：with span('fit', model=name): ... 记录嵌套耗时、调用次数和进程内存（当前 / 峰值 RSS）。
+# 未开启时 span() 直接返回同一个空上下文，几乎没有开销；
+# 开启方式：ETHCAST_TRACE=路径（任何脚本都行）或入口脚本 / ethcast 命令行的 --trace 路径，
+# 进程退出时写出 Chrome trace（chrome://tracing、ui.perfetto.dev 打开）或按阶段汇总的 JSON。
+# 进程池里的工作进程同样记录，结果随返回值带回主进程合并（见 drain_child / absorb）
+
+FORMATS = ('chrome', 'json')
+# 读 /proc 取当前 RSS 要十几微秒，只给耗时超过 1ms 的阶段记录；峰值 RSS 每个阶段都记
+RSS_MIN_NS = 1_000_000
+
+_NULL = nullcontext()
+_tracer = None
+
+
+def _current_rss_mb():
+    # Linux 读 /proc，其他系统没有便宜的读法，只给峰值
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss 在 macOS 上是字节，Linux 上是 KB
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'args', 'start', 'path')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.path = f"{stack[-1].path}/{self.name}" if stack else self.name
+        stack.append(self)
+        for listener in self.tracer.listeners:
+            listener('enter', self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        for listener in self.tracer.listeners:
+            listener('exit', self)
+        self.tracer._stack().pop()
+        self.tracer._record(self, end, exc_type)
+        return False
+
+    def set(self, **args):
+        # 运行中补充信息（例如训练样本数），写进事件的 args
+        self.args.update(args)
+
+
+class Tracer:
+    def __init__(self, path=None, fmt='chrome'):
+        if fmt not in FORMATS:
+            raise ValueError(f"未知的 trace 格式: {fmt}（可选: {', '.join(FORMATS)}）")
+        self.path = path
+        self.fmt = fmt
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter_ns()
+        self.events = []
+        # 阶段开始 / 结束时回调 listener(事件, span)，例如 --profile mem 在阶段前后拍内存快照
+        self.listeners = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        # fork 出来的工作进程会继承父进程当时打开的阶段，换了进程就从空栈开始
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.stack, local.pid = [], os.getpid()
+        return local.stack
+
+    def span(self, name, args):
+        return Span(self, name, args)
+
+    def _record(self, span, end, exc_type):
+        dur = end - span.start
+        event = {'name': span.name, 'path': span.path, 'start': span.start, 'dur': dur,
+                 'pid': os.getpid(), 'tid': threading.get_ident(),
+                 'rss_mb': _current_rss_mb() if dur >= RSS_MIN_NS else None,
+                 'peak_rss_mb': _peak_rss_mb(), 'args': span.args}
+        if exc_type is not None:
+            event['error'] = exc_type.__name__
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self):
+        # 按嵌套路径汇总：次数、总耗时、单次最长、自身耗时（去掉直接子阶段）、峰值内存；按第一次出现的顺序
+        stats = {}
+        for e in sorted(self.events, key=lambda e: e['start']):
+            s = stats.setdefault(e['path'], {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'child_ms': 0.0,
+                                             'peak_rss_mb': None})
+            ms = e['dur'] / 1e6
+            s['calls'] += 1
+            s['total_ms'] += ms
+            s['max_ms'] = max(s['max_ms'], ms)
+            if e['peak_rss_mb'] is not None:
+                s['peak_rss_mb'] = max(s['peak_rss_mb'] or 0.0, e['peak_rss_mb'])
+            parent = e['path'].rpartition('/')[0]
+            if parent in stats:
+                stats[parent]['child_ms'] += ms
+        for s in stats.values():
+            s['self_ms'] = max(0.0, s['total_ms'] - s.pop('child_ms'))
+        return {path: stats[path] for path in _tree_order(stats)}
+
+    def chrome_events(self):
+        # Chrome trace 的 “X”（完整事件）格式，时间单位为微秒；不同进程 / 线程各占一行
+        out = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'main' if pid == self.pid
+                                                                         else f'worker {pid}'}}
+               for pid in sorted({e['pid'] for e in self.events})]
+        for e in self.events:
+            args = dict(e['args'], path=e['path'])
+            for key in ('rss_mb', 'peak_rss_mb', 'error'):
+                if e.get(key) is not None:
+                    args[key] = round(e[key], 1) if isinstance(e[key], float) else e[key]
+            out.append({'name': e['name'], 'cat': e['path'].partition('/')[0], 'ph': 'X', 'pid': e['pid'],
+                        'tid': e['tid'], 'ts': (e['start'] - self.t0) / 1000, 'dur': e['dur'] / 1000,
+                        'args': _jsonable(args)})
+        return out
+
+    def export(self, path=None, fmt=None):
+        path = path or self.path
+        fmt = fmt or self.fmt
+        if fmt == 'chrome':
+            payload = {'traceEvents': self.chrome_events(), 'displayTimeUnit': 'ms'}
+        else:
+            payload = {'summary': self.summary(),
+                       'events': [dict(_jsonable(e), start_ms=(e['start'] - self.t0) / 1e6, dur_ms=e['dur'] / 1e6)
+                                  for e in self.events]}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        return path
+
+
+def _tree_order(paths):
+    # 子阶段紧跟在父阶段后面（同级按第一次出现的顺序）；父阶段没有记录的路径放在最后
+    children = {}
+    for path in paths:
+        children.setdefault(path.rpartition('/')[0], []).append(path)
+    out = []
+
+    def walk(parent):
+        for path in children.get(parent, ()):
+            out.append(path)
+            walk(path)
+
+    walk('')
+    seen = set(out)
+    return out + [p for p in paths if p not in seen]
+
+
+def _jsonable(obj):
+    if isinstance(obj, dict):
+        return {k: _jsonable(v) for k, v in obj.items() if k not in ('start', 'dur')}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return str(obj)
+
+
+def span(name, **args):
+    # 未开启时返回共享的空上下文
+    if _tracer is None:
+        return _NULL
+    return _tracer.span(name, args)
+
+
+def traced(name=None):
+    # 装饰器版本：整个函数算一个阶段
+    def wrap(func):
+        label = name or func.__name__
+
+        def inner(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(label, {}):
+                return func(*args, **kwargs)
+
+        inner.__name__ = func.__name__
+        inner.__doc__ = func.__doc__
+        inner.__wrapped__ = func
+        return inner
+    return wrap
+
+
+def enabled():
+    return _tracer is not None
+
+
+def enable(path=None, fmt='chrome'):
+    # 主进程开启时写环境变量，spawn 方式启动的工作进程导入本模块时自动开启（但不导出文件）
+    global _tracer
+    _tracer = Tracer(path, fmt)
+    os.environ['ETHCAST_TRACE'] = path or '1'
+    os.environ['ETHCAST_TRACE_FORMAT'] = fmt
+    os.environ['ETHCAST_TRACE_OWNER'] = str(_tracer.pid)
+    if path:
+        atexit.register(_export_at_exit)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    for key in ('ETHCAST_TRACE', 'ETHCAST_TRACE_FORMAT', 'ETHCAST_TRACE_OWNER'):
+        os.environ.pop(key, None)
+    return tracer
+
+
+def drain_child():
+    # 在工作进程里调用：取出本进程记录的事件（并清空），随任务结果一起交回主进程；主进程里返回空列表
+    if _tracer is None or os.getpid() == _owner_pid():
+        return []
+    with _tracer._lock:
+        events, _tracer.events = [e for e in _tracer.events if e['pid'] == os.getpid()], []
+    return events
+
+
+def absorb(events):
+    # 主进程合并工作进程带回的事件，挂到当前线程正在进行的阶段下面
+    if _tracer is not None and events:
+        stack = _tracer._stack()
+        if stack:
+            events = [dict(e, path=f"{stack[-1].path}/{e['path']}") for e in events]
+        with _tracer._lock:
+            _tracer.events.extend(events)
+
+
+def _owner_pid():
+    owner = os.environ.get('ETHCAST_TRACE_OWNER')
+    return int(owner) if owner else _tracer.pid
+
+
+def print_summary(tracer=None, width=96):
+    tracer = tracer or _tracer
+    if tracer is None or not tracer.events:
+        return
+    print("\n" + "=" * width)
+    print(f"{'阶段':<44} | {'次数':>6} | {'总耗时(ms)':>11} | {'自身(ms)':>10} | {'单次最长':>9} | 峰值内存")
+    print("-" * width)
+    for path, s in tracer.summary().items():
+        depth = path.count('/')
+        label = '  ' * depth + path.rpartition('/')[2]
+        rss = f"{s['peak_rss_mb']:.0f} MB" if s['peak_rss_mb'] is not None else '-'
+        print(f"{label:<44} | {s['calls']:>6} | {s['total_ms']:>11.1f} | {s['self_ms']:>10.1f} | "
+              f"{s['max_ms']:>9.1f} | {rss}")
+    print("=" * width)
+
+
+def _export_at_exit():
+    if _tracer is not None and _tracer.path and os.getpid() == _tracer.pid:
+        path = _tracer.export()
+        print_summary()
+        print(f"🧭 trace 已写入 {path}（{len(_tracer.events)} 个事件，格式 {_tracer.fmt}）")
+
+
+def add_argument(parser):
+    # 入口脚本共用的 --trace / --trace-format 参数
+    parser.add_argument('--trace', metavar='PATH', help='记录各阶段耗时 / 内存，退出时写入该文件（如 trace.json，已在 .gitignore 中）')
+    parser.add_argument('--trace-format', choices=FORMATS, default='chrome',
+                        help='chrome：Chrome trace（chrome://tracing / Perfetto）；json：按阶段汇总')
+
+
+def setup_from_args(args):
+    if getattr(args, 'trace', None):
+        enable(args.trace, args.trace_format)
+
+
+# 通过环境变量开启：主进程负责导出；工作进程（ETHCAST_TRACE_OWNER 不是自己）只记录
+if os.environ.get('ETHCAST_TRACE'):
+    _path = os.environ['ETHCAST_TRACE']
+    _owner = os.environ.get('ETHCAST_TRACE_OWNER')
+    if _owner and int(_owner) != os.getpid():
+        _tracer = Tracer(None, os.environ.get('ETHCAST_TRACE_FORMAT', 'chrome'))
+    else:
+        enable(None if _path == '1' else _path, os.environ.get('ETHCAST_TRACE_FORMAT', 'chrome'))
+
+# --profile 开启时（见 ethcast/profiling.py），spawn 方式启动的工作进程不会执行入口脚本的参数解析；
+# 各模块都会导入本模块，在这里接上采样，包的 __init__ 保持没有副作用
+_profile_owner = os.environ.get('ETHCAST_PROFILE_OWNER')
+if os.environ.get('ETHCAST_PROFILE') and _profile_owner and int(_profile_owner) != os.getpid():
+    from ethcast import profiling  # noqa: E402,F401
@@ -0,0 +1,52 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 所有模型都预测下一根 K 线的收盘价
+TARGET = 'close'
+
+
+def lag_matrix(values, window_size, copy=False):
+    # 构造滑动窗口特征矩阵：第 i 行 = values[i: i + window_size] 拉平
+    # 一维输入得到 (n - w, w)；多列输入 (n, k) 得到 (n - w, w * k)，与 .flatten() 的排列一致
+    # 默认返回零拷贝的步长视图（只读），copy=True 时返回连续内存的副本
+    values = np.asarray(values)
+    if values.ndim not in (1, 2):
+        raise ValueError(f"只支持一维或二维输入，收到 {values.ndim} 维")
+    n = len(values)
+    if window_size < 1 or n <= window_size:
+        raise ValueError(f"数据长度 {n} 不足以构造窗口大小 {window_size} 的样本")
+
+    if values.ndim == 1:
+        X = sliding_window_view(values, window_size)[:n - window_size]
+    else:
+        # 按行连续存放后，每个窗口就是扁平缓冲区里一段长度 w*k 的连续区间，起点间隔 k
+        k = values.shape[1]
+        flat = np.ascontiguousarray(values).reshape(-1)
+        X = sliding_window_view(flat, window_size * k)[::k][:n - window_size]
+
+    return np.ascontiguousarray(X) if copy else X
+
+
+def make_xy(values, window_size, target_col=0, copy=False):
+    # 返回 (X, y)：用过去 window_size 行预测下一行的目标列
+    values = np.asarray(values)
+    X = lag_matrix(values, window_size, copy=copy)
+    y = values[window_size:] if values.ndim == 1 else values[window_size:, target_col]
+    return X, (np.ascontiguousarray(y) if copy else y)
+
+
+def target_index(features):
+    # 预测目标在特征列里的位置；特征列里没有 close 时无法训练，也无法把预测写回窗口
+    features = [features] if isinstance(features, str) else list(features)
+    if TARGET not in features:
+        raise ValueError(f"特征列必须包含 {TARGET}（预测目标），收到: {', '.join(features) or '空'}")
+    return features.index(TARGET)
+
+
+def make_xy_frame(df, feature_cols, window_size, target_col='close', copy=False):
+    # DataFrame 版本：feature_cols 可以是单列名或列名列表
+    if isinstance(feature_cols, str):
+        return make_xy(df[feature_cols].to_numpy(), window_size, copy=copy)
+    feature_cols = list(feature_cols)
+    return make_xy(df[feature_cols].to_numpy(), window_size,
+                   target_col=feature_cols.index(target_col), copy=copy)
@@ -0,0 +1,99 @@
+import sqlite3
+import time
+
+import pandas as pd
+
+# 豆瓣短评的断点存储（SQLite）：每抓完一页就把评论和该页的 start 偏移写进同一个事务，
+# 中途 Cookie 失效或被封，已经抓到的页不会丢，重启后只抓还没见过的页
+
+COLUMNS = ['页码', '用户', '评分', '有用数', '发布日期', '评论内容']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS comments (
+    movie_id TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    user TEXT,
+    rating TEXT,
+    votes INTEGER,
+    time TEXT,
+    content TEXT,
+    PRIMARY KEY (movie_id, start, idx)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    movie_id TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    n_items INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (movie_id, start)
+);
+CREATE TABLE IF NOT EXISTS finished (
+    movie_id TEXT PRIMARY KEY,
+    finished_at REAL NOT NULL
+);
+'''
+
+
+class CommentStore:
+    def __init__(self, path='douban_comments.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        # 旧版本会把被拦截的空页（登录页、验证码页）也记成已抓，清掉后这些页会重新抓取
+        with self.conn:
+            self.conn.execute('DELETE FROM pages WHERE n_items = 0')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def seen_starts(self, movie_id):
+        rows = self.conn.execute('SELECT start FROM pages WHERE movie_id = ?', (movie_id,))
+        return {r[0] for r in rows}
+
+    def last_start(self, movie_id):
+        row = self.conn.execute('SELECT MAX(start) FROM pages WHERE movie_id = ?', (movie_id,)).fetchone()
+        return row[0]
+
+    def is_exhausted(self, movie_id):
+        # 只有确认翻到了评论列表末尾（mark_finished）才算抓完，空页不算
+        row = self.conn.execute('SELECT 1 FROM finished WHERE movie_id = ?', (movie_id,)).fetchone()
+        return row is not None
+
+    def mark_finished(self, movie_id):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO finished VALUES (?, ?)', (movie_id, time.time()))
+
+    def save_page(self, movie_id, start, comments):
+        # 一页的评论与进度在同一事务里提交，要么都写入要么都不写；空页不记进度，下次还会重抓
+        if not comments:
+            return
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(movie_id, start, i, c['用户'], c['评分'], _to_int(c['有用数']), c['发布日期'], c['评论内容'])
+                 for i, c in enumerate(comments)])
+            self.conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                              (movie_id, start, len(comments), time.time()))
+
+    def count(self, movie_id):
+        return self.conn.execute('SELECT COUNT(*) FROM comments WHERE movie_id = ?', (movie_id,)).fetchone()[0]
+
+    def to_frame(self, movie_id, page_size=20):
+        df = pd.read_sql_query('SELECT start, user, rating, votes, time, content FROM comments '
+                               'WHERE movie_id = ? ORDER BY start, idx', self.conn, params=(movie_id,))
+        df['start'] = df['start'] // page_size + 1
+        df.columns = COLUMNS
+        return df
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,217 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from urllib.parse import urljoin
+
+import aiohttp
+
+try:
+    import lxml.html
+except ImportError:  # 没有 lxml 时退回 BeautifulSoup 自带的 html.parser
+    lxml = None
+
+# books.toscrape.com 的异步爬虫：一个带连接池的 aiohttp 会话，分类页并发抓取，
+# 每抓到一页就先把 .next 下一页放回队列，再解析本页书目（翻页与解析流水线化）
+
+BASE_URL = "https://books.toscrape.com/"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+RATING_MAP = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+PRICE_RE = re.compile(r"(\d+\.\d+)")
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _book_row(title, price_text, rating_class, category_name):
+    price_match = PRICE_RE.search(price_text)
+    return {
+        '书籍名称': title,
+        '类别': category_name,
+        '价格 (GBP)': float(price_match.group(1)) if price_match else 0.0,
+        '评分': RATING_MAP.get(rating_class, 0)
+    }
+
+
+def parse_categories(html_text, parser='auto'):
+    # 首页左侧分类 (.nav-list ul li a)，返回 [(分类名, 相对链接)]
+    if _use_lxml(parser):
+        doc = lxml.html.document_fromstring(html_text)
+        links = doc.xpath(f"//*[{_has_class('nav-list')}]//ul/li/a")
+        return [(a.text_content().strip(), a.get('href')) for a in links]
+    soup = _soup(html_text)
+    return [(a.text.strip(), a['href']) for a in soup.select('.nav-list ul li a')]
+
+
+def parse_listing(html_text, category_name, parser='auto'):
+    # 分类列表页：返回 (书目列表, 下一页相对链接或 None)
+    if _use_lxml(parser):
+        doc = lxml.html.document_fromstring(html_text)
+        books = []
+        for pod in doc.xpath(f"//article[{_has_class('product_pod')}]"):
+            title = pod.xpath('.//h3/a/@title')[0]
+            price_text = pod.xpath(f".//p[{_has_class('price_color')}]")[0].text_content()
+            rating_class = pod.xpath(f".//*[{_has_class('star-rating')}]/@class")[0].split()[1]
+            books.append(_book_row(title, price_text, rating_class, category_name))
+        next_href = doc.xpath(f"//*[{_has_class('next')}]/a/@href")
+        return books, (next_href[0] if next_href else None)
+
+    soup = _soup(html_text)
+    books = []
+    for book in soup.select('.product_pod'):
+        books.append(_book_row(book.h3.a['title'], book.select_one('.price_color').text,
+                               book.select_one('.star-rating')['class'][1], category_name))
+    next_button = soup.select_one('.next a')
+    return books, (next_button['href'] if next_button else None)
+
+
+def _use_lxml(parser):
+    if parser == 'auto':
+        return lxml is not None
+    return parser == 'lxml'
+
+
+def _soup(html_text):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html_text, 'html.parser')
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    errors: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_sec(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    def report(self):
+        print(f"⏱️ 抓取 {self.pages} 页 ({self.bytes / 1024:.0f} KB)，失败 {self.errors} 次，"
+              f"耗时 {self.seconds:.2f}s，{self.pages_per_sec:.1f} 页/秒")
+
+
+class BookCrawler:
+    def __init__(self, base_url=BASE_URL, headers=None, limit=20, limit_per_host=8, timeout=15, retries=2,
+                 parser='auto', verbose=True, cache=None):
+        self.base_url = base_url
+        self.headers = headers or HEADERS
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.parser = parser
+        self.verbose = verbose
+        self.cache = cache  # httpcache.ResponseCache，None 表示每次都下载
+        self.stats = CrawlStats()
+
+    async def fetch(self, session, url):
+        # 失败重试，间隔指数退避
+        for attempt in range(self.retries + 1):
+            try:
+                if self.cache is not None:
+                    response = await self.cache.aget(session, url, self.headers)
+                    body = response.content
+                    downloaded = response.source == 'network'
+                else:
+                    async with session.get(url) as resp:
+                        resp.raise_for_status()
+                        body = await resp.read()
+                    downloaded = True
+                self.stats.pages += 1
+                if downloaded:
+                    self.stats.bytes += len(body)
+                return body.decode('utf-8', errors='replace')  # 强制按 utf-8 解码，防止乱码
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.stats.errors += 1
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    def _session(self):
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                     timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def crawl(self, target_count=500):
+        start = time.perf_counter()
+        async with self._session() as session:
+            if self.verbose:
+                print("正在获取全部分类...")
+            categories = parse_categories(await self.fetch(session, self.base_url), self.parser)
+            books = await self._crawl_categories(session, categories, target_count)
+        self.stats.seconds = time.perf_counter() - start
+        return books
+
+    async def _crawl_categories(self, session, categories, target_count):
+        # 优先级队列按 (分类序号, 页码) 排序：靠前分类的下一页总是先于后面分类被抓取，
+        # 结果按原脚本的顺序（分类依次、逐页）拼接，凑够 target_count 即停
+        queue = asyncio.PriorityQueue()
+        pages = [dict() for _ in categories]  # 分类序号 -> {页码: 书目}
+        finished = [False] * len(categories)
+        stop = asyncio.Event()
+
+        for i, (_, href) in enumerate(categories):
+            queue.put_nowait((i, 0, urljoin(self.base_url, href)))
+
+        def ordered_books():
+            out = []
+            for i, cat_pages in enumerate(pages):
+                page_no = 0
+                while page_no in cat_pages:
+                    out.extend(cat_pages[page_no])
+                    page_no += 1
+                if not finished[i] or len(out) >= target_count:
+                    break
+            return out
+
+        async def worker():
+            while True:
+                i, page_no, url = await queue.get()
+                try:
+                    if not stop.is_set():
+                        await process(i, page_no, url)
+                finally:
+                    queue.task_done()
+
+        async def process(i, page_no, url):
+            name = categories[i][0]
+            try:
+                if page_no == 0 and self.verbose:
+                    print(f"📂 正在进入分类: {name}")
+                html_text = await self.fetch(session, url)
+                books, next_href = parse_listing(html_text, name, self.parser)
+                if next_href:
+                    # 先把下一页放回队列，空闲的 worker 可以立即开始抓
+                    queue.put_nowait((i, page_no + 1, urljoin(url, next_href)))
+                pages[i][page_no] = books
+                if not next_href:
+                    finished[i] = True
+            except Exception as e:
+                print(f"解析出错: {e}")
+                pages[i].setdefault(page_no, [])
+                finished[i] = True
+            if len(ordered_books()) >= target_count:
+                stop.set()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.limit)]
+        waiters = [asyncio.create_task(queue.join()), asyncio.create_task(stop.wait())]
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for task in workers + waiters:
+            task.cancel()
+        await asyncio.gather(*workers, *waiters, return_exceptions=True)
+
+        all_books = ordered_books()[:target_count]
+        if self.verbose:
+            print(f"   已累计抓取: {len(all_books)} 本")
+        return all_books
+
+
+def crawl_books(target_count=500, **kwargs):
+    crawler = BookCrawler(**kwargs)
+    books = asyncio.run(crawler.crawl(target_count))
+    return books, crawler.stats
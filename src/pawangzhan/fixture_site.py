@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import html
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 本地仿 books.toscrape.com 站点：页面结构与真站一致（.nav-list 分类、.product_pod、.next 翻页），
+# 用来在离线环境下测爬虫吞吐量（页/秒），不必反复请求真实网站
+
+RATING_WORDS = ['One', 'Two', 'Three', 'Four', 'Five']
+PAGE_SIZE = 20
+
+
+def _slug(name):
+    return name.lower().replace(' ', '-')
+
+
+def build_site(n_categories=50, n_books=1000, page_size=PAGE_SIZE, seed=42):
+    # 返回 {路径: HTML}，书目随机分配到各分类，分类页每 page_size 本翻一页
+    rng = random.Random(seed)
+    categories = [f'Category {i + 1:02d}' for i in range(n_categories)]
+    books = {name: [] for name in categories}
+    for i in range(n_books):
+        name = categories[i % n_categories] if i < n_categories else rng.choice(categories)
+        books[name].append({
+            'title': f'Book {i + 1:04d}: ' + ' '.join(rng.choice(['Light', 'Attic', 'Velvet', 'Soumission', 'Sharp',
+                                                                 'Objects', 'Sapiens', 'Requiem', 'Dark'])
+                                                      for _ in range(3)),
+            'price': rng.uniform(10, 60),
+            'rating': rng.choice(RATING_WORDS),
+        })
+
+    pages = {}
+    links = []
+    for idx, name in enumerate(categories, start=2):
+        folder = f'catalogue/category/books/{_slug(name)}_{idx}'
+        links.append(f'<li><a href="{folder}/index.html">\n    {html.escape(name)}\n</a></li>')
+        items = books[name]
+        n_pages = max(1, -(-len(items) // page_size))
+        for p in range(n_pages):
+            chunk = items[p * page_size:(p + 1) * page_size]
+            page_name = 'index.html' if p == 0 else f'page-{p + 1}.html'
+            pages[f'/{folder}/{page_name}'] = _listing_page(name, chunk, p + 1, n_pages)
+
+    pages['/'] = pages['/index.html'] = _index_page(links)
+    return pages
+
+
+def _index_page(links):
+    return ('<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8"><title>All products | Books to Scrape</title>'
+            '</head><body><div class="side_categories"><ul class="nav nav-list"><li>'
+            '<a href="catalogue/category/books_1/index.html">Books</a><ul>'
+            + ''.join(links) +
+            '</ul></li></ul></div></body></html>')
+
+
+def _listing_page(name, books, page_no, n_pages):
+    pods = []
+    for b in books:
+        title = html.escape(b['title'], quote=True)
+        pods.append(
+            '<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">'
+            f'<div class="image_container"><a href="#"><img src="x.jpg" alt="{title}" class="thumbnail"></a></div>'
+            f'<p class="star-rating {b["rating"]}"><i class="icon-star"></i></p>'
+            f'<h3><a href="#" title="{title}">{title[:20]}...</a></h3>'
+            f'<div class="product_price"><p class="price_color">£{b["price"]:.2f}</p>'
+            '<p class="instock availability"><i class="icon-ok"></i> In stock</p></div></article></li>')
+    pager = f'<li class="current">Page {page_no} of {n_pages}</li>'
+    if page_no < n_pages:
+        pager += f'<li class="next"><a href="page-{page_no + 1}.html">next</a></li>'
+    return ('<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8">'
+            f'<title>{html.escape(name)} | Books to Scrape</title></head><body>'
+            f'<div class="page-header action"><h1>{html.escape(name)}</h1></div>'
+            '<section><ol class="row">' + ''.join(pods) + '</ol>'
+            '<div><ul class="pager">' + pager + '</ul></div></section></body></html>')
+
+
+def _make_handler(pages, latency):
+    encoded = {path: body.encode('utf-8') for path, body in pages.items()}
+    etags = {path: '"' + hashlib.md5(body).hexdigest() + '"' for path, body in encoded.items()}
+    last_modified = formatdate(time.time(), usegmt=True)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # 支持 keep-alive，和真站一样可以复用连接
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)  # 模拟网络往返
+            body = encoded.get(self.path.split('?', 1)[0])
+            if body is None:
+                self.send_error(404)
+                return
+            etag = etags[self.path.split('?', 1)[0]]
+            if self.headers.get('If-None-Match') == etag:
+                # 条件请求命中：只回 304，不传正文
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 爬虫凑够数量后会取消未完成的请求，客户端断开属于正常情况
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+@contextmanager
+def serve_site(pages=None, host='127.0.0.1', port=0, latency=0.0):
+    # 在后台线程启动站点，yield 根地址（以 / 结尾，可直接当 base_url 用）
+    server = _QuietServer((host, port), _make_handler(pages or build_site(), latency))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_address[1]}/'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='本地仿 books.toscrape.com 站点')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05, help='每个请求额外延迟的秒数')
+    args = parser.parse_args()
+
+    with serve_site(build_site(args.categories, args.books), port=args.port, latency=args.latency) as url:
+        print(f"✅ 测试站点已启动: {url}  (Ctrl+C 退出)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+# 爬虫共用的磁盘响应缓存：按 URL + 请求头做键，TTL 内直接用本地副本，
+# 过期后带 If-None-Match / If-Modified-Since 做条件请求，304 时沿用旧内容
+
+CACHE_DIR_NAME = '.http_cache'
+DEFAULT_TTL = 24 * 3600
+
+
+def _header(headers, name):
+    # 响应头大小写不固定（HTTP/2 下全是小写），按不区分大小写查找
+    for k, v in headers.items():
+        if k.lower() == name.lower():
+            return v
+    return None
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict = field(default_factory=dict)
+    source: str = 'network'  # network: 新下载；revalidated: 304 沿用；cache: TTL 内直接命中
+
+    @property
+    def from_network(self):
+        # 是否真的向服务器发了请求（限速时据此决定要不要休眠）
+        return self.source != 'cache'
+
+    @property
+    def text(self):
+        content_type = _header(self.headers, 'Content-Type') or ''
+        charset = content_type.split('charset=')[-1].split(';')[0].strip() if 'charset=' in content_type else 'utf-8'
+        return self.content.decode(charset, errors='replace')
+
+
+class ResponseCache:
+    def __init__(self, root=CACHE_DIR_NAME, ttl=DEFAULT_TTL):
+        self.root = root
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def make_key(self, url, headers=None):
+        # 请求头参与键（例如换了 Cookie 的豆瓣页面不会复用旧账号的结果）
+        parts = [url] + [f'{k.lower()}:{v}' for k, v in sorted((headers or {}).items())]
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        return os.path.join(self.root, key + '.json'), os.path.join(self.root, key + '.body')
+
+    def lookup(self, url, headers=None):
+        meta_path, body_path = self._paths(self.make_key(url, headers))
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(body_path) else None
+
+    def is_fresh(self, meta):
+        return self.ttl is not None and time.time() - meta['fetched_at'] < self.ttl
+
+    def has_fresh(self, url, headers=None):
+        meta = self.lookup(url, headers)
+        return bool(meta) and self.is_fresh(meta)
+
+    def validators(self, meta):
+        # 条件请求头：服务器内容没变时返回 304，不再传输正文
+        if not meta:
+            return {}
+        out = {}
+        if meta.get('etag'):
+            out['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            out['If-Modified-Since'] = meta['last_modified']
+        return out
+
+    def read(self, meta, source):
+        with open(self._paths(meta['key'])[1], 'rb') as f:
+            content = f.read()
+        return CachedResponse(meta['url'], meta['status'], content, meta['headers'], source)
+
+    def store(self, url, headers, status, content, response_headers):
+        os.makedirs(self.root, exist_ok=True)
+        key = self.make_key(url, headers)
+        meta_path, body_path = self._paths(key)
+        kept = {k: v for k, v in response_headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')}
+        meta = {'key': key, 'url': url, 'status': status, 'headers': kept, 'fetched_at': time.time(),
+                'etag': _header(response_headers, 'ETag'), 'last_modified': _header(response_headers, 'Last-Modified')}
+        # 先写临时文件再替换，中途中断不会留下半截缓存
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        return meta
+
+    def touch(self, meta, response_headers):
+        # 304：内容没变，刷新时间戳与校验值后继续沿用
+        meta['fetched_at'] = time.time()
+        meta['etag'] = _header(response_headers, 'ETag') or meta.get('etag')
+        meta['last_modified'] = _header(response_headers, 'Last-Modified') or meta.get('last_modified')
+        meta_path = self._paths(meta['key'])[0]
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def get(self, session, url, headers=None, **kwargs):
+        # 同步版本（requests.Session），返回 CachedResponse；非 200 响应不写缓存
+        meta = self.lookup(url, headers)
+        if meta and self.is_fresh(meta):
+            self.hits += 1
+            return self.read(meta, 'cache')
+
+        response = session.get(url, headers={**(headers or {}), **self.validators(meta)}, **kwargs)
+        if response.status_code == 304 and meta:
+            self.revalidated += 1
+            self.touch(meta, response.headers)
+            return self.read(meta, 'revalidated')
+
+        self.misses += 1
+        if response.status_code == 200:
+            self.store(url, headers, response.status_code, response.content, response.headers)
+        return CachedResponse(url, response.status_code, response.content, dict(response.headers))
+
+    async def aget(self, session, url, headers=None):
+        # 异步版本（aiohttp.ClientSession）；非 2xx 直接抛出，由调用方重试
+        meta = self.lookup(url, headers)
+        if meta and self.is_fresh(meta):
+            self.hits += 1
+            return self.read(meta, 'cache')
+
+        async with session.get(url, headers=self.validators(meta)) as resp:
+            if resp.status == 304 and meta:
+                self.revalidated += 1
+                self.touch(meta, resp.headers)
+                return self.read(meta, 'revalidated')
+            resp.raise_for_status()
+            content = await resp.read()
+            response_headers = dict(resp.headers)
+
+        self.misses += 1
+        self.store(url, headers, resp.status, content, response_headers)
+        return CachedResponse(url, resp.status, content, response_headers)
+
+    def discard(self, url, headers=None):
+        # 调用方发现内容不可用（例如被拦截的空页）时删掉这一条，下次重新下载
+        for path in self._paths(self.make_key(url, headers)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            os.remove(os.path.join(self.root, name))
+
+    def report(self):
+        total = self.hits + self.revalidated + self.misses
+        print(f"🗂️ 响应缓存: 命中 {self.hits}，304 复用 {self.revalidated}，未命中 {self.misses}"
+              + (f"（命中率 {(self.hits + self.revalidated) / total:.0%}）" if total else ""))
@@ -1,92 +1,161 @@
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
-import random
+import argparse
+from comment_store import CommentStore
+from httpcache import CACHE_DIR_NAME, DEFAULT_TTL, ResponseCache
+from ratelimit import TokenBucket
 
 # 1. 配置信息
 MOVIE_ID = '26861685'
 # 请确保使用你刚才获取的完整 Cookie
 MY_COOKIE = 'viewed="1270071"; bid=vycjtVrP1_M; _vwo_uuid_v2=DE373CB067B81FEC080D9A303F3B8B3AF|a261524f07708fe8ea346b1ac864d944; ll="108235"; dbcl2="121620847:hQhkNTHNENY"; ck=xhpM; frodotk_db="7f5b5ac580d16bb07e12105082744310";'
-
-
-def scrape_300_comments():
-    all_comments = []
+PAGE_SIZE = 20
+DB_PATH = 'douban_comments.db'
+
+
+def parse_comments(html, page_no):
+    # 返回 (评论列表, 页面上的 .comment-item 个数, 页面是否有评论列表区域)
+    soup = BeautifulSoup(html, 'html.parser')
+    items = soup.select('.comment-item')
+    listed = soup.select_one('#comments') is not None
+    comments = []
+    for item in items:
+        # 尝试抓取各项数据，若某项缺失则填充默认值
+        try:
+            user = item.select_one('.comment-info a').text
+            rating_tag = item.select_one('.rating')
+            rating = rating_tag['title'] if rating_tag else "未评分"
+            votes = item.select_one('.votes').text
+            time_str = item.select_one('.comment-time')['title']
+            content = item.select_one('.short').text.strip().replace('\n', ' ')
+
+            comments.append({
+                '页码': page_no,
+                '用户': user,
+                '评分': rating,
+                '有用数': votes,
+                '发布日期': time_str,
+                '评论内容': content
+            })
+        except Exception:
+            continue  # 某条评论解析出错则跳过，继续下一条
+    return comments, len(items), listed
+
+
+def scrape_movie(movie_id, store, session, bucket, cache=None, total_pages=15):
+    # 抓取一部电影的短评；已写入 store 的页直接跳过。返回 False 表示被拒绝访问，应停止整个任务
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Cookie': MY_COOKIE,
-        'Referer': f'https://movie.douban.com/subject/{MOVIE_ID}/comments'
+        'Referer': f'https://movie.douban.com/subject/{movie_id}/comments'
     }
 
-    # 300条数据需要爬取 15 页 (0到14)
-    total_pages = 15
+    seen = store.seen_starts(movie_id)
+    if store.is_exhausted(movie_id):
+        print(f"🎬 {movie_id}: 评论已全部抓完（{store.count(movie_id)} 条），跳过")
+        return True
+    if seen:
+        print(f"🎬 {movie_id}: 断点续抓，已有 {len(seen)} 页，最后 start={store.last_start(movie_id)}")
 
     for page in range(total_pages):
-        start = page * 20
+        start = page * PAGE_SIZE
+        if start in seen:
+            continue
         # sort=new_score 表示按热门排序，也可以改为 time 按时间排序
-        url = f'https://movie.douban.com/subject/{MOVIE_ID}/comments?start={start}&limit=20&status=P&sort=new_score'
+        url = f'https://movie.douban.com/subject/{movie_id}/comments?start={start}&limit=20&status=P&sort=new_score'
 
         try:
-            print(f"进度: [{page + 1}/{total_pages}] 正在爬取第 {page + 1} 页...")
-            response = requests.get(url, headers=headers, timeout=10)
+            print(f"进度: {movie_id} [{page + 1}/{total_pages}] 正在爬取第 {page + 1} 页...")
+            # 关键：为了安全，所有电影共用一个令牌桶限速（平均与原来每页随机休息 3-6 秒相同）
+            # 缓存里还新鲜的页不访问服务器，不消耗令牌
+            if cache is None or not cache.has_fresh(url, headers):
+                bucket.acquire()
+            if cache is not None:
+                response = cache.get(session, url, headers, timeout=10)
+            else:
+                response = session.get(url, headers=headers, timeout=10)
 
             if response.status_code != 200:
                 print(f"停止抓取：状态码 {response.status_code}。可能是 Cookie 失效或被暂时封禁。")
+                print(f"已抓到的页已保存，修复后重新运行会从断点继续。")
+                return False
+
+            comments, n_items, listed = parse_comments(response.text, page + 1)
+            if not comments:
+                # 空页不写进度也不留在缓存里，下次运行会重新请求这一页
+                if cache is not None:
+                    cache.discard(url, headers)
+                if listed and n_items == 0:
+                    print("评论列表已到末尾。")
+                    store.mark_finished(movie_id)
+                    break
+                print("停止抓取：本页没有可解析的评论，可能是登录页或验证码页。")
+                print(f"已抓到的页已保存，修复后重新运行会从断点继续。")
+                return False
+
+            store.save_page(movie_id, start, comments)
+            if n_items < PAGE_SIZE:
+                # 不满一页说明这是最后一页
+                print("评论列表已到末尾。")
+                store.mark_finished(movie_id)
                 break
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            items = soup.select('.comment-item')
-
-            if not items:
-                print("本页未找到评论，可能已达到抓取上限。")
-                break
-
-            for item in items:
-                # 尝试抓取各项数据，若某项缺失则填充默认值
-                try:
-                    user = item.select_one('.comment-info a').text
-                    rating_tag = item.select_one('.rating')
-                    rating = rating_tag['title'] if rating_tag else "未评分"
-                    votes = item.select_one('.votes').text
-                    time_str = item.select_one('.comment-time')['title']
-                    content = item.select_one('.short').text.strip().replace('\n', ' ')
-
-                    all_comments.append({
-                        '页码': page + 1,
-                        '用户': user,
-                        '评分': rating,
-                        '有用数': votes,
-                        '发布日期': time_str,
-                        '评论内容': content
-                    })
-                except Exception:
-                    continue  # 某条评论解析出错则跳过，继续下一条
-
-            # 关键：为了安全，每页抓取后随机休息 3-6 秒
-            # 爬 300 条大约需要 1 分钟左右
-            time.sleep(random.uniform(3, 6))
-
         except Exception as e:
             print(f"网络请求出错: {e}")
-            break
-
-    # 2. 导出数据
-    if all_comments:
-        df = pd.DataFrame(all_comments)
-        # 按照“有用数”从高到低排序，方便你查看最有价值的评论
-        df['有用数'] = pd.to_numeric(df['有用数'], errors='coerce')
-        df = df.sort_values(by='有用数', ascending=False)
-
-        output_file = f'douban_300_comments_{MOVIE_ID}.xlsx'
-        df.to_excel(output_file, index=False)
-        print("\n" + "=" * 30)
-        print(f"抓取成功！")
-        print(f"实际抓取总数: {len(all_comments)} 条")
-        print(f"结果已保存至: {output_file}")
-        print("=" * 30)
-    else:
-        print("未抓取到任何数据，请检查网络或 Cookie。")
+            return False
+    return True
+
+
+def export_comments(store, movie_id):
+    df = store.to_frame(movie_id, PAGE_SIZE)
+    if df.empty:
+        print(f"{movie_id}: 未抓取到任何数据，请检查网络或 Cookie。")
+        return None
+
+    # 按照“有用数”从高到低排序，方便你查看最有价值的评论
+    df['有用数'] = pd.to_numeric(df['有用数'], errors='coerce')
+    df = df.sort_values(by='有用数', ascending=False)
+
+    output_file = f'douban_300_comments_{movie_id}.xlsx'
+    df.to_excel(output_file, index=False)
+    print("\n" + "=" * 30)
+    print(f"抓取成功！")
+    print(f"实际抓取总数: {len(df)} 条")
+    print(f"结果已保存至: {output_file}")
+    print("=" * 30)
+    return output_file
+
+
+def scrape_300_comments(movie_ids=(MOVIE_ID,), total_pages=15, db_path=DB_PATH, interval=(3, 6),
+                        cache_dir=CACHE_DIR_NAME, ttl=DEFAULT_TTL):
+    # 已抓过的页直接读本地缓存（过期后条件请求），只有新页才消耗网络和限速时间
+    cache = ResponseCache(cache_dir, ttl) if cache_dir else None
+    session = requests.Session()
+    bucket = TokenBucket.per_request(*interval)
+
+    with CommentStore(db_path) as store:
+        for movie_id in movie_ids:
+            ok = scrape_movie(movie_id, store, session, bucket, cache, total_pages)
+            # 2. 导出数据（包括以前运行已经抓到的页）
+            export_comments(store, movie_id)
+            if not ok:
+                break
+
+    print(f"⏱️ 限速等待共 {bucket.waited:.1f}s")
+    if cache is not None:
+        cache.report()
 
 
 if __name__ == "__main__":
-    scrape_300_comments()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='豆瓣短评抓取（可断点续抓）')
+    parser.add_argument('movies', nargs='*', default=[MOVIE_ID], help='一个或多个电影 ID')
+    parser.add_argument('--pages', type=int, default=15, help='每部电影抓多少页（每页 20 条）')
+    parser.add_argument('--db', default=DB_PATH, help='断点数据库')
+    parser.add_argument('--interval', type=float, nargs=2, default=[3, 6], metavar=('MIN', 'MAX'),
+                        help='平均请求间隔范围（秒）')
+    parser.add_argument('--no-cache', action='store_true', help='不读写响应缓存')
+    args = parser.parse_args()
+    if not 0 <= args.interval[0] <= args.interval[1]:
+        parser.error('--interval 需要 0 <= MIN <= MAX（MIN 为 0 表示不限速，只随机等待 0~MAX 秒）')
+    scrape_300_comments(args.movies, args.pages, args.db, args.interval, None if args.no_cache else CACHE_DIR_NAME)
@@ -0,0 +1,44 @@
+import random
+import threading
+import time
+
+# 令牌桶限速：按固定速率补充令牌，每次请求消耗一个。多个电影、多个线程共用一个桶，
+# 总请求速率不会因为同时抓几部电影而翻倍
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1, jitter=0.0):
+        # rate: 每秒补充的令牌数，None 表示不限速（只做随机等待）；capacity: 最多攒多少个（决定允许的突发量）
+        # jitter: 每次放行后额外随机等待 0~jitter 秒，避免请求间隔过于规整
+        self.rate = rate
+        self.capacity = capacity
+        self.jitter = jitter
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_request(cls, low, high, capacity=1):
+        # 与原来的 random.uniform(low, high) 休眠平均速率一致；low 为 0 时不限速，只保留随机等待
+        return cls(1.0 / low if low > 0 else None, capacity, jitter=high - low)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n=1):
+        with self._lock:
+            extra = random.uniform(0, self.jitter) if self.jitter else 0.0
+            if self.rate is None:
+                wait = extra
+            else:
+                self._refill()
+                wait = max(0.0, (n - self.tokens) / self.rate) + extra
+                # 先记账，后来的调用按顺序排在后面；随机等待的时间也算在这次请求头上
+                self.tokens -= n + extra * self.rate
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
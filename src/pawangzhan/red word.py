@@ -1,41 +1,51 @@
+import argparse
 import pandas as pd
-import jieba
+from segment import tokenize_comments
 from wordcloud import WordCloud
+from wordfreq import DEFAULT_STOPWORDS, WordFrequency
 import matplotlib.pyplot as plt
 import os
+import sys
 
+# 共用 src/ethcast 里的阶段计时与 --profile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ethcast import profiling, trace  # noqa: E402
+from ethcast.trace import span, traced  # noqa: E402
 
-def generate_final_wordcloud(file_path):
-    # 1. 检查文件是否存在
-    if not os.path.exists(file_path):
-        print(f"❌ 错误：找不到文件 {file_path}，请检查文件名或路径。")
-        return
+COUNTS_FILE = 'word_freq.json'
 
-    # 2. 读取 Excel 数据
-    print("📖 正在读取 Excel 数据...")
-    df = pd.read_excel(file_path)
 
-    # 确保‘评论内容’这一列存在，并合并文本
-    if '评论内容' not in df.columns:
-        print("❌ 错误：Excel 中没找到‘评论内容’这一列，请检查表头。")
-        return
+@traced()
+def count_words(file_paths, stopwords=DEFAULT_STOPWORDS):
+    # 逐个评论文件分词并累加词频，多部电影的评论合并成一份计数
+    freq = WordFrequency()
+    for file_path in file_paths:
+        # 1. 检查文件是否存在
+        if not os.path.exists(file_path):
+            print(f"❌ 错误：找不到文件 {file_path}，请检查文件名或路径。")
+            return None
+
+        # 2. 读取 Excel 数据
+        print(f"📖 正在读取 Excel 数据: {file_path}")
+        with span('read_excel', file=os.path.basename(file_path)):
+            df = pd.read_excel(file_path)
 
-    text = " ".join(df['评论内容'].astype(str))
+        # 确保‘评论内容’这一列存在
+        if '评论内容' not in df.columns:
+            print("❌ 错误：Excel 中没找到‘评论内容’这一列，请检查表头。")
+            return None
 
-    # 3. 中文分词 (使用 jieba)
-    print("✂️ 正在进行中文分词...")
-    words = jieba.cut(text)
+        # 3. 中文分词 (使用 jieba)：逐条评论分词，结果按内容哈希缓存，新评论多时多进程并行
+        print("✂️ 正在进行中文分词...")
+        with span('tokenize', comments=len(df)):
+            token_lists = tokenize_comments(df['评论内容'].astype(str))
 
-    # 定义停用词（过滤掉无意义的虚词）
-    stopwords = {
-        '的', '了', '在', '是', '我', '有', '一个', '个人', '看', '这', '那', '都', '和', '就',
-        '电影', '这部', '真的', '太', '被', '说', '这种', '感觉', '觉得', '还', '让', '去'
-    }
+        # 过滤词汇：只保留长度大于1的词，且不在停用词列表中，直接累加词频
+        freq.add_comments(token_lists, stopwords, min_len=2, source=os.path.basename(file_path))
+    return freq
 
-    # 过滤词汇：只保留长度大于1的词，且不在停用词列表中
-    filtered_words = [word for word in words if len(word) > 1 and word not in stopwords]
-    result_text = " ".join(filtered_words)
 
+def find_chinese_font():
     # 4. 寻找 Mac 系统中文字体 (解决 OSError: cannot open resource)
     font_paths = [
         '/System/Library/Fonts/PingFang.ttc',  # 苹方
@@ -52,35 +62,77 @@ def generate_final_wordcloud(file_path):
 
     if not target_font:
         print("❌ 错误：在你的 Mac 上没找到中文字体文件，请确认路径。")
-        return
     else:
         print(f"✅ 使用字体: {target_font}")
+    return target_font
+
+
+@traced()
+def render_wordcloud(freq, max_words=100, colormap='viridis', output_image="movie_wordcloud_result.png"):
+    target_font = find_chinese_font()
+    if not target_font:
+        return
 
-    # 5. 配置并生成词云
+    # 5. 配置并生成词云：直接用词频出图，WordCloud 不再重新切词、计数
     print("🎨 正在绘制词云图...")
     wc = WordCloud(
         font_path=target_font,
         background_color='white',
         width=1200,
         height=800,
-        max_words=100,  # 最多显示100个关键词
-        colormap='viridis',  # 颜色主题：可以换成 'plasma', 'inferno', 'magma'
+        max_words=max_words,  # 最多显示多少个关键词
+        colormap=colormap,  # 颜色主题：可以换成 'plasma', 'inferno', 'magma'
         random_state=42  # 固定随机种子，保证每次生成的布局一致
     )
 
-    wc.generate(result_text)
+    with span('layout', words=max_words):
+        wc.generate_from_frequencies(freq.top(max_words))
 
     # 6. 显示并保存图片
     plt.figure(figsize=(15, 10))
     plt.imshow(wc, interpolation='bilinear')
     plt.axis('off')  # 隐藏坐标轴
 
-    output_image = "movie_wordcloud_result.png"
-    wc.to_file(output_image)
+    with span('savefig', path=output_image):
+        wc.to_file(output_image)
     print(f"🎉 大功告成！词云图已保存为: {output_image}")
     plt.show()
 
 
+def generate_final_wordcloud(file_paths=None, max_words=100, colormap='viridis', counts_path=COUNTS_FILE,
+                             output_image="movie_wordcloud_result.png"):
+    # file_paths 为空时直接读取上次保存的词频，只重新出图
+    if file_paths:
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        freq = count_words(file_paths)
+        if freq is None:
+            return
+        freq.save(counts_path)
+        print(f"💾 词频已保存至 {counts_path}（{len(freq)} 个词），换参数重画可加 --from-counts")
+    else:
+        if not os.path.exists(counts_path):
+            print(f"❌ 错误：找不到词频文件 {counts_path}，请先从评论文件生成。")
+            return
+        freq = WordFrequency.load(counts_path)
+        print(f"📦 读取词频 {counts_path}：{len(freq)} 个词，来自 {', '.join(freq.sources)}")
+
+    render_wordcloud(freq, max_words, colormap, output_image)
+
+
 if __name__ == "__main__":
-    # 填入你之前生成的 Excel 文件名
-    generate_final_wordcloud('douban_300_comments_26861685.xlsx')
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='豆瓣短评词云')
+    # 填入你之前生成的 Excel 文件名，可以给多个（多部电影合并统计）
+    parser.add_argument('files', nargs='*', default=['douban_300_comments_26861685.xlsx'])
+    parser.add_argument('--from-counts', action='store_true', help='不读评论，直接用保存的词频重新出图')
+    parser.add_argument('--counts', default=COUNTS_FILE, help='词频文件路径')
+    parser.add_argument('--max-words', type=int, default=100)
+    parser.add_argument('--colormap', default='viridis')
+    parser.add_argument('--output', default="movie_wordcloud_result.png")
+    trace.add_argument(parser)
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+    trace.setup_from_args(args)
+    profiling.setup_from_args(args)
+    generate_final_wordcloud(None if args.from_counts else args.files, args.max_words, args.colormap, args.counts,
+                             args.output)
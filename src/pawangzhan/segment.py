@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import jieba
+
+# 评论分词：每条评论按内容哈希缓存分词结果，只对没见过的评论调用 jieba；
+# 新评论较多时分块放进进程池并行切分。jieba 前缀词典的缓存放在项目目录，
+# 不再依赖系统临时目录（被清理后每次启动都要重新构建词典）
+
+CACHE_DIR_NAME = '.segment_cache'
+MIN_PARALLEL = 2000  # 新评论少于这个数时串行，进程池启动和加载词典的开销不划算
+CHUNK_SIZE = 500
+
+jieba.setLogLevel(logging.WARNING)
+
+
+def init_jieba(cache_dir=CACHE_DIR_NAME):
+    # 从预先构建的前缀词典缓存加载（第一次运行时构建并写入 cache_dir）
+    os.makedirs(cache_dir, exist_ok=True)
+    jieba.dt.tmp_dir = os.path.abspath(cache_dir)
+    jieba.initialize()
+
+
+def _signature(hmm):
+    # 分词器版本或 HMM 开关变了，旧的分词结果就不能再用
+    return f'jieba-{jieba.__version__}-hmm{int(hmm)}'
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _cut_chunk(texts, hmm=True):
+    return [list(jieba.cut(text, HMM=hmm)) for text in texts]
+
+
+class TokenCache:
+    def __init__(self, path, signature):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS tokens (digest TEXT PRIMARY KEY, tokens TEXT NOT NULL)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != signature:
+            with self.conn:
+                self.conn.execute('DELETE FROM tokens')
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (signature,))
+
+    def get_many(self, digests, batch=500):
+        out = {}
+        digests = list(digests)
+        for i in range(0, len(digests), batch):
+            part = digests[i:i + batch]
+            rows = self.conn.execute(f"SELECT digest, tokens FROM tokens WHERE digest IN ({','.join('?' * len(part))})",
+                                     part)
+            out.update((d, json.loads(t)) for d, t in rows)
+        return out
+
+    def put_many(self, items):
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO tokens VALUES (?, ?)',
+                                  [(d, json.dumps(tokens, ensure_ascii=False)) for d, tokens in items])
+
+    def close(self):
+        self.conn.close()
+
+
+def tokenize_comments(texts, cache_dir=CACHE_DIR_NAME, workers=None, hmm=True, min_parallel=MIN_PARALLEL,
+                      verbose=True):
+    # 返回与 texts 一一对应的分词列表
+    t0 = time.perf_counter()
+    texts = [str(t) for t in texts]
+    digests = [_digest(t) for t in texts]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = TokenCache(os.path.join(cache_dir, 'tokens.db'), _signature(hmm))
+    try:
+        known = cache.get_many(set(digests))
+        todo = {}
+        for d, t in zip(digests, texts):
+            if d not in known:
+                todo.setdefault(d, t)
+
+        if todo:
+            pending = list(todo.items())
+            chunks = [[t for _, t in pending[i:i + CHUNK_SIZE]] for i in range(0, len(pending), CHUNK_SIZE)]
+            if len(pending) >= min_parallel and workers != 1 and len(chunks) > 1:
+                # 每个工作进程启动时先从词典缓存加载 jieba
+                with ProcessPoolExecutor(max_workers=workers, initializer=init_jieba, initargs=(cache_dir,)) as pool:
+                    results = [tokens for part in pool.map(_cut_chunk, chunks, [hmm] * len(chunks))
+                               for tokens in part]
+            else:
+                init_jieba(cache_dir)
+                results = _cut_chunk([t for _, t in pending], hmm)
+            new = list(zip([d for d, _ in pending], results))
+            cache.put_many(new)
+            known.update(new)
+    finally:
+        cache.close()
+
+    if verbose:
+        print(f"✂️ 分词 {len(texts)} 条评论：缓存命中 {len(texts) - sum(1 for d in digests if d in todo)}，"
+              f"新切分 {len(todo)}，耗时 {time.perf_counter() - t0:.2f}s")
+    return [known[d] for d in digests]
@@ -0,0 +1,48 @@
+import json
+from collections import Counter
+
+# 词频计数：边读分词结果边累加，可以跨评论文件、跨电影合并，
+# 保存成 JSON 后换 max_words / 配色重新出图时不必再读评论、再分词
+
+DEFAULT_STOPWORDS = {
+    '的', '了', '在', '是', '我', '有', '一个', '个人', '看', '这', '那', '都', '和', '就',
+    '电影', '这部', '真的', '太', '被', '说', '这种', '感觉', '觉得', '还', '让', '去'
+}
+
+
+class WordFrequency(Counter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sources = []
+
+    def add_tokens(self, tokens, stopwords=DEFAULT_STOPWORDS, min_len=2):
+        # 只保留长度不小于 min_len 的词，且不在停用词列表中
+        self.update(w for w in tokens if len(w) >= min_len and w not in stopwords)
+        return self
+
+    def add_comments(self, token_lists, stopwords=DEFAULT_STOPWORDS, min_len=2, source=None):
+        for tokens in token_lists:
+            self.add_tokens(tokens, stopwords, min_len)
+        if source is not None:
+            self.sources.append(source)
+        return self
+
+    def merge(self, other):
+        self.update(other)
+        self.sources.extend(s for s in getattr(other, 'sources', []) if s not in self.sources)
+        return self
+
+    def top(self, n):
+        return dict(self.most_common(n))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'sources': self.sources, 'counts': dict(self.most_common())}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        freq = cls(data['counts'])
+        freq.sources = data.get('sources', [])
+        return freq
@@ -2,7 +2,10 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestRegressor
-from datetime import timedelta
+from ethcast.data import load_ohlcv
+from ethcast.resample import bar_interval
+from ethcast.windows import make_xy
+from ethcast.plotting import finish_figure
 
 # 1. 设置中文显示
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
@@ -11,22 +14,15 @@ plt.rcParams['axes.unicode_minus'] = False
 # 2. 读取数据
 file_path = '第四周大数据分析作业.xlsx'
 try:
-    df = pd.read_excel(file_path)
-    # 确保按时间排序
-    df = df.sort_values('datetime')
+    # 读取缓存后的数据（已按时间排序）
+    df = load_ohlcv(file_path)
     print("✅ 数据加载成功，总计数据量：", len(df))
 
     # 3. 特征工程：我们用过去 10 个数据点来预测下一个点
     window_size = 10
     prices = df['close'].values
 
-    X = []
-    y = []
-    for i in range(len(prices) - window_size):
-        X.append(prices[i: i + window_size])
-        y.append(prices[i + window_size])
-
-    X, y = np.array(X), np.array(y)
+    X, y = make_xy(prices, window_size)
 
     # 4. 训练模型 (随机森林)
     model = RandomForestRegressor(n_estimators=100, random_state=42)
@@ -40,7 +36,7 @@ try:
 
     # 计算预测对应的时间
     last_date = df['datetime'].iloc[-1]
-    next_date = last_date + timedelta(minutes=1)  # 如果是分钟线就加1分钟，天线就加1天
+    next_date = last_date + bar_interval(df)  # 按数据本身的 K 线间隔推算：分钟线加1分钟，天线加1天
 
     print("-" * 30)
     print(f"📈 预测结果：")
@@ -57,7 +53,7 @@ try:
     plt.title(f'以太币价格预测 - 未来一日预计: {next_day_pred:.2f}')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    plt.show()
+    finish_figure('下一分钟预测.png')
 
 except Exception as e:
     print(f"❌ 运行中出现错误: {e}")
\ No newline at end of file
@@ -1,5 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from ethcast.data import load_ohlcv
+from ethcast.plotting import finish_figure
 # 1. 设置文件路径
 # 如果文件在同一个文件夹，直接写文件名；如果在别处，请写完整路径
 file_path = '第四周大数据分析作业.xlsx'
@@ -7,7 +9,7 @@ file_path = '第四周大数据分析作业.xlsx'
 try:
     # 2. 读取 Excel 文件
     # 如果有多个 Sheet，可以用 sheet_name='Sheet1' 指定
-    df = pd.read_excel(file_path)
+    df = load_ohlcv(file_path)
 
     # 3. 查看数据
     print("✅ 文件读取成功！")
@@ -28,7 +30,7 @@ except Exception as e:
 
 # 假设你的列名叫 'Date' 和 'Close'
 df.plot(x='datetime', y='close', title='以太币价格走势')
-plt.show()
+finish_figure('以太币价格走势.png')
 # 2. 如果要进行随机森林预测
 data = df['close'].values  # 同样使用小写的 close
 # ... 接下来的预测代码 ...
\ No newline at end of file
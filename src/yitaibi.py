@@ -1,6 +1,8 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from ethcast.data import load_ohlcv
+from ethcast.plotting import downsample, finish_figure
 
 # 1. 环境配置：解决中文显示问题
 # Mac用户使用 'Arial Unicode MS'，Windows用户建议改为 'SimHei'
@@ -12,20 +14,18 @@ def plot_eth_trends(file_path):
     try:
         # 2. 读取数据
         print(f"正在读取文件: {file_path}...")
-        df = pd.read_excel(file_path)
-
-        # 确保时间列是日期格式并排序
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df = df.sort_values('datetime')
+        # 缓存加载器已统一时间格式并排序
+        df = load_ohlcv(file_path)
 
         # 3. 创建画布
         plt.figure(figsize=(15, 8))
 
         # 4. 绘制不同颜色的曲线
-        # 使用不同的颜色和线型以便区分
-        plt.plot(df['datetime'], df['high'], label='最高价 (High)', color='#e74c3c', linewidth=1, alpha=0.7)
-        plt.plot(df['datetime'], df['open'], label='开盘价 (Open)', color='#3498db', linewidth=1, alpha=0.7)
-        plt.plot(df['datetime'], df['close'], label='收盘价 (Close)', color='black', linewidth=2)
+        # 使用不同的颜色和线型以便区分；数据点太多时先抽样：
+        # 最高价按每段的最小 / 最大值抽样，保证极值一定画出来；开盘、收盘价用 LTTB 保留走势形状（不保证保留极值）
+        plt.plot(*downsample(df['datetime'].values, df['high'].values, method='minmax'), label='最高价 (High)', color='#e74c3c', linewidth=1, alpha=0.7)
+        plt.plot(*downsample(df['datetime'].values, df['open'].values), label='开盘价 (Open)', color='#3498db', linewidth=1, alpha=0.7)
+        plt.plot(*downsample(df['datetime'].values, df['close'].values), label='收盘价 (Close)', color='black', linewidth=2)
 
         # 5. 图表修饰
         plt.title('以太币 (ETH) 价格走势图 - 多维度对比', fontsize=16)
@@ -41,9 +41,8 @@ def plot_eth_trends(file_path):
 
         # 6. 展示与保存
         plt.tight_layout()
-        plt.savefig('ETH_Price_Trend.png', dpi=300)
+        finish_figure('ETH_Price_Trend.png', dpi=300, always_save=True)
         print("✅ 绘图成功！图片已保存为: ETH_Price_Trend.png")
-        plt.show()
 
     except Exception as e:
         print(f"❌ 运行失败，错误信息: {e}")